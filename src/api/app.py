@@ -2,16 +2,39 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import json
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
 from src.config import get_settings
-from src.database import get_session, init_db
+from src.database import get_read_session, get_session, init_db
+from src.database.export import (
+    CONTENT_TYPES,
+    ExportFilter,
+    export_available,
+    iter_export,
+)
 from src.database.models import ReportLog
-from src.database.repository import ReportRepository, StatusRepository, check_db_connection
+from src.database.repository import (
+    GuildConfigRepository,
+    MessageRepository,
+    ReportRepository,
+    RollupRepository,
+    SearchRepository,
+    StatusHistoryRepository,
+    StatusRepository,
+    bucket_start,
+    check_db_connection,
+    parse_history_ids,
+)
+from src.database.search import decode_cursor, encode_cursor
+from src.services.guild_config import LLM_TIERS, OVERRIDE_FIELDS, resolve_policy
 
 app = FastAPI(title="Discord LLM Guard API")
 
@@ -29,23 +52,46 @@ def _startup() -> None:
     init_db()
 
 
-def _serialize_report(report: ReportLog) -> dict[str, Any]:
+def _serialize_report(
+    report: ReportLog, messages: dict[int, dict[str, Any]] | None = None
+) -> dict[str, Any]:
+    history: Any = report.reported_user_history
+    history_ids = parse_history_ids(report)
+    if history_ids and messages is not None:
+        history = [
+            messages[message_id] for message_id in history_ids if message_id in messages
+        ]
     return {
         "id": report.id,
         "guild_id": report.guild_id,
         "channel_id": report.channel_id,
         "reporter_id": report.reporter_id,
         "reporter_name": report.reporter_name,
+        "report_source": report.report_source or "user",
         "reported_user_id": report.reported_user_id,
         "reported_user_name": report.reported_user_name,
         "reported_message_id": report.reported_message_id,
         "reported_message_content": report.reported_message_content,
         "reported_message_url": report.reported_message_url,
         "report_reason": report.report_reason,
-        "reported_user_history": report.reported_user_history,
+        "reported_user_history": history,
+        "reported_attachments": (
+            json.loads(report.reported_attachments)
+            if report.reported_attachments
+            else []
+        ),
         "llm_decision": report.llm_decision,
         "llm_confidence": report.llm_confidence,
         "llm_reasoning": report.llm_reasoning,
+        "llm_tier": report.llm_tier,
+        "llm_usage": {
+            tier: {
+                "tokens": getattr(report, f"llm_{tier}_tokens"),
+                "latency_ms": getattr(report, f"llm_{tier}_latency_ms"),
+            }
+            for tier in ("small", "large")
+            if getattr(report, f"llm_{tier}_latency_ms") is not None
+        },
         "action_taken": report.action_taken,
         "action_success": report.action_success,
         "error_message": report.error_message,
@@ -60,25 +106,407 @@ def _serialize_report(report: ReportLog) -> dict[str, Any]:
 def get_status() -> dict[str, Any]:
     status_repo = StatusRepository()
     db_connected = check_db_connection()
-    with get_session() as session:
-        status = status_repo.get_latest_status(session)
-    last_heartbeat = status.last_heartbeat if status else None
+    with get_read_session() as session:
+        statuses = status_repo.list_statuses(session)
+        latest = status_repo.get_latest_status(session)
+    shards = [_serialize_shard(status_repo, row) for row in statuses]
+    online = [shard for shard in shards if shard["online"]]
+
+    def worst(field: str) -> float | None:
+        values = [shard["loop_lag_ms"][field] for shard in online]
+        values = [value for value in values if value is not None]
+        return max(values) if values else None
+
     return {
-        "bot_online": status_repo.is_online(status),
+        "bot_online": bool(online),
         "db_connected": db_connected,
-        "last_heartbeat": last_heartbeat.isoformat() if last_heartbeat else None,
-        "queue_depth": status.queue_depth if status else None,
-        "active_guilds": status.active_guilds if status else None,
+        "last_heartbeat": _as_utc_iso(latest.last_heartbeat) if latest else None,
+        "queue_depth": (
+            sum(shard["queue_depth"] or 0 for shard in online) if statuses else None
+        ),
+        "active_guilds": (
+            sum(shard["active_guilds"] or 0 for shard in online) if statuses else None
+        ),
+        "loop_lag_ms": (
+            {"p50": worst("p50"), "p99": worst("p99"), "max": worst("max")}
+            if statuses
+            else None
+        ),
+        "shards_online": len(online),
+        "shards": shards,
         "server_time": datetime.now(timezone.utc).isoformat(),
     }
 
 
+def _serialize_shard(status_repo: StatusRepository, status: Any) -> dict[str, Any]:
+    return {
+        "shard_id": status.shard_id if status.shard_id is not None else status.id - 1,
+        "shard_count": status.shard_count,
+        "online": status_repo.is_online(status),
+        "last_heartbeat": _as_utc_iso(status.last_heartbeat),
+        "latency_ms": status.latency_ms,
+        "active_guilds": status.active_guilds,
+        "queue_depth": status.queue_depth,
+        "loop_lag_ms": {
+            "p50": status.loop_lag_p50_ms,
+            "p99": status.loop_lag_p99_ms,
+            "max": status.loop_lag_max_ms,
+        },
+    }
+
+
+_STATUS_STEPS = {"MINUTE": 60, "HOUR": 3600, "DAY": 86400}
+_MAX_STATUS_POINTS = 5000
+
+
+def _rounded(value: Any) -> float | None:
+    return None if value is None else round(float(value), 2)
+
+
+@app.get("/api/status/history")
+def get_status_history(
+    hours: int = Query(default=24, ge=1, le=24 * 730),
+    granularity: str = Query(
+        default="auto", pattern="^(auto|minute|hour|day|MINUTE|HOUR|DAY)$"
+    ),
+    shard_id: int | None = Query(default=None, ge=0),
+) -> dict[str, Any]:
+    """Health time series: aligned arrays with one entry per bucket.
+
+    ``auto`` picks 1-minute buckets up to 12 hours, 1-hour buckets up to 30
+    days and 1-day buckets beyond. Buckets without samples are null.
+    """
+    granularity = granularity.upper()
+    if granularity == "AUTO":
+        granularity = "MINUTE" if hours <= 12 else "HOUR" if hours <= 720 else "DAY"
+    step = timedelta(seconds=_STATUS_STEPS[granularity])
+    now = datetime.now(timezone.utc)
+    since = bucket_start(now - timedelta(hours=hours), granularity)
+    points = int((now - since) / step) + 1
+    if points > _MAX_STATUS_POINTS:
+        raise HTTPException(
+            status_code=400, detail="Too many buckets; use a coarser granularity"
+        )
+    with get_read_session() as session:
+        rows = StatusHistoryRepository().get_series(
+            session, granularity, since, shard_id
+        )
+    by_start = {bucket_start(row[0], granularity): row for row in rows}
+
+    series: dict[str, list[Any]] = {
+        name: []
+        for name in (
+            "shards",
+            "samples",
+            "active_guilds",
+            "queue_depth",
+            "queue_depth_max",
+            "latency_ms",
+            "latency_ms_max",
+            "loop_lag_p99_ms",
+            "loop_lag_max_ms",
+        )
+    }
+    timestamps = []
+    for index in range(points):
+        start = since + step * index
+        timestamps.append(start.isoformat())
+        row = by_start.get(start)
+        if row is None:
+            for values in series.values():
+                values.append(None)
+            continue
+        (
+            _,
+            shards,
+            samples,
+            guilds,
+            queue_depth,
+            queue_depth_max,
+            latency_sum,
+            latency_count,
+            latency_max,
+            lag_sum,
+            lag_count,
+            lag_max,
+        ) = row
+        series["shards"].append(shards)
+        series["samples"].append(samples)
+        series["active_guilds"].append(_rounded(guilds))
+        series["queue_depth"].append(_rounded(queue_depth))
+        series["queue_depth_max"].append(queue_depth_max)
+        series["latency_ms"].append(
+            _rounded(latency_sum / latency_count) if latency_count else None
+        )
+        series["latency_ms_max"].append(
+            _rounded(latency_max) if latency_count else None
+        )
+        series["loop_lag_p99_ms"].append(
+            _rounded(lag_sum / lag_count) if lag_count else None
+        )
+        series["loop_lag_max_ms"].append(_rounded(lag_max) if lag_count else None)
+    return {
+        "granularity": granularity,
+        "step_seconds": int(step.total_seconds()),
+        "since": since.isoformat(),
+        "until": now.isoformat(),
+        "shard_id": shard_id,
+        "timestamps": timestamps,
+        "series": series,
+    }
+
+
 @app.get("/api/reports")
 def get_reports(limit: int = Query(default=20, ge=1, le=200)) -> list[dict[str, Any]]:
     repo = ReportRepository()
-    with get_session() as session:
+    with get_read_session() as session:
         reports = repo.list_reports(session, limit=limit)
-    return [_serialize_report(report) for report in reports]
+        messages = MessageRepository().load_messages(
+            session,
+            (
+                message_id
+                for report in reports
+                for message_id in parse_history_ids(report)
+            ),
+        )
+    return [_serialize_report(report, messages) for report in reports]
+
+
+@app.get("/api/reports/export")
+def export_reports(
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv|parquet)$"),
+    guild_id: int | None = Query(default=None),
+    decision: str | None = Query(default=None),
+    status: str | None = Query(default=None),
+    since: datetime | None = Query(default=None),
+    until: datetime | None = Query(default=None),
+    after_id: int | None = Query(default=None, ge=0),
+    limit: int | None = Query(default=None, ge=1),
+    history: bool = Query(default=False),
+) -> StreamingResponse:
+    if not export_available(format):
+        raise HTTPException(status_code=400, detail="pyarrow is not installed")
+    filters = ExportFilter(guild_id, decision, status, since, until, after_id, limit)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    return StreamingResponse(
+        iter_export(format, filters, history=history),
+        media_type=CONTENT_TYPES[format],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="report_logs-{stamp}.{format}"'
+            )
+        },
+    )
+
+
+@app.get("/api/reports/search")
+def search_reports(
+    q: str = Query(min_length=1, max_length=200),
+    field: str | None = Query(default=None, pattern="^(content|reason|reasoning)$"),
+    guild_id: int | None = Query(default=None),
+    decision: str | None = Query(default=None),
+    order: str = Query(default="relevance", pattern="^(relevance|recent)$"),
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=20, ge=1, le=100),
+) -> dict[str, Any]:
+    try:
+        after = decode_cursor(cursor, order) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor") from None
+    repo = SearchRepository()
+    filters = {"field": field, "guild_id": guild_id, "decision": decision}
+    window = get_settings().search_relevance_window
+    floor = 0
+    with get_read_session() as session:
+        if order == "relevance":
+            # Later pages keep the first page's window.
+            if after is not None:
+                *after, floor = after
+            elif window > 0:
+                floor = repo.relevance_floor(session, q, window, **filters)
+        hits = repo.search(
+            session,
+            q,
+            **filters,
+            order=order,
+            after=tuple(after) if after is not None else None,
+            floor=floor,
+            limit=limit + 1,
+        )
+        page = hits[:limit]
+        scores = dict(page)
+        reports = ReportRepository().get_reports(session, list(scores))
+        history_ids = [
+            message_id for report in reports for message_id in parse_history_ids(report)
+        ]
+        messages = MessageRepository().load_messages(session, history_ids)
+    next_cursor = None
+    if len(hits) > limit:
+        last_id, last_score = page[-1]
+        next_cursor = encode_cursor(
+            (last_score, last_id, floor) if order == "relevance" else (last_id,)
+        )
+    return {
+        "query": q,
+        "order": order,
+        "items": [
+            {**_serialize_report(report, messages), "score": scores[report.id]}
+            for report in reports
+        ],
+        "next_cursor": next_cursor,
+        # Relevance ranked only the newest SEARCH_RELEVANCE_WINDOW matches.
+        "windowed": floor > 0,
+    }
+
+
+@app.get("/api/stats")
+def get_stats(
+    granularity: str = Query(default="hour", pattern="^(hour|day|HOUR|DAY)$"),
+    hours: int = Query(default=24, ge=1, le=24 * 365),
+    guild_id: int | None = Query(default=None),
+    reporter_limit: int = Query(default=20, ge=1, le=200),
+) -> dict[str, Any]:
+    granularity = granularity.upper()
+    since = bucket_start(
+        datetime.now(timezone.utc) - timedelta(hours=hours), granularity
+    )
+    repo = RollupRepository()
+    with get_read_session() as session:
+        totals = repo.get_decision_totals(session, granularity, since, guild_id)
+        histogram = repo.get_confidence_histogram(session, granularity, since, guild_id)
+        series = repo.get_report_series(session, granularity, since, guild_id)
+        reporters = repo.get_reporter_stats(
+            session, bucket_start(since, "DAY"), guild_id, reporter_limit
+        )
+
+    total = sum(count for _, count, _, _ in totals)
+    decisions = {
+        decision: {
+            "count": count,
+            "rate": count / total if total else 0.0,
+            "avg_confidence": confidence_sum / count if count else 0.0,
+            "action_success_rate": success_count / count if count else 0.0,
+        }
+        for decision, count, confidence_sum, success_count in totals
+    }
+
+    confidence: dict[str, list[int]] = {}
+    for decision, bucket, count in histogram:
+        if bucket < 0:
+            continue
+        confidence.setdefault(decision, [0] * 10)[bucket] += count
+
+    return {
+        "granularity": granularity,
+        "since": since.isoformat(),
+        "total": total,
+        "decisions": decisions,
+        "confidence_histogram": {
+            "buckets": [f"{i / 10:.1f}-{(i + 1) / 10:.1f}" for i in range(10)],
+            "by_decision": confidence,
+        },
+        "reports_per_bucket": [
+            {
+                "bucket_start": _as_utc_iso(start),
+                "guild_id": bucket_guild or None,
+                "count": count,
+            }
+            for start, bucket_guild, count in series
+        ],
+        "reporters": [
+            {
+                "reporter_id": reporter_id,
+                "report_count": count,
+                "ban_count": ban_count,
+                "invalid_count": invalid_count,
+                "need_gm_count": need_gm_count,
+                "false_report_rate": invalid_count / count if count else 0.0,
+            }
+            for reporter_id, count, ban_count, invalid_count, need_gm_count in reporters
+        ],
+    }
+
+
+class GuildConfigUpdate(BaseModel):
+    """Body of ``PUT /api/guilds/{guild_id}/config``; null = global setting."""
+
+    gm_user_id: int | None = Field(default=None, ge=0)
+    gm_role_id: int | None = Field(default=None, ge=0)
+    history_message_limit: int | None = Field(default=None, ge=0, le=100)
+    ban_delete_days: int | None = Field(default=None, ge=0, le=7)
+    llm_model: str | None = Field(default=None, min_length=1, max_length=128)
+    llm_tier: str | None = Field(default=None, pattern=f"^({'|'.join(LLM_TIERS)})$")
+    llm_cascade_min_confidence: float | None = Field(default=None, ge=0, le=1)
+    proactive_scan_enabled: bool | None = None
+    proactive_score_threshold: int | None = Field(default=None, ge=1)
+    proactive_max_per_minute: int | None = Field(default=None, ge=0)
+    report_rate_limit_per_minute: int | None = Field(default=None, ge=0)
+    note: str | None = Field(default=None, max_length=500)
+
+
+def _serialize_guild_config(guild_id: int, row: Any) -> dict[str, Any]:
+    overrides = {}
+    if row is not None:
+        for name in OVERRIDE_FIELDS:
+            value = getattr(row, name)
+            if value is not None:
+                overrides[name] = value
+    version = row.version if row is not None else 0
+    return {
+        "guild_id": guild_id,
+        "overrides": overrides,
+        "effective": asdict(resolve_policy(overrides, version)),
+        "note": row.note if row is not None else None,
+        "version": version,
+        "updated_at": _as_utc_iso(row.updated_at) if row is not None else None,
+    }
+
+
+@app.get("/api/guilds/config")
+def list_guild_configs() -> dict[str, Any]:
+    repo = GuildConfigRepository()
+    with get_read_session() as session:
+        version = repo.get_version(session)
+        rows = repo.list_configs(session)
+    return {
+        "version": version,
+        "refresh_seconds": get_settings().guild_config_refresh_seconds,
+        "defaults": asdict(resolve_policy()),
+        "guilds": [_serialize_guild_config(row.guild_id, row) for row in rows],
+    }
+
+
+@app.get("/api/guilds/{guild_id}/config")
+def get_guild_config(guild_id: int) -> dict[str, Any]:
+    with get_read_session() as session:
+        row = GuildConfigRepository().get_config(session, guild_id)
+        return _serialize_guild_config(guild_id, row)
+
+
+@app.put("/api/guilds/{guild_id}/config")
+def put_guild_config(guild_id: int, update: GuildConfigUpdate) -> dict[str, Any]:
+    """Replace a guild's overrides; running bots reload them within seconds."""
+    with get_session() as session:
+        row = GuildConfigRepository().set_config(session, guild_id, update.model_dump())
+        return _serialize_guild_config(guild_id, row)
+
+
+@app.delete("/api/guilds/{guild_id}/config")
+def delete_guild_config(guild_id: int) -> dict[str, Any]:
+    """Clear every override of a guild (the row is kept as a new version)."""
+    with get_session() as session:
+        row = GuildConfigRepository().set_config(
+            session, guild_id, dict.fromkeys((*OVERRIDE_FIELDS, "note"))
+        )
+        return _serialize_guild_config(guild_id, row)
+
+
+def _as_utc_iso(value: datetime | None) -> str | None:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat()
 
 
 @app.get("/api/config")
@@ -3,18 +3,46 @@
 from __future__ import annotations
 
 import asyncio
+import importlib
+import math
+import time
 from typing import Optional
 
 import discord
 from discord.ext import commands, tasks
 
 from src.bot.events import register_event_handlers
-from src.database import get_session
-from src.database.repository import StatusRepository
+from src.config import get_settings
+from src.services.guild_config import get_guild_config_store
+from src.services.proactive import get_proactive_scanner
+from src.services.scheduler import get_report_scheduler
+from src.services.status_history import get_status_history
+from src.utils.helpers import parse_id_ranges
+from src.utils.loop_monitor import LoopLagMonitor
+from src.utils.timing import StartupTimer
 
 
-class LLMGuardBot(commands.Bot):
-    """Discord bot client."""
+def member_cache_options(lean: bool) -> dict[str, object]:
+    """Client options for the member cache.
+
+    The default caches every member of every guild, chunked at startup. The
+    lean mode caches none; reported members are fetched on demand by
+    ``DiscordService.get_member``.
+    """
+    if not lean:
+        return {}
+    return {
+        "member_cache_flags": discord.MemberCacheFlags.none(),
+        "chunk_guilds_at_startup": False,
+    }
+
+
+class LLMGuardBot(commands.AutoShardedBot):
+    """Discord bot client.
+
+    ``DISCORD_SHARD_COUNT`` / ``DISCORD_SHARD_IDS`` split the guilds across
+    processes; each process writes one heartbeat row per shard it runs.
+    """
 
     def __init__(self) -> None:
         intents = discord.Intents.default()
@@ -22,15 +50,85 @@ class LLMGuardBot(commands.Bot):
         intents.members = True
         intents.guilds = True
 
-        super().__init__(command_prefix="!", intents=intents, help_command=None)
-        self._status_repo = StatusRepository()
+        settings = get_settings()
+        shard_ids = parse_id_ranges(settings.discord_shard_ids)
+        shard_count = settings.discord_shard_count or None
+        if shard_ids is not None and shard_count is None:
+            raise ValueError("DISCORD_SHARD_IDS requires DISCORD_SHARD_COUNT")
+
+        super().__init__(
+            command_prefix="!",
+            intents=intents,
+            help_command=None,
+            shard_count=shard_count,
+            shard_ids=shard_ids,
+            **member_cache_options(settings.discord_lean_member_cache),
+        )
+        self._loop_monitor: LoopLagMonitor | None = None
+        self._db_ready: asyncio.Future[None] | None = None
+        self._warm_up: asyncio.Task[None] | None = None
+        self._closing: asyncio.Future[None] | None = None
+        self.startup_timer: StartupTimer | None = None
+
+    def set_db_init(self, task: asyncio.Future[None]) -> None:
+        """Let the gateway connect while ``init_db`` runs in ``task``."""
+        self._db_ready = task
+
+        def _failed(done: asyncio.Future[None]) -> None:
+            if not done.cancelled() and done.exception() is not None:
+                exc = done.exception()
+                print(f"[DB] init failed: {type(exc).__name__}: {exc}")
+                asyncio.ensure_future(self.close())
+
+        task.add_done_callback(_failed)
+
+    async def wait_for_db(self) -> None:
+        """Wait until the deferred ``init_db`` has finished."""
+        if self._db_ready is not None:
+            await asyncio.shield(self._db_ready)
 
     async def setup_hook(self) -> None:
         """Called before the bot connects."""
         print("Bot initializing...")
         register_event_handlers(self)
+        settings = get_settings()
+        if settings.loop_monitor_enabled and self._loop_monitor is None:
+            self._loop_monitor = LoopLagMonitor(
+                interval=settings.loop_lag_interval_ms / 1000,
+                warn_threshold=settings.loop_lag_warn_ms / 1000,
+                stack_threshold=settings.loop_lag_stack_ms / 1000,
+            )
+            self._loop_monitor.start()
         if not self._heartbeat.is_running():
             self._heartbeat.start()
+        if settings.status_sample_seconds > 0 and not self._status_sample.is_running():
+            self._status_sample.change_interval(seconds=settings.status_sample_seconds)
+            self._status_sample.start()
+        if not self._guild_config_refresh.is_running():
+            self._guild_config_refresh.change_interval(
+                seconds=settings.guild_config_refresh_seconds
+            )
+            self._guild_config_refresh.start()
+        if not self._reputation_refresh.is_running():
+            self._reputation_refresh.change_interval(
+                seconds=settings.reputation_refresh_seconds
+            )
+            self._reputation_refresh.start()
+        if settings.attachment_scan_enabled and not self._image_refresh.is_running():
+            self._image_refresh.change_interval(
+                seconds=settings.image_index_refresh_seconds
+            )
+            self._image_refresh.start()
+        if settings.case_retrieval_enabled and not self._case_sync.is_running():
+            self._case_sync.change_interval(seconds=settings.case_index_sync_seconds)
+            self._case_sync.start()
+        if settings.report_retention_days and not self._retention.is_running():
+            self._retention.start()
+        if not self._pending_resume.is_running():
+            self._pending_resume.change_interval(
+                seconds=settings.pending_report_resume_seconds
+            )
+            self._pending_resume.start()
 
     async def on_ready(self) -> None:
         """Called when the bot is ready."""
@@ -39,7 +137,20 @@ class LLMGuardBot(commands.Bot):
         print(f"User: {self.user.name}")
         print(f"User ID: {self.user.id}")
         print(f"Guilds: {len(self.guilds)}")
+        print(f"Shards: {sorted(self.shards)} of {self.shard_count}")
         print("=" * 50)
+        timer = self.startup_timer
+        if timer is not None and "gateway" not in timer.phases:
+            timer.mark("gateway")
+            print(f"[STARTUP] {timer.summary()}")
+        if self._warm_up is None:
+            # Import the report pipeline off the loop so the first report
+            # does not pay for openai/SQLAlchemy imports.
+            self._warm_up = asyncio.create_task(
+                asyncio.to_thread(
+                    importlib.import_module, "src.services.moderation_service"
+                )
+            )
 
         await self.change_presence(
             activity=discord.Activity(
@@ -52,22 +163,222 @@ class LLMGuardBot(commands.Bot):
     @tasks.loop(seconds=60)
     async def _heartbeat(self) -> None:
         await self._write_status()
+        await self._flush_status_history()
+
+    @tasks.loop(seconds=10)
+    async def _status_sample(self) -> None:
+        if self.user is None:
+            return
+        history = get_status_history()
+        loop_lag = self._loop_monitor.snapshot() if self._loop_monitor else None
+        # The queue is per process, so only the first shard reports it.
+        queue_depth = get_report_scheduler().qsize
+        for shard_id, guilds, latency_ms in self._shard_health():
+            history.record(shard_id, guilds, queue_depth, latency_ms, loop_lag)
+            queue_depth = 0
+
+    async def _flush_status_history(self) -> None:
+        history = get_status_history()
+        if not len(history):
+            return
+        try:
+            await self.wait_for_db()
+            await asyncio.to_thread(history.flush_sync)
+        except Exception as exc:  # pragma: no cover
+            print(
+                f"[DB] status history flush failed ({len(history)} samples kept): "
+                f"{type(exc).__name__}: {exc}"
+            )
+
+    @tasks.loop(seconds=5)
+    async def _guild_config_refresh(self) -> None:
+        store = get_guild_config_store()
+        try:
+            await self.wait_for_db()
+            changed = await asyncio.to_thread(store.refresh_sync)
+        except Exception as exc:  # pragma: no cover
+            print(f"[DB] guild config refresh failed: {type(exc).__name__}: {exc}")
+            return
+        if changed:
+            print(f"[DB] loaded {len(store)} guild configs (version {store.version})")
+
+    @tasks.loop(seconds=300)
+    async def _reputation_refresh(self) -> None:
+        scheduler = get_report_scheduler()
+        try:
+            await self.wait_for_db()
+            count = await asyncio.to_thread(scheduler.tracker.refresh_sync)
+        except Exception as exc:  # pragma: no cover
+            print(f"[DB] reputation refresh failed: {type(exc).__name__}: {exc}")
+            return
+        if self._reputation_refresh.current_loop == 0:
+            print(f"[DB] loaded reputation for {count} reporters")
+
+    @tasks.loop(seconds=15)
+    async def _pending_resume(self) -> None:
+        from src.services.handover import resume_pending_reports
+
+        if not self.is_ready():
+            return
+        try:
+            await self.wait_for_db()
+            resumed = await resume_pending_reports(self)
+        except Exception as exc:  # pragma: no cover
+            print(f"[QUEUE] resuming reports failed: {type(exc).__name__}: {exc}")
+            return
+        if resumed:
+            print(f"[QUEUE] resumed {resumed} reports left by a stopped process")
+
+    @tasks.loop(seconds=300)
+    async def _image_refresh(self) -> None:
+        try:
+            await self.wait_for_db()
+            count = await asyncio.to_thread(self._refresh_images_sync)
+        except Exception as exc:  # pragma: no cover
+            print(f"[DB] banned image refresh failed: {type(exc).__name__}: {exc}")
+            return
+        if self._image_refresh.current_loop == 0:
+            print(f"[DB] loaded {count} banned image hashes")
+
+    def _refresh_images_sync(self) -> int:
+        # Pillow and numpy load here, off the loop.
+        from src.services.attachments import get_banned_image_index
+
+        return get_banned_image_index().refresh_sync()
+
+    @tasks.loop(seconds=300)
+    async def _case_sync(self) -> None:
+        # Reports resolved here sync right away; this catches up with the
+        # ones other processes resolved, and fills the index at startup.
+        try:
+            await self.wait_for_db()
+            # Importing numpy and mapping the files stays off the loop.
+            index = await asyncio.to_thread(self._open_case_index_sync)
+        except Exception as exc:  # pragma: no cover
+            print(f"[CASES] open failed: {type(exc).__name__}: {exc}")
+            return
+        added = await index.sync()
+        if self._case_sync.current_loop == 0 or added:
+            print(f"[CASES] {len(index)} cases indexed (+{added})")
+
+    def _open_case_index_sync(self):
+        from src.services.case_index import get_case_index
+
+        return get_case_index()
+
+    @tasks.loop(hours=6)
+    async def _retention(self) -> None:
+        from src.services.state_backend import get_state_backend
+
+        try:
+            await self.wait_for_db()
+            # Every shard process runs this loop; the first to claim the
+            # interval archives and the others skip it.
+            ttl = int(self._retention.hours * 3600) - 60
+            if not await get_state_backend().claim("retention", ttl):
+                return
+            written = await asyncio.to_thread(self._run_retention_sync)
+        except Exception as exc:  # pragma: no cover
+            print(f"[DB] retention failed: {type(exc).__name__}: {exc}")
+            return
+        for path, count in written:
+            print(f"[DB] archived {count} reports -> {path}")
+
+    def _run_retention_sync(self) -> list[tuple[str, int]]:
+        from src.database.archive import archive_reports, compact_hot_table
+
+        settings = get_settings()
+        written = archive_reports(
+            settings.report_retention_days, settings.report_archive_dir
+        )
+        if written:
+            compact_hot_table()
+        return written
 
     async def _write_status(self) -> None:
         if self.user is None:
             return
         try:
+            await self.wait_for_db()
             await asyncio.to_thread(self._write_status_sync)
         except Exception as exc:  # pragma: no cover
             print(f"[DB] heartbeat failed: {type(exc).__name__}: {exc}")
 
     def _write_status_sync(self) -> None:
+        from src.database import get_session
+        from src.database.repository import StatusRepository
+
+        loop_lag = self._loop_monitor.snapshot() if self._loop_monitor else None
+        # The queue is per process, so only the first shard row reports it.
+        queue_depth = get_report_scheduler().qsize
         with get_session() as session:
-            self._status_repo.upsert_status(
-                session,
-                active_guilds=len(self.guilds),
-                queue_depth=0,
-            )
+            status_repo = StatusRepository()
+            for shard_id, guilds, latency_ms in self._shard_health():
+                status_repo.upsert_status(
+                    session,
+                    active_guilds=guilds,
+                    queue_depth=queue_depth,
+                    loop_lag=loop_lag,
+                    shard_id=shard_id,
+                    shard_count=self.shard_count or 1,
+                    latency_ms=latency_ms,
+                )
+                queue_depth = 0
+
+    def _shard_health(self) -> list[tuple[int, int, float | None]]:
+        """(shard id, guild count, gateway latency in ms) per shard run here."""
+        guild_counts: dict[int, int] = {}
+        for guild in self.guilds:
+            guild_counts[guild.shard_id] = guild_counts.get(guild.shard_id, 0) + 1
+        health = []
+        for shard_id, shard in self.shards.items():
+            latency = shard.latency
+            # NaN or inf until the shard's first heartbeat.
+            latency_ms = latency * 1000 if math.isfinite(latency) else None
+            health.append((shard_id, guild_counts.get(shard_id, 0), latency_ms))
+        return health
+
+    def request_shutdown(self, reason: str) -> None:
+        """Start a graceful shutdown, e.g. from a SIGTERM handler."""
+        if self._closing is None:
+            print(f"[SHUTDOWN] {reason} received, draining reports...")
+        asyncio.ensure_future(self.close())
+
+    async def close(self) -> None:
+        """Drain reports and stop background monitors, then disconnect.
+
+        Safe to call repeatedly; later calls wait for the first one.
+        """
+        if self._closing is None:
+            self._closing = asyncio.ensure_future(self._shutdown())
+        await asyncio.shield(self._closing)
+
+    async def _shutdown(self) -> None:
+        self._pending_resume.cancel()
+        scanner = get_proactive_scanner()
+        if scanner is not None:
+            await scanner.stop()
+        # The gateway stays connected meanwhile: reports that arrive now are
+        # handed over, and running ones can still reply and ban.
+        settings = get_settings()
+        started = time.perf_counter()
+        drained = await get_report_scheduler().drain(settings.shutdown_drain_seconds)
+        print(
+            f"[SHUTDOWN] drained in {time.perf_counter() - started:.1f}s: "
+            f"{drained['finished']} finished, {drained['handed_over']} handed over, "
+            f"{drained['lost']} lost"
+        )
+        if self._loop_monitor is not None:
+            await self._loop_monitor.stop()
+        if self._warm_up is not None:
+            await asyncio.gather(self._warm_up, return_exceptions=True)
+        await self._flush_status_history()
+        from src.services.attachments import close_http
+        from src.services.links import get_link_resolver
+
+        await close_http()
+        await get_link_resolver().close()
+        await super().close()
 
 
 _bot: Optional[LLMGuardBot] = None
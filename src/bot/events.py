@@ -2,15 +2,28 @@
 
 from __future__ import annotations
 
+import functools
+from typing import TYPE_CHECKING
+
 import discord
-from discord.ext import commands
 
-from src.services.moderation_service import handle_report
+from src.config import get_settings
+from src.services.activity_index import get_activity_index
+from src.services.guild_config import guild_policy
+from src.services.proactive import get_proactive_scanner
+from src.services.report_task import ReportTask
 from src.utils.helpers import normalize_report_reason
 
+if TYPE_CHECKING:
+    from src.bot.client import LLMGuardBot
+
+
+def register_event_handlers(bot: LLMGuardBot) -> None:
+    """Register bot event handlers.
 
-def register_event_handlers(bot: commands.Bot) -> None:
-    """Register bot event handlers."""
+    The report pipeline (database, LLM client) is imported on first use so
+    it stays off the startup path; ``LLMGuardBot`` preloads it once ready.
+    """
 
     @bot.event
     async def on_message(message: discord.Message) -> None:
@@ -21,6 +34,14 @@ def register_event_handlers(bot: commands.Bot) -> None:
         if message.guild is None:
             return
 
+        index = get_activity_index()
+        if index is not None:
+            index.record(message)
+
+        scanner = get_proactive_scanner()
+        if scanner is not None:
+            scanner.observe(message, bot)
+
         if bot.user is None or bot.user not in message.mentions:
             await bot.process_commands(message)
             return
@@ -58,13 +79,40 @@ def register_event_handlers(bot: commands.Bot) -> None:
             await message.reply("❌ 不能举报自己的消息")
             return
 
+        from src.services.handover import pending_report
+        from src.services.moderation_service import handle_report
+        from src.services.scheduler import get_report_scheduler
+        from src.services.state_backend import get_state_backend
+
+        await bot.wait_for_db()
+        settings = get_settings()
+        state = get_state_backend()
+        rate_limit = guild_policy(message.guild.id).report_rate_limit_per_minute
+        if rate_limit > 0:
+            used = await state.hit(f"rate:{message.guild.id}:{message.author.id}", 60)
+            if used > rate_limit:
+                await message.reply("⏳ 举报过于频繁，请稍后再试")
+                return
+
+        # Shards and restarts can see the same message reported repeatedly;
+        # only the first claim within the window goes to the LLM.
+        claimed = await state.claim(
+            f"report:{message.guild.id}:{reported_message.id}",
+            settings.report_dedupe_seconds,
+        )
+        if not claimed:
+            await message.reply("⏳ 该消息已在处理中")
+            return
+
         report_reason = normalize_report_reason(message.content, bot.user.id)
+        # Queued reports hold this record, not the two messages.
+        task = ReportTask.from_messages(message, reported_message, report_reason)
 
         await message.reply("✅ 已收到你的举报，正在处理中...")
-        await handle_report(
-            report_message=message,
-            reported_message=reported_message,
-            report_reason=report_reason,
+        await get_report_scheduler().submit(
+            message.author.id,
+            functools.partial(handle_report, task, bot),
+            pending=pending_report(task),
         )
 
         await bot.process_commands(message)
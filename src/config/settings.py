@@ -13,6 +13,21 @@ class Settings(BaseSettings):
     discord_gm_user_id: int = Field(
         default=1396895180963057815, description="GM user ID"
     )
+    discord_shard_count: int = Field(
+        default=1, description="Total shard count, 0 = Discord recommended"
+    )
+    discord_shard_ids: str | None = Field(
+        default=None, description="Shards run by this process, e.g. 0-3 or 4,5"
+    )
+    discord_lean_member_cache: bool = Field(
+        default=False, description="Do not cache guild members; fetch on demand"
+    )
+    member_info_cache_size: int = Field(
+        default=1024, description="Members kept by the on-demand member cache"
+    )
+    member_info_cache_ttl_seconds: int = Field(
+        default=300, description="Seconds before a cached member is refetched"
+    )
 
     # LLM
     llm_api_key: str = Field(..., description="LLM API key")
@@ -21,15 +36,245 @@ class Settings(BaseSettings):
         description="LLM API base URL",
     )
     llm_model: str = Field(default="gpt-4o", description="LLM model name")
+    llm_small_model: str | None = Field(
+        default=None, description="Cheap first-tier model; unset = no cascade"
+    )
+    llm_cascade_min_confidence: float = Field(
+        default=0.85, description="Escalate small-model verdicts below this"
+    )
 
     # Database
     database_url: str = Field(
         default="sqlite:///./data/bot.db", description="Database URL"
     )
+    database_read_url: str | None = Field(
+        default=None, description="Read replica URL for console reads"
+    )
+    db_pool_size: int = Field(default=5, description="Write engine pool size")
+    db_max_overflow: int = Field(default=10, description="Write engine overflow")
+    db_read_pool_size: int = Field(default=5, description="Read engine pool size")
+    db_read_max_overflow: int = Field(default=5, description="Read engine overflow")
+    sqlite_profile: str = Field(
+        default="production", description="production (tuned pragmas) or default"
+    )
+    sqlite_mmap_size_mb: int = Field(default=256, description="SQLite mmap_size")
+    sqlite_cache_size_mb: int = Field(default=64, description="SQLite page cache")
+    sqlite_busy_timeout_ms: int = Field(
+        default=5000, description="Wait this long for SQLite locks"
+    )
 
     # Moderation
     history_message_limit: int = Field(default=10, description="History limit")
     ban_delete_days: int = Field(default=7, description="Ban delete days")
+    history_compress_min_bytes: int = Field(
+        default=1024, description="Compress stored history messages from this size"
+    )
+    history_source: str = Field(
+        default="both", description="channel (REST), index (no REST) or both"
+    )
+    history_index_cross_guild: bool = Field(
+        default=False, description="Include the user's messages from other guilds"
+    )
+    history_index_max_messages: int = Field(
+        default=100_000, description="Messages kept in the activity index"
+    )
+    history_index_per_user: int = Field(
+        default=20, description="Messages kept per user in the activity index"
+    )
+    history_index_max_chars: int = Field(
+        default=200, description="Characters kept per indexed message"
+    )
+    history_index_max_age_hours: int = Field(
+        default=72, description="Indexed messages older than this are ignored"
+    )
+
+    # Attachments
+    attachment_scan_enabled: bool = Field(
+        default=False,
+        description="Download reported attachments to describe and hash images",
+    )
+    attachment_max_bytes: int = Field(
+        default=8 * 1024 * 1024, description="Skip attachments larger than this"
+    )
+    attachment_max_count: int = Field(
+        default=4, description="Attachments inspected per reported message"
+    )
+    image_match_max_distance: int = Field(
+        default=6, description="Max pHash/dHash Hamming distance (0-7) for a repeat"
+    )
+    image_match_cross_guild: bool = Field(
+        default=False, description="Match images banned in other guilds too"
+    )
+    image_autoban_min_confidence: float = Field(
+        default=0.9,
+        description="Large-model ban confidence needed to remember its images",
+    )
+    image_index_refresh_seconds: int = Field(
+        default=300, description="Load other processes' banned images this often"
+    )
+
+    # Links
+    link_analysis_enabled: bool = Field(
+        default=False, description="Fetch links in reported messages to follow them"
+    )
+    link_max_urls: int = Field(default=5, description="Links expanded per report")
+    link_budget_ms: int = Field(
+        default=1500, description="Time allowed for expanding a report's links"
+    )
+    link_max_redirects: int = Field(default=5, description="Redirect hops followed")
+    link_cache_seconds: int = Field(
+        default=3600, description="Reuse an expanded link for this long"
+    )
+    link_allow_private_hosts: bool = Field(
+        default=False, description="Fetch private/loopback hosts (local tests only)"
+    )
+    link_auto_block_min_bans: int = Field(
+        default=0, description="Block domains seen in this many bans, 0 = manual"
+    )
+    domain_cache_seconds: int = Field(
+        default=300, description="Cache domain reputation lookups for this long"
+    )
+
+    # Similar past cases in the prompt
+    case_retrieval_enabled: bool = Field(
+        default=False, description="Show the LLM similar decided reports"
+    )
+    case_retrieval_top_k: int = Field(default=3, description="Cases per prompt")
+    case_retrieval_min_similarity: float = Field(
+        default=0.35, description="Skip cases less similar than this (cosine)"
+    )
+    case_retrieval_max_chars: int = Field(
+        default=1200, description="Prompt budget for the cases section"
+    )
+    case_retrieval_cross_guild: bool = Field(
+        default=False, description="Also retrieve cases from other guilds"
+    )
+    case_index_dir: str = Field(
+        default="./data/case_index", description="Case index directory"
+    )
+    case_index_max_cases: int = Field(
+        default=20000, description="Cases kept; the oldest are replaced"
+    )
+    case_index_dim: int = Field(default=512, description="Case vector dimensions")
+    case_index_min_confidence: float = Field(
+        default=0.8, description="Only index verdicts at or above this confidence"
+    )
+    case_index_sync_seconds: int = Field(
+        default=300, description="Catch up with other processes' reports this often"
+    )
+
+    # Report search
+    search_relevance_window: int = Field(
+        default=10000, description="Rank only the newest N matches, 0 = all"
+    )
+
+    # Per-guild configuration
+    guild_config_refresh_seconds: int = Field(
+        default=5, description="Check guild_configs for changes this often"
+    )
+
+    # Shared state (dedupe, rate limits, verdict cache)
+    state_backend: str = Field(default="memory", description="memory or database")
+    report_dedupe_seconds: int = Field(
+        default=300, description="Ignore repeat reports of a message for this long"
+    )
+    report_rate_limit_per_minute: int = Field(
+        default=0, description="Reports per reporter per minute, 0 = unlimited"
+    )
+    verdict_cache_seconds: int = Field(
+        default=3600,
+        description="Reuse confident verdicts for a member's repeated content",
+    )
+    verdict_cache_min_confidence: float = Field(
+        default=0.9, description="Only cache verdicts at or above this confidence"
+    )
+
+    # Report queue
+    report_workers: int = Field(
+        default=32, description="Reports handled concurrently, 0 = no queue"
+    )
+    report_priority_enabled: bool = Field(
+        default=True, description="Order queued reports by reporter reputation"
+    )
+    report_priority_window_seconds: float = Field(
+        default=30.0, description="Max head start a trusted reporter gets"
+    )
+    reputation_window_days: int = Field(
+        default=180, description="Outcomes older than this do not count"
+    )
+    reputation_refresh_seconds: int = Field(
+        default=300, description="Reload reputation from the rollups this often"
+    )
+    shutdown_drain_seconds: float = Field(
+        default=15.0,
+        description="On shutdown, wait this long for running reports to finish",
+    )
+    pending_report_resume_seconds: int = Field(
+        default=15, description="Pick up reports left by stopped processes this often"
+    )
+
+    # Proactive scanning
+    proactive_scan_enabled: bool = Field(
+        default=False, description="Scan every message, not only reported ones"
+    )
+    proactive_scan_guild_ids: str | None = Field(
+        default=None, description="Guilds to scan, e.g. 123,456; empty = all"
+    )
+    proactive_score_threshold: int = Field(
+        default=3, description="Signal score that escalates a message"
+    )
+    proactive_new_account_days: int = Field(
+        default=7, description="Accounts younger than this count as new"
+    )
+    proactive_new_member_hours: int = Field(
+        default=24, description="Members who joined within this count as new"
+    )
+    proactive_copy_paste_authors: int = Field(
+        default=3, description="Authors posting the same text within 2 minutes"
+    )
+    proactive_sample_rate: float = Field(
+        default=1.0, description="Share of established members' messages scanned"
+    )
+    proactive_batch_size: int = Field(default=200, description="Messages per batch")
+    proactive_batch_interval_ms: int = Field(
+        default=200, description="Wait this long to collect a batch"
+    )
+    proactive_buffer_size: int = Field(
+        default=10000, description="Unscanned messages kept before dropping"
+    )
+    proactive_max_per_minute: int = Field(
+        default=30, description="Escalations per guild per minute, 0 = unlimited"
+    )
+
+    # Retention
+    report_retention_days: int | None = Field(
+        default=None, description="Archive resolved reports older than this many days"
+    )
+    report_archive_dir: str = Field(
+        default="./data/archive", description="Report archive directory"
+    )
+
+    # Event loop monitor
+    loop_monitor_enabled: bool = Field(default=True, description="Sample loop lag")
+    loop_lag_interval_ms: int = Field(default=500, description="Lag sample interval")
+    loop_lag_warn_ms: int = Field(default=100, description="Log lag above this")
+    loop_lag_stack_ms: int = Field(
+        default=500, description="Capture loop thread stack when blocked this long"
+    )
+
+    # Status history
+    status_sample_seconds: int = Field(
+        default=10, description="Sample bot health this often, 0 = no history"
+    )
+    status_history_minute_hours: int = Field(
+        default=48, description="Keep 1-minute health buckets this long"
+    )
+    status_history_hour_days: int = Field(
+        default=30, description="Keep 1-hour health buckets this long"
+    )
+    status_history_day_days: int = Field(
+        default=730, description="Keep 1-day health buckets this long"
+    )
 
     # Console API
     console_app_title: str = Field(
@@ -1,7 +1,5 @@
 """Database module."""
 
-from src.database.repository import get_session, init_db
-
-__all__ = ["get_session", "init_db"]
-
+from src.database.repository import get_read_session, get_session, init_db
 
+__all__ = ["get_read_session", "get_session", "init_db"]
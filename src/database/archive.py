@@ -0,0 +1,292 @@
+"""Report archival and retention.
+
+Each archived row carries the message snapshots its history refers to
+(``history_snapshots``), so an archive file is self-contained; snapshots
+no live report refers to any more are deleted after the rows.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import os
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import IO, Any, Iterator
+
+from sqlalchemy import Connection, DateTime, Engine, delete, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from src.config import get_settings
+from src.database.models import ReportLog
+from src.database.repository import (
+    ArchiveRepository,
+    MessageRepository,
+    SearchRepository,
+    _as_utc,
+    _get_engine,
+    _get_read_engine,
+    bucket_start,
+    get_session,
+    parse_history_ids,
+)
+
+try:  # Optional: zstd gives better ratios than gzip on JSON text.
+    import zstandard
+except ImportError:  # pragma: no cover - depends on environment
+    zstandard = None
+
+_COLUMNS = [column.name for column in ReportLog.__table__.columns]
+_DATETIME_COLUMNS = {
+    column.name
+    for column in ReportLog.__table__.columns
+    if isinstance(column.type, DateTime)
+}
+_DELETE_BATCH = 500
+# Key for pg_try_advisory_lock, so only one process archives at a time.
+ARCHIVE_LOCK_KEY = zlib.crc32(b"discord-llm-guard:archive")
+_SNAPSHOTS_KEY = "history_snapshots"
+
+
+def archive_suffix() -> str:
+    """File suffix used for new archives."""
+    return ".jsonl.zst" if zstandard is not None else ".jsonl.gz"
+
+
+def _open_archive(path: Path, mode: str) -> IO[str]:
+    if path.name.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read/write .zst archives")
+        if mode == "w":
+            raw = zstandard.ZstdCompressor(level=10).stream_writer(path.open("wb"))
+        else:
+            raw = zstandard.ZstdDecompressor().stream_reader(path.open("rb"))
+        return io.TextIOWrapper(raw, encoding="utf-8")
+    return gzip.open(path, f"{mode}t", encoding="utf-8")
+
+
+def _serialize_row(row: Any, snapshots: dict[int, dict[str, Any]]) -> str:
+    payload = {}
+    for name in _COLUMNS:
+        value = getattr(row, name)
+        if isinstance(value, datetime):
+            value = _as_utc(value).isoformat()
+        payload[name] = value
+    history_ids = parse_history_ids(row)
+    if history_ids:
+        payload[_SNAPSHOTS_KEY] = [
+            snapshots[message_id]
+            for message_id in history_ids
+            if message_id in snapshots
+        ]
+    return json.dumps(payload, ensure_ascii=False)
+
+
+def _deserialize_row(line: str) -> dict[str, Any]:
+    payload = json.loads(line)
+    for name in _DATETIME_COLUMNS:
+        if payload.get(name):
+            payload[name] = datetime.fromisoformat(payload[name])
+    row = {name: payload.get(name) for name in _COLUMNS}
+    if payload.get(_SNAPSHOTS_KEY):
+        row[_SNAPSHOTS_KEY] = payload[_SNAPSHOTS_KEY]
+    return row
+
+
+def _load_snapshots(conn: Connection, rows: list[Any]) -> dict[int, dict[str, Any]]:
+    """Snapshots referenced by ``rows``, ready to be stored again.
+
+    Read on the archiving connection: SQLite's write pool has just one.
+    """
+    message_ids = [message_id for row in rows for message_id in parse_history_ids(row)]
+    if not message_ids:
+        return {}
+    with Session(bind=conn) as session:
+        return MessageRepository().load_messages(session, message_ids, full=True)
+
+
+@contextmanager
+def _archive_lock(engine: Engine) -> Iterator[bool]:
+    """Whether this process may archive now.
+
+    PostgreSQL takes a session advisory lock; SQLite relies on the bot's
+    ``retention`` state claim, as its processes share one host.
+    """
+    if engine.dialect.name != "postgresql":
+        yield True
+        return
+    with engine.connect() as conn:
+        locked = bool(
+            conn.execute(select(func.pg_try_advisory_lock(ARCHIVE_LOCK_KEY))).scalar()
+        )
+        conn.commit()
+        try:
+            yield locked
+        finally:
+            if locked:
+                conn.execute(select(func.pg_advisory_unlock(ARCHIVE_LOCK_KEY)))
+                conn.commit()
+
+
+def archive_reports(
+    retention_days: int,
+    archive_dir: str | Path,
+    batch_size: int = 1000,
+) -> list[tuple[str, int]]:
+    """Move resolved reports older than ``retention_days`` into archive files.
+
+    Rows are grouped into one compressed JSONL file per ``created_at`` month.
+    Files are fully written before any row is deleted from ``report_logs``;
+    message snapshots left unreferenced are deleted last. Returns
+    ``(file_path, row_count)`` for every file written; nothing when another
+    process is archiving.
+    """
+    with _archive_lock(_get_engine()) as locked:
+        if not locked:
+            print("[DB] archive skipped: another process is archiving")
+            return []
+        return _archive_reports(retention_days, archive_dir, batch_size)
+
+
+def _archive_reports(
+    retention_days: int, archive_dir: str | Path, batch_size: int
+) -> list[tuple[str, int]]:
+    cutoff = bucket_start(
+        datetime.now(timezone.utc) - timedelta(days=retention_days), "DAY"
+    )
+    archive_dir = Path(archive_dir)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    run_stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+
+    writers: dict[str, tuple[Path, IO[str]]] = {}
+    ids_by_month: dict[str, list[int]] = {}
+    stmt = (
+        select(ReportLog.__table__)
+        .where(ReportLog.resolved_at.is_not(None), ReportLog.created_at < cutoff)
+        .order_by(ReportLog.id)
+    )
+    engine = _get_engine()
+    if engine.dialect.name == "sqlite":
+        # SQLite hands out max(rowid) + 1, so keep the newest row in place to
+        # stop archived ids from being reused (and skipped on restore).
+        with get_session() as session:
+            max_id = session.scalar(select(func.max(ReportLog.id)))
+        if max_id is None:
+            return []
+        stmt = stmt.where(ReportLog.id < max_id)
+    try:
+        # The long streaming read stays off the writer, whose single SQLite
+        # connection (production profile) report writes queue on.
+        with _get_read_engine().connect() as conn:
+            result = conn.execution_options(
+                stream_results=True, yield_per=batch_size
+            ).execute(stmt)
+            for rows in result.partitions():
+                snapshots = _load_snapshots(conn, rows)
+                for row in rows:
+                    month = _as_utc(row.created_at).strftime("%Y-%m")
+                    if month not in writers:
+                        name = f"report_logs-{month}-{run_stamp}{archive_suffix()}"
+                        path = archive_dir / name
+                        writers[month] = (path, _open_archive(path, "w"))
+                        ids_by_month[month] = []
+                    writers[month][1].write(_serialize_row(row, snapshots) + "\n")
+                    ids_by_month[month].append(row.id)
+    finally:
+        for _, handle in writers.values():
+            handle.close()
+
+    archive_repo = ArchiveRepository()
+    written: list[tuple[str, int]] = []
+    for month, (path, _) in sorted(writers.items()):
+        report_ids = ids_by_month[month]
+        with open(path, "rb") as handle:
+            os.fsync(handle.fileno())
+        with get_session() as session:
+            archive_repo.record_archive(session, str(path), month, report_ids, cutoff)
+        # One short transaction per batch, so report writes interleave.
+        # Rows left by an interruption are archived again by the next run.
+        for start in range(0, len(report_ids), _DELETE_BATCH):
+            chunk = report_ids[start : start + _DELETE_BATCH]
+            with get_session() as session:
+                session.execute(delete(ReportLog).where(ReportLog.id.in_(chunk)))
+        written.append((str(path), len(report_ids)))
+    if written:
+        with get_session() as session:
+            pruned = MessageRepository().prune_unreferenced(session)
+        if pruned:
+            print(f"[DB] pruned {pruned} unreferenced message snapshots")
+    return written
+
+
+def iter_archive(path: str | Path) -> Iterator[dict[str, Any]]:
+    """Yield archived report rows from an archive file."""
+    with _open_archive(Path(path), "r") as handle:
+        for line in handle:
+            if line.strip():
+                yield _deserialize_row(line)
+
+
+def restore_archive(path: str | Path, batch_size: int = 1000) -> int:
+    """Re-insert archived rows into ``report_logs``; existing ids are skipped.
+
+    Restored rows keep their original ids and timestamps, so they are eligible
+    for archival again on the next retention run. Their history snapshots are
+    stored again (existing ones are kept).
+    """
+    restored = 0
+    batch: list[dict[str, Any]] = []
+
+    def flush() -> int:
+        with get_session() as session:
+            ids = [row["id"] for row in batch]
+            existing = set(
+                session.scalars(select(ReportLog.id).where(ReportLog.id.in_(ids)))
+            )
+            rows = [row for row in batch if row["id"] not in existing]
+            snapshots = [
+                item for row in rows for item in row.pop(_SNAPSHOTS_KEY, None) or ()
+            ]
+            for row in batch:
+                row.pop(_SNAPSHOTS_KEY, None)
+            if snapshots:
+                compress_min_bytes = get_settings().history_compress_min_bytes
+                MessageRepository(compress_min_bytes).store_messages(session, snapshots)
+            if rows:
+                session.execute(insert(ReportLog), rows)
+                SearchRepository().index_reports(session, rows, replace=False)
+        batch.clear()
+        return len(rows)
+
+    for row in iter_archive(path):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            restored += flush()
+    if batch:
+        restored += flush()
+
+    with get_session() as session:
+        archive = ArchiveRepository().get_by_path(session, str(path))
+        if archive is not None:
+            archive.restored_at = datetime.now(timezone.utc)
+    return restored
+
+
+def compact_hot_table(full: bool = False) -> None:
+    """Reclaim space freed by archival.
+
+    PostgreSQL gets a plain ``VACUUM (ANALYZE)`` of the report and snapshot
+    tables so dead tuples and index entries are reused. SQLite only rewrites
+    the file when ``full`` is set, since ``VACUUM`` copies the whole database.
+    """
+    engine = _get_engine()
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM (ANALYZE) report_logs, message_snapshots"))
+        return
+    if engine.dialect.name == "sqlite" and full:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
@@ -0,0 +1,242 @@
+"""Streaming export of report logs.
+
+Rows are read from the read engine with a server-side cursor
+(``stream_results`` + ``yield_per``) and encoded batch by batch, so memory
+stays flat however large ``report_logs`` grows. ``iter_export`` yields
+encoded byte chunks that the console API streams as a response and the CLI
+writes to a file.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Iterator
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, select
+
+from src.database.models import ReportLog
+from src.database.repository import (
+    MessageRepository,
+    _as_utc,
+    _get_read_engine,
+    get_read_session,
+)
+
+try:  # Optional: Parquet export needs pyarrow.
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - depends on environment
+    pyarrow = None
+
+EXPORT_FORMATS = ("ndjson", "csv", "parquet")
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+_COLUMNS = [column.name for column in ReportLog.__table__.columns]
+_DATETIME_COLUMNS = [
+    column.name
+    for column in ReportLog.__table__.columns
+    if isinstance(column.type, DateTime)
+]
+# Rows per Parquet row group; bounds the memory a Parquet export holds.
+_ROW_GROUP_ROWS = 50_000
+
+
+@dataclass(frozen=True)
+class ExportFilter:
+    """Which reports to export; unset fields do not filter."""
+
+    guild_id: int | None = None
+    decision: str | None = None
+    status: str | None = None
+    since: datetime | None = None
+    until: datetime | None = None
+    after_id: int | None = None
+    limit: int | None = None
+
+
+def export_available(fmt: str) -> bool:
+    """Whether ``fmt`` can be written in this environment."""
+    return fmt in EXPORT_FORMATS and (fmt != "parquet" or pyarrow is not None)
+
+
+def _statement(filters: ExportFilter):
+    table = ReportLog.__table__
+    stmt = select(table).order_by(table.c.id)
+    if filters.guild_id is not None:
+        stmt = stmt.where(table.c.guild_id == filters.guild_id)
+    if filters.decision:
+        stmt = stmt.where(table.c.llm_decision == filters.decision.upper())
+    if filters.status:
+        stmt = stmt.where(table.c.status == filters.status.upper())
+    if filters.since is not None:
+        stmt = stmt.where(table.c.created_at >= filters.since)
+    if filters.until is not None:
+        stmt = stmt.where(table.c.created_at < filters.until)
+    if filters.after_id is not None:
+        stmt = stmt.where(table.c.id > filters.after_id)
+    if filters.limit is not None:
+        stmt = stmt.limit(filters.limit)
+    return stmt
+
+
+def _expand_history(rows: list[dict[str, Any]]) -> None:
+    """Replace history id lists with the stored messages, one query per batch."""
+    ids_by_row = []
+    for row in rows:
+        try:
+            ids = [int(value) for value in json.loads(row["reported_user_history_ids"])]
+        except (TypeError, ValueError):
+            ids = []
+        ids_by_row.append(ids)
+    wanted = [message_id for ids in ids_by_row for message_id in ids]
+    if not wanted:
+        return
+    with get_read_session() as session:
+        messages = MessageRepository().load_messages(session, wanted)
+    for row, ids in zip(rows, ids_by_row):
+        if ids:
+            row["reported_user_history"] = json.dumps(
+                [messages[message_id] for message_id in ids if message_id in messages],
+                ensure_ascii=False,
+            )
+
+
+def iter_report_batches(
+    filters: ExportFilter, batch_size: int = 1000, history: bool = False
+) -> Iterator[list[dict[str, Any]]]:
+    """Yield matching reports as lists of column dicts, in id order.
+
+    Datetimes are UTC-aware. With ``history``, ``reported_user_history`` is
+    filled from the message snapshots referenced by the report.
+    """
+    with _get_read_engine().connect() as conn:
+        result = conn.execution_options(
+            stream_results=True, yield_per=batch_size
+        ).execute(_statement(filters))
+        keys = list(result.keys())
+        for partition in result.partitions():
+            rows = [dict(zip(keys, values)) for values in partition]
+            for row in rows:
+                for name in _DATETIME_COLUMNS:
+                    if row[name] is not None:
+                        row[name] = _as_utc(row[name])
+            if history:
+                _expand_history(rows)
+            yield rows
+
+
+def _json_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+# Rows are already in column order; only datetimes need converting.
+_encoder = json.JSONEncoder(ensure_ascii=False, default=datetime.isoformat)
+
+
+def _ndjson_chunks(batches: Iterator[list[dict[str, Any]]]) -> Iterator[bytes]:
+    encode = _encoder.encode
+    for rows in batches:
+        yield "".join([encode(row) + "\n" for row in rows]).encode("utf-8")
+
+
+def _csv_chunks(batches: Iterator[list[dict[str, Any]]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # The BOM lets spreadsheet apps detect UTF-8 (Chinese reasons, names).
+    buffer.write("\ufeff")
+    writer.writerow(_COLUMNS)
+    for rows in batches:
+        writer.writerows([_json_value(value) for value in row.values()] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back as chunks."""
+
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _parquet_schema():
+    fields = []
+    for column in ReportLog.__table__.columns:
+        if isinstance(column.type, Boolean):
+            kind = pyarrow.bool_()
+        elif isinstance(column.type, Integer):
+            kind = pyarrow.int64()
+        elif isinstance(column.type, Float):
+            kind = pyarrow.float64()
+        elif isinstance(column.type, DateTime):
+            kind = pyarrow.timestamp("us", tz="UTC")
+        else:
+            kind = pyarrow.string()
+        fields.append(pyarrow.field(column.name, kind))
+    return pyarrow.schema(fields)
+
+
+def _parquet_chunks(batches: Iterator[list[dict[str, Any]]]) -> Iterator[bytes]:
+    if pyarrow is None:
+        raise RuntimeError("pyarrow is required for Parquet export")
+    schema = _parquet_schema()
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema, compression="zstd")
+    # Batches are converted to Arrow as they arrive; columnar buffers are far
+    # smaller than the row dicts while a row group fills up.
+    pending: list[Any] = []
+    pending_rows = 0
+    try:
+        for rows in batches:
+            pending.append(pyarrow.RecordBatch.from_pylist(rows, schema=schema))
+            pending_rows += len(rows)
+            if pending_rows >= _ROW_GROUP_ROWS:
+                writer.write_table(pyarrow.Table.from_batches(pending, schema=schema))
+                pending, pending_rows = [], 0
+                yield sink.drain()
+        if pending:
+            writer.write_table(pyarrow.Table.from_batches(pending, schema=schema))
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def iter_export(
+    fmt: str,
+    filters: ExportFilter,
+    batch_size: int = 1000,
+    history: bool = False,
+) -> Iterator[bytes]:
+    """Encoded export of the matching reports, as a stream of byte chunks."""
+    batches = iter_report_batches(filters, batch_size, history)
+    if fmt == "ndjson":
+        return _ndjson_chunks(batches)
+    if fmt == "csv":
+        return _csv_chunks(batches)
+    if fmt == "parquet":
+        return _parquet_chunks(batches)
+    raise ValueError(f"unknown export format: {fmt}")
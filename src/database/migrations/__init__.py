@@ -0,0 +1,220 @@
+"""Versioned schema migrations.
+
+Every ``mNNNN_<name>.py`` module in this package is one migration and
+defines ``VERSION`` (int, contiguous from 1), ``DESCRIPTION`` and
+``upgrade(ctx: MigrationContext)``. A migration that cannot run inside a
+transaction, such as ``CREATE INDEX CONCURRENTLY``, sets
+``TRANSACTIONAL = False``.
+
+Applied versions are recorded in ``schema_version``. A fresh database is
+created from the models and stamped with the latest version, so migrations
+only have to upgrade databases that already exist. Adding a column therefore
+means changing the model *and* adding a migration that adds the column.
+"""
+
+from __future__ import annotations
+
+import importlib
+import pkgutil
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Callable, Iterator
+
+from sqlalchemy import Connection, Engine, func, insert, inspect, select, text
+from sqlalchemy.exc import DBAPIError
+
+from src.database.models import Base, SchemaVersion
+
+# Key for pg_advisory_lock, shared by the bot and API processes.
+MIGRATION_LOCK_KEY = zlib.crc32(b"discord-llm-guard:migrations")
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[MigrationContext], None]
+    transactional: bool = True
+
+
+class MigrationContext:
+    """Connection plus dialect-aware DDL helpers for one migration."""
+
+    def __init__(self, conn: Connection) -> None:
+        self.conn = conn
+        self.dialect = conn.dialect.name
+
+    @property
+    def is_postgresql(self) -> bool:
+        return self.dialect == "postgresql"
+
+    @property
+    def float_type(self) -> str:
+        return "DOUBLE PRECISION" if self.is_postgresql else "FLOAT"
+
+    def execute(self, sql: str) -> None:
+        self.conn.execute(text(sql))
+
+    def has_table(self, table: str) -> bool:
+        return inspect(self.conn).has_table(table)
+
+    def columns(self, table: str) -> dict[str, object]:
+        return {
+            col["name"]: col["type"] for col in inspect(self.conn).get_columns(table)
+        }
+
+    def create_all(self) -> None:
+        """Create any model tables that do not exist yet."""
+        Base.metadata.create_all(self.conn)
+
+    def add_column(self, table: str, column: str, column_type: str) -> None:
+        """Add a nullable column unless it already exists."""
+        if column in self.columns(table):
+            return
+        self.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+    def create_index(
+        self, name: str, table: str, columns: list[str], unique: bool = False
+    ) -> None:
+        """Create an index, without blocking writes on PostgreSQL.
+
+        ``CONCURRENTLY`` only works outside a transaction, so migrations
+        calling this on PostgreSQL must set ``TRANSACTIONAL = False``.
+        """
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        online = "CONCURRENTLY " if self.is_postgresql else ""
+        if self.is_postgresql:
+            # A failed concurrent build leaves an INVALID index behind that
+            # IF NOT EXISTS would silently keep.
+            self.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        self.execute(
+            f"CREATE {kind} {online}IF NOT EXISTS {name} "
+            f"ON {table} ({', '.join(columns)})"
+        )
+
+
+def _load(module: ModuleType) -> Migration:
+    return Migration(
+        version=module.VERSION,
+        description=module.DESCRIPTION,
+        upgrade=module.upgrade,
+        transactional=getattr(module, "TRANSACTIONAL", True),
+    )
+
+
+def load_migrations() -> list[Migration]:
+    """All migrations in this package, ordered by version."""
+    migrations = [
+        _load(importlib.import_module(f"{__name__}.{info.name}"))
+        for info in pkgutil.iter_modules(__path__)
+        if info.name.startswith("m") and info.name[1:5].isdigit()
+    ]
+    migrations.sort(key=lambda migration: migration.version)
+    expected = list(range(1, len(migrations) + 1))
+    if [migration.version for migration in migrations] != expected:
+        raise RuntimeError("Migration versions must be contiguous from 1")
+    return migrations
+
+
+def latest_version() -> int:
+    return len(load_migrations())
+
+
+def _read_version(conn: Connection) -> int | None:
+    if not inspect(conn).has_table(SchemaVersion.__tablename__):
+        return None
+    return conn.execute(select(func.max(SchemaVersion.version))).scalar()
+
+
+def current_version(engine: Engine) -> int | None:
+    """Applied schema version, or None for an unversioned database."""
+    with engine.connect() as conn:
+        try:
+            return conn.execute(select(func.max(SchemaVersion.version))).scalar()
+        except DBAPIError:
+            # schema_version does not exist yet.
+            return None
+
+
+@contextmanager
+def _migration_lock(engine: Engine) -> Iterator[Connection]:
+    """Serialize migrations across bot and API processes."""
+    with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(select(func.pg_advisory_lock(MIGRATION_LOCK_KEY)))
+            conn.commit()
+            try:
+                yield conn
+            finally:
+                conn.rollback()
+                conn.execute(select(func.pg_advisory_unlock(MIGRATION_LOCK_KEY)))
+                conn.commit()
+        else:
+            # SQLite: hold the database write lock for the whole run; all
+            # steps commit together at the end.
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+
+def _record(conn: Connection, version: int) -> None:
+    conn.execute(insert(SchemaVersion).values(version=version))
+
+
+def _apply(conn: Connection, migration: Migration) -> None:
+    ctx = MigrationContext(conn)
+    if ctx.is_postgresql and not migration.transactional:
+        conn.commit()
+        conn.execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            migration.upgrade(ctx)
+        finally:
+            conn.execution_options(isolation_level=conn.default_isolation_level)
+        _record(conn, migration.version)
+        conn.commit()
+        return
+    migration.upgrade(ctx)
+    _record(conn, migration.version)
+    if ctx.is_postgresql:
+        conn.commit()
+
+
+def upgrade(engine: Engine) -> list[int]:
+    """Apply pending migrations and return the versions applied.
+
+    An up-to-date database costs a single version query.
+    """
+    migrations = load_migrations()
+    latest = migrations[-1].version if migrations else 0
+    current = current_version(engine)
+    if current is not None and current >= latest:
+        return []
+
+    with _migration_lock(engine) as conn:
+        # Another process may have migrated while we waited for the lock.
+        current = _read_version(conn)
+        if current is not None and current >= latest:
+            return []
+        SchemaVersion.__table__.create(conn, checkfirst=True)
+        if current is None and not inspect(conn).has_table("report_logs"):
+            Base.metadata.create_all(conn)
+            _record(conn, latest)
+            if conn.dialect.name == "postgresql":
+                conn.commit()
+            print(f"[DB] created schema at version {latest}")
+            return [latest]
+
+        applied = []
+        for migration in migrations:
+            if migration.version <= (current or 0):
+                continue
+            print(f"[DB] migration {migration.version}: {migration.description}")
+            _apply(conn, migration)
+            applied.append(migration.version)
+        return applied
@@ -0,0 +1,39 @@
+"""Bring pre-versioning databases to the first versioned schema.
+
+Replaces the old ``_ensure_report_log_*`` / ``_ensure_bot_status_*`` steps
+that ran on every start.
+"""
+
+from __future__ import annotations
+
+VERSION = 1
+DESCRIPTION = "baseline: tables, BIGINT Discord ids, history and heartbeat columns"
+
+_BIGINT_COLUMNS = (
+    "guild_id",
+    "channel_id",
+    "reporter_id",
+    "reported_user_id",
+    "reported_message_id",
+)
+
+
+def upgrade(ctx) -> None:
+    ctx.create_all()
+
+    if ctx.is_postgresql:
+        columns = ctx.columns("report_logs")
+        for column in _BIGINT_COLUMNS:
+            if str(columns[column]).upper() != "BIGINT":
+                ctx.execute(
+                    f"ALTER TABLE report_logs ALTER COLUMN {column} TYPE BIGINT"
+                )
+
+    ctx.add_column("report_logs", "reported_user_history", "TEXT")
+    ctx.add_column("report_logs", "reported_user_history_ids", "TEXT")
+
+    for column in ("loop_lag_p50_ms", "loop_lag_p99_ms", "loop_lag_max_ms"):
+        ctx.add_column("bot_status", column, ctx.float_type)
+    ctx.add_column("bot_status", "shard_id", "INTEGER")
+    ctx.add_column("bot_status", "shard_count", "INTEGER")
+    ctx.add_column("bot_status", "latency_ms", ctx.float_type)
@@ -0,0 +1,11 @@
+"""Index report_logs.created_at for the history list and rollup rebuilds."""
+
+from __future__ import annotations
+
+VERSION = 2
+DESCRIPTION = "index report_logs.created_at"
+TRANSACTIONAL = False
+
+
+def upgrade(ctx) -> None:
+    ctx.create_index("ix_report_logs_created_at", "report_logs", ["created_at"])
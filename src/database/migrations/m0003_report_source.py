@@ -0,0 +1,11 @@
+"""Record whether a report came from a user or the proactive scanner."""
+
+from __future__ import annotations
+
+VERSION = 3
+DESCRIPTION = "report_logs.report_source"
+
+
+def upgrade(ctx) -> None:
+    # Existing rows stay NULL, which readers treat as "user".
+    ctx.add_column("report_logs", "report_source", "VARCHAR(16)")
@@ -0,0 +1,13 @@
+"""Record which model cascade tier decided a report and what each tier cost."""
+
+from __future__ import annotations
+
+VERSION = 4
+DESCRIPTION = "report_logs.llm_tier and per-tier tokens/latency"
+
+
+def upgrade(ctx) -> None:
+    ctx.add_column("report_logs", "llm_tier", "VARCHAR(16)")
+    for tier in ("small", "large"):
+        ctx.add_column("report_logs", f"llm_{tier}_tokens", "INTEGER")
+        ctx.add_column("report_logs", f"llm_{tier}_latency_ms", ctx.float_type)
@@ -0,0 +1,11 @@
+"""Store attachment details on reports and hashes of banned images."""
+
+from __future__ import annotations
+
+VERSION = 5
+DESCRIPTION = "report_logs.reported_attachments and banned_images"
+
+
+def upgrade(ctx) -> None:
+    ctx.add_column("report_logs", "reported_attachments", "TEXT")
+    ctx.create_all()
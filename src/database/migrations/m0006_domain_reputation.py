@@ -0,0 +1,10 @@
+"""Store link domain reputation."""
+
+from __future__ import annotations
+
+VERSION = 6
+DESCRIPTION = "domain_reputation"
+
+
+def upgrade(ctx) -> None:
+    ctx.create_all()
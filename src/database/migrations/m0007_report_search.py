@@ -0,0 +1,26 @@
+"""Full-text search documents for reports."""
+
+from __future__ import annotations
+
+from sqlalchemy.orm import Session
+
+from src.database.repository import index_reports_after
+from src.database.search import create_search_schema
+
+VERSION = 7
+DESCRIPTION = "report_search"
+
+
+def upgrade(ctx) -> None:
+    create_search_schema(ctx.conn)
+    # The session joins the migration's transaction and never commits.
+    session = Session(bind=ctx.conn)
+    indexed = last_id = 0
+    while True:
+        count, last_id = index_reports_after(session, last_id, 5000)
+        if not count:
+            break
+        indexed += count
+        if indexed % 100_000 < count:
+            print(f"[DB] indexed {indexed} reports for search")
+    session.close()
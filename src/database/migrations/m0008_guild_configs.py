@@ -0,0 +1,10 @@
+"""Store per-guild configuration overrides."""
+
+from __future__ import annotations
+
+VERSION = 8
+DESCRIPTION = "guild_configs"
+
+
+def upgrade(ctx) -> None:
+    ctx.create_all()
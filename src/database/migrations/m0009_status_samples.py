@@ -0,0 +1,10 @@
+"""Store downsampled bot health history."""
+
+from __future__ import annotations
+
+VERSION = 9
+DESCRIPTION = "status_samples"
+
+
+def upgrade(ctx) -> None:
+    ctx.create_all()
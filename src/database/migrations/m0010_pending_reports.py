@@ -0,0 +1,10 @@
+"""Store reports left unfinished by a stopping process."""
+
+from __future__ import annotations
+
+VERSION = 10
+DESCRIPTION = "pending_reports"
+
+
+def upgrade(ctx) -> None:
+    ctx.create_all()
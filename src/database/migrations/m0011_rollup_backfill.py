@@ -0,0 +1,23 @@
+"""Backfill report rollups from the reports stored before they existed."""
+
+from __future__ import annotations
+
+from sqlalchemy.orm import Session
+
+VERSION = 11
+DESCRIPTION = "rollup_backfill"
+
+
+def upgrade(ctx) -> None:
+    from src.database.repository import ArchiveRepository, replace_rollups
+
+    # Joined to the migration's transaction, commit() leaves the real commit
+    # to the runner; on its own (PostgreSQL) it commits the backfill.
+    session = Session(bind=ctx.conn)
+    try:
+        since = ArchiveRepository().get_watermark(session)
+        processed = replace_rollups(session, since=since)
+        session.commit()
+    finally:
+        session.close()
+    print(f"[DB] rebuilt rollups from {processed} resolved reports")
@@ -4,9 +4,23 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import BigInteger, Boolean, DateTime, Float, Integer, String, Text, func
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    Float,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    UniqueConstraint,
+    event,
+    func,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
+from src.database.search import create_search_schema
+
 
 class Base(DeclarativeBase):
     """Base declarative class."""
@@ -22,6 +36,8 @@ class ReportLog(Base):
     channel_id: Mapped[int | None] = mapped_column(BigInteger, index=True)
     reporter_id: Mapped[int | None] = mapped_column(BigInteger, index=True)
     reporter_name: Mapped[str | None] = mapped_column(String(64))
+    # "user" for quoted reports, "proactive" for scanner escalations.
+    report_source: Mapped[str | None] = mapped_column(String(16), default="user")
     reported_user_id: Mapped[int | None] = mapped_column(BigInteger, index=True)
     reported_user_name: Mapped[str | None] = mapped_column(String(64))
     reported_message_id: Mapped[int | None] = mapped_column(BigInteger)
@@ -29,10 +45,19 @@ class ReportLog(Base):
     reported_message_url: Mapped[str | None] = mapped_column(Text)
     report_reason: Mapped[str | None] = mapped_column(Text)
     reported_user_history: Mapped[str | None] = mapped_column(Text)
+    reported_user_history_ids: Mapped[str | None] = mapped_column(Text)
+    # JSON list of attachment descriptions and image hashes.
+    reported_attachments: Mapped[str | None] = mapped_column(Text)
 
     llm_decision: Mapped[str | None] = mapped_column(String(32))
     llm_confidence: Mapped[float | None] = mapped_column(Float)
     llm_reasoning: Mapped[str | None] = mapped_column(Text)
+    # Cascade tier that decided ("small", "large" or "cache") and its costs.
+    llm_tier: Mapped[str | None] = mapped_column(String(16))
+    llm_small_tokens: Mapped[int | None] = mapped_column(Integer)
+    llm_small_latency_ms: Mapped[float | None] = mapped_column(Float)
+    llm_large_tokens: Mapped[int | None] = mapped_column(Integer)
+    llm_large_latency_ms: Mapped[float | None] = mapped_column(Float)
 
     action_taken: Mapped[str | None] = mapped_column(String(32))
     action_success: Mapped[bool | None] = mapped_column(Boolean)
@@ -41,22 +66,262 @@ class ReportLog(Base):
 
     status: Mapped[str] = mapped_column(String(32), default="PENDING")
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now()
+        DateTime(timezone=True), server_default=func.now(), index=True
     )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
 
+class MessageSnapshot(Base):
+    """Discord message captured as report evidence, stored once per message."""
+
+    __tablename__ = "message_snapshots"
+
+    message_id: Mapped[int] = mapped_column(
+        BigInteger, primary_key=True, autoincrement=False
+    )
+    author_id: Mapped[int | None] = mapped_column(BigInteger, index=True)
+    channel_id: Mapped[int | None] = mapped_column(BigInteger)
+    created_at: Mapped[str | None] = mapped_column(String(40))
+    url: Mapped[str | None] = mapped_column(Text)
+    content: Mapped[str | None] = mapped_column(Text)
+    content_zlib: Mapped[bytes | None] = mapped_column(LargeBinary)
+
+
+class SharedState(Base):
+    """Expiring key/value state shared by bot processes."""
+
+    __tablename__ = "shared_state"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    value: Mapped[str | None] = mapped_column(Text)
+    counter: Mapped[int] = mapped_column(Integer, default=0)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+
+
 class BotStatus(Base):
-    """Latest bot status heartbeat."""
+    """Latest bot status heartbeat, one row per shard (id = shard_id + 1)."""
 
     __tablename__ = "bot_status"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    shard_id: Mapped[int | None] = mapped_column(Integer)
+    shard_count: Mapped[int | None] = mapped_column(Integer)
+    latency_ms: Mapped[float | None] = mapped_column(Float)
     last_heartbeat: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
     active_guilds: Mapped[int | None] = mapped_column(Integer)
     queue_depth: Mapped[int | None] = mapped_column(Integer)
+    loop_lag_p50_ms: Mapped[float | None] = mapped_column(Float)
+    loop_lag_p99_ms: Mapped[float | None] = mapped_column(Float)
+    loop_lag_max_ms: Mapped[float | None] = mapped_column(Float)
+
+
+class StatusSample(Base):
+    """Bot health samples of one shard, summed per MINUTE, HOUR or DAY bucket.
+
+    Averages are ``*_sum / sample_count`` (latency and loop lag have their
+    own counts, as they are not always known); maxima merge with max().
+    """
+
+    __tablename__ = "status_samples"
+    __table_args__ = (
+        UniqueConstraint(
+            "granularity", "bucket_start", "shard_id", name="uq_status_samples_bucket"
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    granularity: Mapped[str] = mapped_column(String(8))
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    shard_id: Mapped[int] = mapped_column(Integer, default=0)
+    sample_count: Mapped[int] = mapped_column(Integer, default=0)
+    active_guilds_sum: Mapped[int] = mapped_column(BigInteger, default=0)
+    active_guilds_max: Mapped[int] = mapped_column(Integer, default=0)
+    queue_depth_sum: Mapped[int] = mapped_column(BigInteger, default=0)
+    queue_depth_max: Mapped[int] = mapped_column(Integer, default=0)
+    latency_count: Mapped[int] = mapped_column(Integer, default=0)
+    latency_ms_sum: Mapped[float] = mapped_column(Float, default=0.0)
+    latency_ms_max: Mapped[float] = mapped_column(Float, default=0.0)
+    loop_lag_count: Mapped[int] = mapped_column(Integer, default=0)
+    loop_lag_p99_ms_sum: Mapped[float] = mapped_column(Float, default=0.0)
+    loop_lag_max_ms: Mapped[float] = mapped_column(Float, default=0.0)
+
+
+class BannedImageHash(Base):
+    """Perceptual hashes of images from banned reports.
+
+    Hashes are unsigned 64-bit values stored as signed BIGINT.
+    """
+
+    __tablename__ = "banned_images"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    guild_id: Mapped[int] = mapped_column(BigInteger, default=0)
+    report_id: Mapped[int | None] = mapped_column(Integer)
+    phash: Mapped[int] = mapped_column(BigInteger)
+    dhash: Mapped[int] = mapped_column(BigInteger)
+    width: Mapped[int | None] = mapped_column(Integer)
+    height: Mapped[int | None] = mapped_column(Integer)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+
+class DomainReputation(Base):
+    """Link domains: manual block/allow status and report outcome counts."""
+
+    __tablename__ = "domain_reputation"
+
+    domain: Mapped[str] = mapped_column(String(255), primary_key=True)
+    # "block" or "allow" when set by a moderator; NULL = decided by counts.
+    status: Mapped[str | None] = mapped_column(String(8))
+    ban_count: Mapped[int] = mapped_column(Integer, default=0)
+    invalid_count: Mapped[int] = mapped_column(Integer, default=0)
+    note: Mapped[str | None] = mapped_column(Text)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class GuildConfig(Base):
+    """Per-guild overrides of the moderation settings.
+
+    NULL columns inherit the global settings. Every write bumps ``version``
+    and rows are cleared rather than deleted, so the sum of the versions
+    changes with every edit; bots poll it to reload their cached policies.
+    """
+
+    __tablename__ = "guild_configs"
+
+    guild_id: Mapped[int] = mapped_column(
+        BigInteger, primary_key=True, autoincrement=False
+    )
+    gm_user_id: Mapped[int | None] = mapped_column(BigInteger)
+    gm_role_id: Mapped[int | None] = mapped_column(BigInteger)
+    history_message_limit: Mapped[int | None] = mapped_column(Integer)
+    ban_delete_days: Mapped[int | None] = mapped_column(Integer)
+    llm_model: Mapped[str | None] = mapped_column(String(128))
+    # "cascade" (small model first), "large" or "small" (never escalate).
+    llm_tier: Mapped[str | None] = mapped_column(String(16))
+    llm_cascade_min_confidence: Mapped[float | None] = mapped_column(Float)
+    proactive_scan_enabled: Mapped[bool | None] = mapped_column(Boolean)
+    proactive_score_threshold: Mapped[int | None] = mapped_column(Integer)
+    proactive_max_per_minute: Mapped[int | None] = mapped_column(Integer)
+    report_rate_limit_per_minute: Mapped[int | None] = mapped_column(Integer)
+    note: Mapped[str | None] = mapped_column(Text)
+    version: Mapped[int] = mapped_column(Integer, default=1)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class PendingReport(Base):
+    """Report a stopping process did not finish, left for the next one.
+
+    Only ids are stored; the resuming process fetches the messages again.
+    ``stage`` is "queued" (never started) or "interrupted" (cancelled at the
+    drain deadline); ``attempts`` counts the interruptions.
+    """
+
+    __tablename__ = "pending_reports"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    guild_id: Mapped[int] = mapped_column(BigInteger, index=True)
+    channel_id: Mapped[int] = mapped_column(BigInteger)
+    report_message_id: Mapped[int] = mapped_column(BigInteger)
+    reported_message_id: Mapped[int] = mapped_column(BigInteger)
+    reporter_id: Mapped[int] = mapped_column(BigInteger, default=0)
+    report_reason: Mapped[str | None] = mapped_column(Text)
+    report_source: Mapped[str] = mapped_column(String(16), default="user")
+    stage: Mapped[str] = mapped_column(String(16), default="queued")
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+
+class ReportRollup(Base):
+    """Resolved report counters per time bucket, guild and decision."""
+
+    __tablename__ = "report_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "granularity",
+            "bucket_start",
+            "guild_id",
+            "decision",
+            "confidence_bucket",
+            name="uq_report_rollups_bucket",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    granularity: Mapped[str] = mapped_column(String(8))
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+    guild_id: Mapped[int] = mapped_column(BigInteger, default=0)
+    decision: Mapped[str] = mapped_column(String(32))
+    confidence_bucket: Mapped[int] = mapped_column(Integer, default=-1)
+    report_count: Mapped[int] = mapped_column(Integer, default=0)
+    confidence_sum: Mapped[float] = mapped_column(Float, default=0.0)
+    action_success_count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class ReporterRollup(Base):
+    """Daily resolved report counters per reporter."""
+
+    __tablename__ = "reporter_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "bucket_start",
+            "guild_id",
+            "reporter_id",
+            name="uq_reporter_rollups_bucket",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+    guild_id: Mapped[int] = mapped_column(BigInteger, default=0)
+    reporter_id: Mapped[int] = mapped_column(BigInteger, index=True)
+    report_count: Mapped[int] = mapped_column(Integer, default=0)
+    ban_count: Mapped[int] = mapped_column(Integer, default=0)
+    invalid_count: Mapped[int] = mapped_column(Integer, default=0)
+    need_gm_count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class ReportArchive(Base):
+    """Index of report_logs rows moved to compressed archive files."""
+
+    __tablename__ = "report_archives"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    file_path: Mapped[str] = mapped_column(Text)
+    month: Mapped[str] = mapped_column(String(7), index=True)
+    row_count: Mapped[int] = mapped_column(Integer)
+    min_report_id: Mapped[int] = mapped_column(Integer)
+    max_report_id: Mapped[int] = mapped_column(Integer)
+    cutoff: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    restored_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+
+class SchemaVersion(Base):
+    """Applied migration versions, one row per version."""
+
+    __tablename__ = "schema_version"
+
+    version: Mapped[int] = mapped_column(Integer, primary_key=True)
+    applied_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
 
+@event.listens_for(Base.metadata, "after_create")
+def _create_search_schema(target, connection, **kwargs) -> None:
+    # The search index is an FTS5 table or a tsvector table, not a model.
+    create_search_schema(connection)
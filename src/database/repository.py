@@ -2,17 +2,98 @@
 
 from __future__ import annotations
 
+import json
+import os
+import zlib
 from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable
 
-from sqlalchemy import create_engine, select, text
+from sqlalchemy import (
+    create_engine,
+    delete,
+    event,
+    func,
+    insert,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import Session, sessionmaker
 
 from src.config import get_settings
-from src.database.models import Base, BotStatus, ReportLog
+from src.database.models import (
+    BannedImageHash,
+    BotStatus,
+    DomainReputation,
+    GuildConfig,
+    MessageSnapshot,
+    PendingReport,
+    ReportArchive,
+    ReporterRollup,
+    ReportLog,
+    ReportRollup,
+    StatusSample,
+)
+from src.database.search import (
+    SEARCH_FIELDS,
+    SEARCH_TABLE,
+    fts5_query,
+    search_terms,
+    tsquery,
+)
 
 _engine = None
 _SessionLocal: sessionmaker[Session] | None = None
+_read_engine = None
+_ReadSessionLocal: sessionmaker[Session] | None = None
+
+
+def _sqlite_file(db_url: str) -> str | None:
+    """Database file of a SQLite URL, or None for in-memory databases."""
+    url = make_url(db_url)
+    if not url.drivername.startswith("sqlite"):
+        return None
+    database = url.database or ""
+    if database in ("", ":memory:") or database.startswith("file:"):
+        return None
+    return database
+
+
+def _sqlite_pragmas(read_only: bool) -> list[str]:
+    """Pragmas for a SQLite file connection.
+
+    The write engine always uses WAL, which lets the API's read-only
+    connection read while the bot writes. The ``production`` profile adds
+    the durability and cache tuning; ``default`` keeps SQLite's defaults.
+    """
+    settings = get_settings()
+    pragmas = [] if read_only else ["journal_mode=WAL"]
+    if settings.sqlite_profile != "production":
+        return pragmas
+    if not read_only:
+        # NORMAL only fsyncs at checkpoints, which is safe under WAL.
+        pragmas.append("synchronous=NORMAL")
+    return [
+        *pragmas,
+        f"busy_timeout={settings.sqlite_busy_timeout_ms}",
+        f"mmap_size={settings.sqlite_mmap_size_mb * 1024 * 1024}",
+        f"cache_size=-{settings.sqlite_cache_size_mb * 1024}",
+        "temp_store=MEMORY",
+    ]
+
+
+def _apply_pragmas(engine, pragmas: list[str]) -> None:
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
 
 
 def _get_engine():
@@ -21,18 +102,68 @@ def _get_engine():
         settings = get_settings()
         db_url = settings.database_url
         engine_kwargs: dict = {"future": True}
+        sqlite_file = _sqlite_file(db_url)
         if db_url.startswith("sqlite"):
             engine_kwargs["connect_args"] = {"check_same_thread": False}
+            if sqlite_file is not None and settings.sqlite_profile == "production":
+                # One writer connection: to_thread workers queue on the pool
+                # instead of fighting over the SQLite write lock.
+                engine_kwargs["pool_size"] = 1
+                engine_kwargs["max_overflow"] = 0
         else:
             engine_kwargs["pool_pre_ping"] = True
             engine_kwargs["pool_recycle"] = 300
-            engine_kwargs["pool_size"] = 5
-            engine_kwargs["max_overflow"] = 10
+            engine_kwargs["pool_size"] = settings.db_pool_size
+            engine_kwargs["max_overflow"] = settings.db_max_overflow
         _engine = create_engine(db_url, **engine_kwargs)
+        if sqlite_file is not None:
+            _apply_pragmas(_engine, _sqlite_pragmas(read_only=False))
         _SessionLocal = sessionmaker(bind=_engine, expire_on_commit=False, class_=Session)
     return _engine
 
 
+def _get_read_engine():
+    """Engine for console reads, with its own pool.
+
+    PostgreSQL uses ``DATABASE_READ_URL`` (a replica) when set. A SQLite file
+    is opened a second time read-only, so console queries never hold the
+    write lock. Anything else shares the write engine.
+    """
+    global _read_engine, _ReadSessionLocal
+    if _read_engine is None:
+        settings = get_settings()
+        sqlite_file = _sqlite_file(settings.database_url)
+        if sqlite_file is not None:
+            # init_db on the write engine has created the file and set WAL.
+            _get_engine()
+            path = os.path.abspath(sqlite_file)
+            _read_engine = create_engine(
+                f"sqlite:///file:{path}?mode=ro&uri=true",
+                future=True,
+                connect_args={"check_same_thread": False},
+                pool_size=settings.db_read_pool_size,
+                max_overflow=settings.db_read_max_overflow,
+            )
+            _apply_pragmas(_read_engine, _sqlite_pragmas(read_only=True))
+        elif settings.database_read_url or not settings.database_url.startswith(
+            "sqlite"
+        ):
+            _read_engine = create_engine(
+                settings.database_read_url or settings.database_url,
+                future=True,
+                pool_pre_ping=True,
+                pool_recycle=300,
+                pool_size=settings.db_read_pool_size,
+                max_overflow=settings.db_read_max_overflow,
+            )
+        else:
+            _read_engine = _get_engine()
+        _ReadSessionLocal = sessionmaker(
+            bind=_read_engine, expire_on_commit=False, class_=Session
+        )
+    return _read_engine
+
+
 def check_db_connection() -> bool:
     """Check database connectivity."""
     try:
@@ -45,47 +176,28 @@ def check_db_connection() -> bool:
 
 
 def init_db() -> None:
-    """Initialize database tables."""
-    engine = _get_engine()
-    Base.metadata.create_all(engine)
-    _ensure_report_log_bigint(engine)
-    _ensure_report_log_history(engine)
+    """Bring the schema up to date.
 
+    Reads the applied version and only runs migrations when it is behind;
+    see ``src.database.migrations``.
+    """
+    from src.database.migrations import upgrade
 
-def _ensure_report_log_bigint(engine) -> None:
-    if engine.dialect.name != "postgresql":
-        return
-    alter_statements = (
-        "ALTER TABLE report_logs ALTER COLUMN guild_id TYPE BIGINT",
-        "ALTER TABLE report_logs ALTER COLUMN channel_id TYPE BIGINT",
-        "ALTER TABLE report_logs ALTER COLUMN reporter_id TYPE BIGINT",
-        "ALTER TABLE report_logs ALTER COLUMN reported_user_id TYPE BIGINT",
-        "ALTER TABLE report_logs ALTER COLUMN reported_message_id TYPE BIGINT",
-    )
-    with engine.begin() as conn:
-        for stmt in alter_statements:
-            try:
-                conn.execute(text(stmt))
-            except Exception:
-                # Ignore when table/column does not exist yet or type is already BIGINT.
-                continue
+    upgrade(_get_engine())
 
 
-def _ensure_report_log_history(engine) -> None:
-    statements = []
-    if engine.dialect.name == "postgresql":
-        statements.append(
-            "ALTER TABLE report_logs ADD COLUMN IF NOT EXISTS reported_user_history TEXT"
-        )
-    else:
-        statements.append("ALTER TABLE report_logs ADD COLUMN reported_user_history TEXT")
-    with engine.begin() as conn:
-        for stmt in statements:
-            try:
-                conn.execute(text(stmt))
-            except Exception:
-                # Ignore if column already exists or table not created yet.
-                continue
+@contextmanager
+def get_read_session() -> Session:
+    """Provide a session on the read engine; it never commits."""
+    if _ReadSessionLocal is None:
+        _get_read_engine()
+    assert _ReadSessionLocal is not None
+    session = _ReadSessionLocal()
+    try:
+        yield session
+    finally:
+        # close() ends the transaction without expiring loaded objects.
+        session.close()
 
 
 @contextmanager
@@ -111,6 +223,7 @@ class ReportRepository:
     def create_report(self, session: Session, report: ReportLog) -> int:
         session.add(report)
         session.flush()
+        SearchRepository().index_reports(session, [report], replace=False)
         return report.id
 
     def update_llm_result(
@@ -120,6 +233,8 @@ class ReportRepository:
         decision: str,
         confidence: float,
         reasoning: str,
+        tier: str | None = None,
+        usage: dict[str, int | float | None] | None = None,
     ) -> None:
         stmt = select(ReportLog).where(ReportLog.id == report_id)
         report = session.scalar(stmt)
@@ -128,7 +243,11 @@ class ReportRepository:
         report.llm_decision = decision
         report.llm_confidence = confidence
         report.llm_reasoning = reasoning
+        report.llm_tier = tier
+        for column, value in (usage or {}).items():
+            setattr(report, column, value)
         report.status = "LLM_DONE"
+        SearchRepository().index_reports(session, [report])
 
     def update_action_result(
         self,
@@ -137,49 +256,1122 @@ class ReportRepository:
         action_taken: str,
         success: bool,
         error_message: str | None = None,
-    ) -> None:
+    ) -> ReportLog | None:
+        """Record the action result; return the report if it was just resolved."""
         stmt = select(ReportLog).where(ReportLog.id == report_id)
         report = session.scalar(stmt)
         if report is None:
-            return
+            return None
+        newly_resolved = report.resolved_at is None
         report.action_taken = action_taken
         report.action_success = success
         report.error_message = error_message
         report.status = "DONE" if success else "FAILED"
         report.resolved_at = datetime.now(timezone.utc)
+        return report if newly_resolved else None
 
     def list_reports(self, session: Session, limit: int = 20) -> list[ReportLog]:
         stmt = select(ReportLog).order_by(ReportLog.created_at.desc()).limit(limit)
         return list(session.scalars(stmt).all())
 
+    def get_reports(self, session: Session, report_ids: list[int]) -> list[ReportLog]:
+        """Reports with the given ids, in the order of ``report_ids``."""
+        stmt = select(ReportLog).where(ReportLog.id.in_(report_ids))
+        found = {report.id: report for report in session.scalars(stmt)}
+        return [found[report_id] for report_id in report_ids if report_id in found]
+
+
+def _dialect_insert(session: Session, model):
+    """Return a dialect-specific INSERT supporting ON CONFLICT, or None."""
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert(model.__table__)
+
+
+class MessageRepository:
+    """Repository for deduplicated message snapshots used as report history."""
+
+    def __init__(self, compress_min_bytes: int = 1024) -> None:
+        self._compress_min_bytes = compress_min_bytes
+
+    def _to_row(self, item: dict[str, Any]) -> dict[str, Any]:
+        content = item.get("content") or ""
+        content_zlib = None
+        encoded = content.encode("utf-8")
+        if len(encoded) >= self._compress_min_bytes:
+            packed = zlib.compress(encoded, 6)
+            if len(packed) < len(encoded):
+                content, content_zlib = None, packed
+        return {
+            "message_id": int(item["id"]),
+            "author_id": item.get("author_id"),
+            "channel_id": item.get("channel_id"),
+            "created_at": item.get("created_at"),
+            "url": item.get("url"),
+            "content": content,
+            "content_zlib": content_zlib,
+        }
+
+    def store_messages(
+        self, session: Session, items: list[dict[str, Any]]
+    ) -> list[int]:
+        """Store history items once per message id; return ids in input order."""
+        rows = {}
+        for item in items:
+            row = self._to_row(item)
+            rows.setdefault(row["message_id"], row)
+        if rows:
+            stmt = _dialect_insert(session, MessageSnapshot)
+            if stmt is not None:
+                session.execute(
+                    stmt.on_conflict_do_nothing(index_elements=["message_id"]),
+                    list(rows.values()),
+                )
+            else:
+                existing = set(
+                    session.scalars(
+                        select(MessageSnapshot.message_id).where(
+                            MessageSnapshot.message_id.in_(list(rows))
+                        )
+                    )
+                )
+                session.add_all(
+                    MessageSnapshot(**row)
+                    for message_id, row in rows.items()
+                    if message_id not in existing
+                )
+        return [int(item["id"]) for item in items]
+
+    def load_messages(
+        self, session: Session, message_ids: Iterable[int], full: bool = False
+    ) -> dict[int, dict[str, Any]]:
+        """Load history items keyed by message id.
+
+        ``full`` adds the author and channel ids, so the items can be stored
+        again with ``store_messages`` (archives carry them).
+        """
+        ids = list(set(message_ids))
+        loaded: dict[int, dict[str, Any]] = {}
+        for start in range(0, len(ids), 500):
+            stmt = select(MessageSnapshot).where(
+                MessageSnapshot.message_id.in_(ids[start : start + 500])
+            )
+            for snapshot in session.scalars(stmt):
+                content = snapshot.content
+                if snapshot.content_zlib is not None:
+                    content = zlib.decompress(snapshot.content_zlib).decode("utf-8")
+                item = {
+                    "id": snapshot.message_id,
+                    "content": content or "",
+                    "created_at": snapshot.created_at,
+                    "url": snapshot.url,
+                }
+                if full:
+                    item["author_id"] = snapshot.author_id
+                    item["channel_id"] = snapshot.channel_id
+                loaded[snapshot.message_id] = item
+        return loaded
+
+    def prune_unreferenced(self, session: Session, batch_size: int = 500) -> int:
+        """Delete snapshots that no row in ``report_logs`` refers to."""
+        referenced: set[int] = set()
+        stmt = select(ReportLog.reported_user_history_ids).where(
+            ReportLog.reported_user_history_ids.is_not(None)
+        )
+        for value in session.scalars(stmt):
+            referenced.update(_parse_ids(value))
+        orphans = [
+            message_id
+            for message_id in session.scalars(select(MessageSnapshot.message_id))
+            if message_id not in referenced
+        ]
+        for start in range(0, len(orphans), batch_size):
+            chunk = orphans[start : start + batch_size]
+            session.execute(
+                delete(MessageSnapshot).where(MessageSnapshot.message_id.in_(chunk))
+            )
+        return len(orphans)
+
+
+def parse_history_ids(report: ReportLog) -> list[int]:
+    """Message ids referenced by a report's history, or an empty list."""
+    return _parse_ids(report.reported_user_history_ids)
+
+
+def _parse_ids(value: str | None) -> list[int]:
+    if not value:
+        return []
+    try:
+        return [int(item) for item in json.loads(value)]
+    except (TypeError, ValueError):
+        return []
+
+
+ROLLUP_GRANULARITIES = ("HOUR", "DAY")
+_ROLLUP_KEYS = (
+    "granularity",
+    "bucket_start",
+    "guild_id",
+    "decision",
+    "confidence_bucket",
+)
+_ROLLUP_COUNTERS = ("report_count", "confidence_sum", "action_success_count")
+_REPORTER_KEYS = ("bucket_start", "guild_id", "reporter_id")
+_REPORTER_COUNTERS = ("report_count", "ban_count", "invalid_count", "need_gm_count")
+
+
+def _as_utc(value: datetime | None) -> datetime:
+    if value is None:
+        return datetime.now(timezone.utc)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def bucket_start(value: datetime | None, granularity: str) -> datetime:
+    """Truncate a timestamp to the start of its MINUTE, HOUR or DAY bucket (UTC)."""
+    value = _as_utc(value)
+    if granularity == "DAY":
+        return value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "MINUTE":
+        return value.replace(second=0, microsecond=0)
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _confidence_bucket(confidence: float | None) -> int:
+    if confidence is None:
+        return -1
+    return max(0, min(int(confidence * 10), 9))
+
+
+def _rollup_rows(
+    guild_id: int | None,
+    reporter_id: int | None,
+    decision: str | None,
+    action_taken: str | None,
+    confidence: float | None,
+    action_success: bool | None,
+    created_at: datetime | None,
+) -> tuple[list[dict], dict | None]:
+    """Map one resolved report onto its rollup increments."""
+    decision_key = decision or action_taken or "UNKNOWN"
+    report_rows = [
+        {
+            "granularity": granularity,
+            "bucket_start": bucket_start(created_at, granularity),
+            "guild_id": guild_id or 0,
+            "decision": decision_key,
+            "confidence_bucket": _confidence_bucket(confidence),
+            "report_count": 1,
+            "confidence_sum": confidence or 0.0,
+            "action_success_count": 1 if action_success else 0,
+        }
+        for granularity in ROLLUP_GRANULARITIES
+    ]
+    if reporter_id is None:
+        return report_rows, None
+    reporter_row = {
+        "bucket_start": bucket_start(created_at, "DAY"),
+        "guild_id": guild_id or 0,
+        "reporter_id": reporter_id,
+        "report_count": 1,
+        "ban_count": 1 if decision_key == "BAN" else 0,
+        "invalid_count": 1 if decision_key == "INVALID_REPORT" else 0,
+        "need_gm_count": 1 if decision_key == "NEED_GM" else 0,
+    }
+    return report_rows, reporter_row
+
+
+def _upsert_increment(
+    session: Session,
+    model,
+    keys: tuple[str, ...],
+    counters: tuple[str, ...],
+    rows: dict | list[dict],
+    maxima: tuple[str, ...] = (),
+) -> None:
+    """Insert ``rows`` or add their ``counters`` (and max their ``maxima``).
+
+    A list is written as one multi-row statement; its keys must be unique,
+    as PostgreSQL refuses to update a row twice in one statement.
+    """
+    rows = rows if isinstance(rows, list) else [rows]
+    if not rows:
+        return
+    table = model.__table__
+    stmt = _dialect_insert(session, model)
+    if stmt is not None:
+        stmt = stmt.values(rows)
+        set_ = {name: table.c[name] + stmt.excluded[name] for name in counters}
+        # SQLite's two-argument max() is PostgreSQL's greatest().
+        dialect = session.get_bind().dialect.name
+        greatest = func.greatest if dialect == "postgresql" else func.max
+        for name in maxima:
+            set_[name] = greatest(table.c[name], stmt.excluded[name])
+        stmt = stmt.on_conflict_do_update(index_elements=list(keys), set_=set_)
+        session.execute(stmt)
+        return
+
+    for row in rows:
+        existing = session.scalar(
+            select(model).where(*(getattr(model, name) == row[name] for name in keys))
+        )
+        if existing is None:
+            session.add(model(**row))
+            continue
+        for name in counters:
+            setattr(existing, name, getattr(existing, name) + row[name])
+        for name in maxima:
+            setattr(existing, name, max(getattr(existing, name), row[name]))
+
+
+class RollupRepository:
+    """Repository for incrementally maintained report rollups."""
+
+    def apply_resolved_report(self, session: Session, report: ReportLog) -> None:
+        report_rows, reporter_row = _rollup_rows(
+            report.guild_id,
+            report.reporter_id,
+            report.llm_decision,
+            report.action_taken,
+            report.llm_confidence,
+            report.action_success,
+            report.created_at,
+        )
+        for row in report_rows:
+            _upsert_increment(
+                session, ReportRollup, _ROLLUP_KEYS, _ROLLUP_COUNTERS, row
+            )
+        if reporter_row is not None:
+            _upsert_increment(
+                session,
+                ReporterRollup,
+                _REPORTER_KEYS,
+                _REPORTER_COUNTERS,
+                reporter_row,
+            )
+
+    def get_decision_totals(
+        self,
+        session: Session,
+        granularity: str,
+        since: datetime,
+        guild_id: int | None = None,
+    ) -> list[tuple[str, int, float, int]]:
+        stmt = (
+            select(
+                ReportRollup.decision,
+                func.sum(ReportRollup.report_count),
+                func.sum(ReportRollup.confidence_sum),
+                func.sum(ReportRollup.action_success_count),
+            )
+            .where(
+                ReportRollup.granularity == granularity,
+                ReportRollup.bucket_start >= since,
+            )
+            .group_by(ReportRollup.decision)
+        )
+        if guild_id is not None:
+            stmt = stmt.where(ReportRollup.guild_id == guild_id)
+        return [tuple(row) for row in session.execute(stmt).all()]
+
+    def get_confidence_histogram(
+        self,
+        session: Session,
+        granularity: str,
+        since: datetime,
+        guild_id: int | None = None,
+    ) -> list[tuple[str, int, int]]:
+        stmt = (
+            select(
+                ReportRollup.decision,
+                ReportRollup.confidence_bucket,
+                func.sum(ReportRollup.report_count),
+            )
+            .where(
+                ReportRollup.granularity == granularity,
+                ReportRollup.bucket_start >= since,
+            )
+            .group_by(ReportRollup.decision, ReportRollup.confidence_bucket)
+        )
+        if guild_id is not None:
+            stmt = stmt.where(ReportRollup.guild_id == guild_id)
+        return [tuple(row) for row in session.execute(stmt).all()]
+
+    def get_report_series(
+        self,
+        session: Session,
+        granularity: str,
+        since: datetime,
+        guild_id: int | None = None,
+    ) -> list[tuple[datetime, int, int]]:
+        stmt = (
+            select(
+                ReportRollup.bucket_start,
+                ReportRollup.guild_id,
+                func.sum(ReportRollup.report_count),
+            )
+            .where(
+                ReportRollup.granularity == granularity,
+                ReportRollup.bucket_start >= since,
+            )
+            .group_by(ReportRollup.bucket_start, ReportRollup.guild_id)
+            .order_by(ReportRollup.bucket_start)
+        )
+        if guild_id is not None:
+            stmt = stmt.where(ReportRollup.guild_id == guild_id)
+        return [tuple(row) for row in session.execute(stmt).all()]
+
+    def get_reporter_stats(
+        self,
+        session: Session,
+        since: datetime,
+        guild_id: int | None = None,
+        limit: int = 20,
+    ) -> list[tuple[int, int, int, int, int]]:
+        total = func.sum(ReporterRollup.report_count)
+        stmt = (
+            select(
+                ReporterRollup.reporter_id,
+                total,
+                func.sum(ReporterRollup.ban_count),
+                func.sum(ReporterRollup.invalid_count),
+                func.sum(ReporterRollup.need_gm_count),
+            )
+            .where(ReporterRollup.bucket_start >= since)
+            .group_by(ReporterRollup.reporter_id)
+            .order_by(total.desc())
+            .limit(limit)
+        )
+        if guild_id is not None:
+            stmt = stmt.where(ReporterRollup.guild_id == guild_id)
+        return [tuple(row) for row in session.execute(stmt).all()]
+
+    def get_reporter_totals(
+        self, session: Session, since: datetime
+    ) -> dict[int, tuple[int, int, int]]:
+        """(ban, invalid, need_gm) counts per reporter across all guilds."""
+        stmt = (
+            select(
+                ReporterRollup.reporter_id,
+                func.sum(ReporterRollup.ban_count),
+                func.sum(ReporterRollup.invalid_count),
+                func.sum(ReporterRollup.need_gm_count),
+            )
+            .where(ReporterRollup.bucket_start >= since)
+            .group_by(ReporterRollup.reporter_id)
+        )
+        return {
+            reporter_id: (int(bans or 0), int(invalid or 0), int(need_gm or 0))
+            for reporter_id, bans, invalid, need_gm in session.execute(stmt).all()
+        }
+
+
+def rebuild_rollups(batch_size: int = 5000, since: datetime | None = None) -> int:
+    """Rebuild rollup tables from report_logs; see ``replace_rollups``."""
+    with get_session() as session:
+        return replace_rollups(session, batch_size=batch_size, since=since)
+
+
+def replace_rollups(
+    session: Session, batch_size: int = 5000, since: datetime | None = None
+) -> int:
+    """Replace rollup buckets with totals streamed from report_logs.
+
+    Buckets starting before ``since`` are left untouched, and so is the rest
+    of the day ``since`` falls in: its bucket also counts rows archived
+    before ``since``. The read and the replace share the caller's
+    transaction, which first blocks rollup writers, so a report resolved
+    meanwhile is counted once. Returns the number of resolved reports that
+    were aggregated.
+    """
+    floor = None
+    if since is not None:
+        floor = bucket_start(since, "DAY")
+        if floor < _as_utc(since):
+            floor += timedelta(days=1)
+    conn = session.connection()
+    if conn.dialect.name == "postgresql":
+        # Reports resolve and increment rollups in one transaction; those
+        # transactions now wait for this one instead of being overwritten.
+        conn.execute(
+            text(
+                f"LOCK TABLE {ReportRollup.__tablename__}, "
+                f"{ReporterRollup.__tablename__} IN EXCLUSIVE MODE"
+            )
+        )
+    elif conn.dialect.name == "sqlite" and not conn.connection.in_transaction:
+        # pysqlite starts transactions lazily at the first write; take the
+        # write lock before reading instead.
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    report_totals: dict[tuple, dict] = {}
+    reporter_totals: dict[tuple, dict] = {}
+    processed = 0
+    stmt = select(
+        ReportLog.guild_id,
+        ReportLog.reporter_id,
+        ReportLog.llm_decision,
+        ReportLog.action_taken,
+        ReportLog.llm_confidence,
+        ReportLog.action_success,
+        ReportLog.created_at,
+    ).where(ReportLog.resolved_at.is_not(None))
+    if floor is not None:
+        stmt = stmt.where(ReportLog.created_at >= floor)
+
+    result = conn.execution_options(yield_per=batch_size).execute(stmt)
+    for partition in result.partitions():
+        for row in partition:
+            report_rows, reporter_row = _rollup_rows(*row)
+            for item in report_rows:
+                _accumulate(report_totals, _ROLLUP_KEYS, _ROLLUP_COUNTERS, item)
+            if reporter_row is not None:
+                _accumulate(
+                    reporter_totals, _REPORTER_KEYS, _REPORTER_COUNTERS, reporter_row
+                )
+            processed += 1
+
+    clear_reports = delete(ReportRollup)
+    clear_reporters = delete(ReporterRollup)
+    if floor is not None:
+        clear_reports = clear_reports.where(ReportRollup.bucket_start >= floor)
+        clear_reporters = clear_reporters.where(ReporterRollup.bucket_start >= floor)
+    session.execute(clear_reports)
+    session.execute(clear_reporters)
+    _bulk_insert(session, ReportRollup, list(report_totals.values()), batch_size)
+    _bulk_insert(session, ReporterRollup, list(reporter_totals.values()), batch_size)
+    return processed
+
+
+def _accumulate(
+    totals: dict[tuple, dict],
+    keys: tuple[str, ...],
+    counters: tuple[str, ...],
+    row: dict,
+) -> None:
+    key = tuple(row[name] for name in keys)
+    current = totals.get(key)
+    if current is None:
+        totals[key] = dict(row)
+        return
+    for name in counters:
+        current[name] += row[name]
+
+
+def _bulk_insert(session: Session, model, rows: list[dict], batch_size: int) -> None:
+    for start in range(0, len(rows), batch_size):
+        session.execute(insert(model), rows[start : start + batch_size])
+
+
+class SearchRepository:
+    """Full-text search documents for reports; see ``src.database.search``."""
+
+    def index_reports(
+        self,
+        session: Session,
+        reports: Iterable[ReportLog | dict[str, Any]],
+        replace: bool = True,
+    ) -> None:
+        """Write the search documents of reports (objects or column dicts)."""
+        docs = []
+        for report in reports:
+            if isinstance(report, dict):
+                values = report
+            else:
+                values = {
+                    column: getattr(report, column)
+                    for column, _, _ in SEARCH_FIELDS.values()
+                }
+                values["id"] = report.id
+            doc = {"id": values["id"]}
+            for field, (column, _, _) in SEARCH_FIELDS.items():
+                doc[field] = search_terms(values.get(column))
+            docs.append(doc)
+        if not docs:
+            return
+        dialect = session.get_bind().dialect.name
+        if dialect == "postgresql":
+            document = " || ".join(
+                f"setweight(to_tsvector('simple', :{field}), '{weight}')"
+                for field, (_, _, weight) in SEARCH_FIELDS.items()
+            )
+            session.execute(
+                text(
+                    f"INSERT INTO {SEARCH_TABLE} (report_id, document) "
+                    f"VALUES (:id, {document}) ON CONFLICT (report_id) "
+                    "DO UPDATE SET document = EXCLUDED.document"
+                ),
+                docs,
+            )
+        elif dialect == "sqlite":
+            if replace:
+                session.execute(
+                    text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :id"), docs
+                )
+            fields = ", ".join(SEARCH_FIELDS)
+            params = ", ".join(f":{field}" for field in SEARCH_FIELDS)
+            session.execute(
+                text(
+                    f"INSERT INTO {SEARCH_TABLE} (rowid, {fields}) "
+                    f"VALUES (:id, {params})"
+                ),
+                docs,
+            )
+
+    def _match(
+        self,
+        session: Session,
+        query: str,
+        field: str | None,
+        guild_id: int | None,
+        decision: str | None,
+    ) -> dict[str, Any] | None:
+        """SQL pieces selecting the reports that match, or None if none can."""
+        dialect = session.get_bind().dialect.name
+        if dialect == "postgresql":
+            match = {
+                "id": "s.report_id",
+                "score": "ts_rank_cd(s.document, q)",
+                "best": "ts_rank_cd(s.document, q) DESC",
+                # ts_rank_cd returns real; compare at that precision.
+                "cursor_score": "CAST(:score AS REAL)",
+                "source": f"{SEARCH_TABLE} AS s, to_tsquery('simple', :query) AS q",
+                "conditions": ["s.document @@ q"],
+                "params": {"query": tsquery(query, field)},
+            }
+        elif dialect == "sqlite":
+            match = {
+                "id": "s.rowid",
+                # FTS5 ranks ascending (more negative is better) and sorts on
+                # its own rank column fastest.
+                "score": "-s.rank",
+                "best": "s.rank",
+                "cursor_score": ":score",
+                "source": f"{SEARCH_TABLE} AS s",
+                "conditions": [f"s.{SEARCH_TABLE} MATCH :query"],
+                "params": {"query": fts5_query(query, field)},
+            }
+        else:
+            return None
+        if match["params"]["query"] is None:
+            return None
+        if guild_id is not None or decision:
+            match["source"] += f" JOIN report_logs AS r ON r.id = {match['id']}"
+        if guild_id is not None:
+            match["conditions"].append("r.guild_id = :guild_id")
+            match["params"]["guild_id"] = guild_id
+        if decision:
+            match["conditions"].append("r.llm_decision = :decision")
+            match["params"]["decision"] = decision.upper()
+        return match
+
+    def relevance_floor(
+        self,
+        session: Session,
+        query: str,
+        window: int,
+        field: str | None = None,
+        guild_id: int | None = None,
+        decision: str | None = None,
+    ) -> int:
+        """Lowest report id among the newest ``window`` matches (0 if fewer).
+
+        Scoring every match of a common term costs time proportional to the
+        match count; ranking only the newest ``window`` matches keeps
+        relevance searches bounded on large tables. The window is taken with
+        the same guild and decision filters as the search, so a filtered
+        search still sees ``window`` of its own matches.
+        """
+        match = self._match(session, query, field, guild_id, decision)
+        if match is None:
+            return 0
+        stmt = text(
+            f"SELECT {match['id']} FROM {match['source']} "
+            f"WHERE {' AND '.join(match['conditions'])} "
+            f"ORDER BY {match['id']} DESC LIMIT 1 OFFSET :offset"
+        )
+        floor = session.scalar(stmt, {**match["params"], "offset": window - 1})
+        return int(floor) if floor is not None else 0
+
+    def search(
+        self,
+        session: Session,
+        query: str,
+        *,
+        field: str | None = None,
+        guild_id: int | None = None,
+        decision: str | None = None,
+        order: str = "relevance",
+        after: tuple[float, int] | tuple[int] | None = None,
+        floor: int = 0,
+        limit: int = 20,
+    ) -> list[tuple[int, float]]:
+        """Matching ``(report_id, score)`` pairs, best or newest first.
+
+        ``order`` is "relevance" (higher score first, then id) or "recent"
+        (newest id first). ``after`` is the last pair of the previous page:
+        ``(score, id)`` for relevance, ``(id,)`` for recent. Reports with ids
+        below ``floor`` are skipped.
+        """
+        match = self._match(session, query, field, guild_id, decision)
+        if match is None:
+            return []
+        id_column, score = match["id"], match["score"]
+        conditions = match["conditions"]
+        params = {**match["params"], "limit": limit}
+        if floor:
+            conditions.append(f"{id_column} >= :floor")
+            params["floor"] = floor
+        if order == "recent":
+            if after is not None:
+                conditions.append(f"{id_column} < :after_id")
+                params["after_id"] = after[-1]
+            order_by = f"{id_column} DESC"
+        else:
+            if after is not None:
+                cursor_score = match["cursor_score"]
+                conditions.append(
+                    f"({score} < {cursor_score} OR "
+                    f"({score} = {cursor_score} AND {id_column} > :after_id))"
+                )
+                params["score"], params["after_id"] = after
+            order_by = f"{match['best']}, {id_column}"
+        stmt = text(
+            f"SELECT {id_column}, {score} FROM {match['source']} "
+            f"WHERE {' AND '.join(conditions)} ORDER BY {order_by} LIMIT :limit"
+        )
+        return [(int(row[0]), float(row[1])) for row in session.execute(stmt, params)]
+
+
+def index_reports_after(
+    session: Session, after_id: int, batch_size: int = 2000
+) -> tuple[int, int]:
+    """Index the next ``batch_size`` reports by id; returns (count, last id)."""
+    columns = [ReportLog.id] + [
+        getattr(ReportLog, column) for column, _, _ in SEARCH_FIELDS.values()
+    ]
+    rows = [
+        dict(row)
+        for row in session.execute(
+            select(*columns)
+            .where(ReportLog.id > after_id)
+            .order_by(ReportLog.id)
+            .limit(batch_size)
+        ).mappings()
+    ]
+    SearchRepository().index_reports(session, rows, replace=False)
+    return len(rows), rows[-1]["id"] if rows else after_id
+
+
+def rebuild_search_index(batch_size: int = 2000) -> int:
+    """Re-create every report's search document; returns the reports indexed.
+
+    Each batch commits on its own, so the bot keeps writing meanwhile.
+    """
+    with get_session() as session:
+        session.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+    indexed = last_id = 0
+    while True:
+        with get_session() as session:
+            count, last_id = index_reports_after(session, last_id, batch_size)
+        if not count:
+            return indexed
+        indexed += count
+
+
+class ArchiveRepository:
+    """Repository for the report archive index."""
+
+    def record_archive(
+        self,
+        session: Session,
+        file_path: str,
+        month: str,
+        report_ids: list[int],
+        cutoff: datetime,
+    ) -> ReportArchive:
+        archive = ReportArchive(
+            file_path=file_path,
+            month=month,
+            row_count=len(report_ids),
+            min_report_id=min(report_ids),
+            max_report_id=max(report_ids),
+            cutoff=cutoff,
+        )
+        session.add(archive)
+        session.flush()
+        return archive
+
+    def list_archives(self, session: Session, limit: int = 100) -> list[ReportArchive]:
+        stmt = select(ReportArchive).order_by(ReportArchive.id.desc()).limit(limit)
+        return list(session.scalars(stmt).all())
+
+    def get_by_path(self, session: Session, file_path: str) -> ReportArchive | None:
+        stmt = select(ReportArchive).where(ReportArchive.file_path == file_path)
+        return session.scalar(stmt)
+
+    def get_watermark(self, session: Session) -> datetime | None:
+        """Latest archive cutoff; rows created before it may live only in files."""
+        value = session.scalar(select(func.max(ReportArchive.cutoff)))
+        return _as_utc(value) if value is not None else None
+
+
+class ImageHashRepository:
+    """Repository for hashes of images from banned reports."""
+
+    def add_images(
+        self,
+        session: Session,
+        images: Iterable[Any],
+        guild_id: int,
+        report_id: int | None,
+    ) -> None:
+        """Insert ``ImageHashes`` rows (unsigned hashes are stored signed)."""
+        for image in images:
+            session.add(
+                BannedImageHash(
+                    guild_id=guild_id,
+                    report_id=report_id,
+                    phash=_signed64(image.phash),
+                    dhash=_signed64(image.dhash),
+                    width=image.width or None,
+                    height=image.height or None,
+                )
+            )
+
+    def list_after(
+        self, session: Session, after_id: int, limit: int = 100_000
+    ) -> list[BannedImageHash]:
+        stmt = (
+            select(BannedImageHash)
+            .where(BannedImageHash.id > after_id)
+            .order_by(BannedImageHash.id)
+            .limit(limit)
+        )
+        return list(session.scalars(stmt).all())
+
+
+def _signed64(value: int) -> int:
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+class DomainRepository:
+    """Repository for link domain reputation."""
+
+    def get_domains(
+        self, session: Session, domains: Iterable[str]
+    ) -> list[DomainReputation]:
+        stmt = select(DomainReputation).where(
+            DomainReputation.domain.in_(list(domains))
+        )
+        return list(session.scalars(stmt).all())
+
+    def list_domains(
+        self, session: Session, status: str | None = None, limit: int = 1000
+    ) -> list[DomainReputation]:
+        stmt = select(DomainReputation)
+        if status is not None:
+            stmt = stmt.where(DomainReputation.status == status)
+        stmt = stmt.order_by(DomainReputation.domain).limit(limit)
+        return list(session.scalars(stmt).all())
+
+    def set_status(
+        self,
+        session: Session,
+        domain: str,
+        status: str | None,
+        note: str | None = None,
+    ) -> None:
+        """Block, allow or (``status=None``) clear a moderator decision."""
+        row = session.get(DomainReputation, domain)
+        if row is None:
+            row = DomainReputation(domain=domain, ban_count=0, invalid_count=0)
+            session.add(row)
+        row.status = status
+        if note is not None:
+            row.note = note
+
+    def record_outcome(
+        self, session: Session, domains: Iterable[str], decision: str
+    ) -> None:
+        """Count a BAN or INVALID_REPORT verdict for each linked domain."""
+        for domain in domains:
+            _upsert_increment(
+                session,
+                DomainReputation,
+                ("domain",),
+                ("ban_count", "invalid_count"),
+                {
+                    "domain": domain,
+                    "ban_count": 1 if decision == "BAN" else 0,
+                    "invalid_count": 1 if decision == "INVALID_REPORT" else 0,
+                },
+            )
+
+
+class GuildConfigRepository:
+    """Repository for per-guild configuration overrides."""
+
+    def get_version(self, session: Session) -> int:
+        """Table version: the sum of the row versions, bumped by every write."""
+        stmt = select(func.coalesce(func.sum(GuildConfig.version), 0))
+        return int(session.scalar(stmt))
+
+    def list_configs(self, session: Session) -> list[GuildConfig]:
+        stmt = select(GuildConfig).order_by(GuildConfig.guild_id)
+        return list(session.scalars(stmt).all())
+
+    def list_config_rows(self, session: Session) -> list[Any]:
+        """Every config as a plain row; much cheaper than ORM objects in bulk."""
+        return list(session.execute(select(GuildConfig.__table__)).all())
+
+    def get_config(self, session: Session, guild_id: int) -> GuildConfig | None:
+        return session.get(GuildConfig, guild_id)
+
+    def set_config(
+        self, session: Session, guild_id: int, values: dict[str, Any]
+    ) -> GuildConfig:
+        """Set a guild's overrides; ``None`` values inherit the global settings.
+
+        Clearing every override keeps the row, so the table version still
+        goes up and running bots notice the change.
+        """
+        row = session.get(GuildConfig, guild_id)
+        if row is None:
+            row = GuildConfig(guild_id=guild_id, version=1)
+            session.add(row)
+        else:
+            # Incremented in SQL so concurrent writers cannot lose a bump.
+            row.version = GuildConfig.version + 1
+        for field, value in values.items():
+            setattr(row, field, value)
+        session.flush()
+        session.refresh(row)
+        return row
+
+
+class PendingReportRepository:
+    """Repository for reports handed over between processes."""
+
+    def add_pending(self, session: Session, records: list[dict]) -> None:
+        """Save ``PendingReport`` column dicts.
+
+        Report rows an interrupted attempt already created are marked
+        INTERRUPTED, so the resumed attempt's row is the only open one.
+        """
+        if not records:
+            return
+        session.execute(insert(PendingReport), records)
+        for record in records:
+            if record.get("stage") != "interrupted":
+                continue
+            session.execute(
+                update(ReportLog)
+                .where(
+                    ReportLog.guild_id == record["guild_id"],
+                    ReportLog.reported_message_id == record["reported_message_id"],
+                    ReportLog.status.in_(("PENDING", "LLM_DONE")),
+                )
+                .values(status="INTERRUPTED")
+            )
+
+    def has_pending(self, session: Session) -> bool:
+        return session.scalar(select(PendingReport.id).limit(1)) is not None
+
+    def take_pending(
+        self, session: Session, guild_ids: Iterable[int], batch_size: int = 500
+    ) -> list[dict]:
+        """Remove and return the pending reports of ``guild_ids``, oldest first.
+
+        On PostgreSQL the rows are locked with SKIP LOCKED, so two processes
+        serving the same guilds never take the same report.
+        """
+        guild_ids = list(guild_ids)
+        taken: list[dict] = []
+        for start in range(0, len(guild_ids), batch_size):
+            batch = guild_ids[start : start + batch_size]
+            stmt = (
+                select(PendingReport.__table__)
+                .where(PendingReport.guild_id.in_(batch))
+                .order_by(PendingReport.id)
+                .with_for_update(skip_locked=True)
+            )
+            rows = [dict(row._mapping) for row in session.execute(stmt)]
+            if rows:
+                ids = [row["id"] for row in rows]
+                session.execute(delete(PendingReport).where(PendingReport.id.in_(ids)))
+                taken.extend(rows)
+        return taken
+
 
 class StatusRepository:
     """Repository for bot status heartbeat."""
 
     def upsert_status(
-        self, session: Session, active_guilds: int, queue_depth: int | None
+        self,
+        session: Session,
+        active_guilds: int,
+        queue_depth: int | None,
+        loop_lag: dict[str, float] | None = None,
+        shard_id: int = 0,
+        shard_count: int = 1,
+        latency_ms: float | None = None,
     ) -> None:
-        status = session.get(BotStatus, 1)
+        # Shard 0 reuses the pre-sharding singleton row (id=1).
+        status = session.get(BotStatus, shard_id + 1)
         if status is None:
-            status = BotStatus(
-                id=1,
-                active_guilds=active_guilds,
-                queue_depth=queue_depth,
-                last_heartbeat=datetime.now(timezone.utc),
-            )
+            status = BotStatus(id=shard_id + 1)
             session.add(status)
-            return
+        status.shard_id = shard_id
+        status.shard_count = shard_count
+        status.latency_ms = latency_ms
         status.active_guilds = active_guilds
         status.queue_depth = queue_depth
         status.last_heartbeat = datetime.now(timezone.utc)
+        if loop_lag is not None:
+            status.loop_lag_p50_ms = loop_lag["p50"]
+            status.loop_lag_p99_ms = loop_lag["p99"]
+            status.loop_lag_max_ms = loop_lag["max"]
 
     def get_latest_status(self, session: Session) -> BotStatus | None:
-        return session.get(BotStatus, 1)
+        stmt = select(BotStatus).order_by(BotStatus.last_heartbeat.desc()).limit(1)
+        return session.scalar(stmt)
+
+    def list_statuses(self, session: Session) -> list[BotStatus]:
+        """One heartbeat row per shard, ordered by shard id."""
+        stmt = select(BotStatus).order_by(BotStatus.id)
+        return list(session.scalars(stmt).all())
 
     def is_online(self, status: BotStatus | None, ttl_seconds: int = 120) -> bool:
         if status is None:
             return False
         now = datetime.now(timezone.utc)
-        return now - status.last_heartbeat <= timedelta(seconds=ttl_seconds)
+        return now - _as_utc(status.last_heartbeat) <= timedelta(seconds=ttl_seconds)
+
+
+
+
+STATUS_GRANULARITIES = ("MINUTE", "HOUR", "DAY")
+_STATUS_KEYS = ("granularity", "bucket_start", "shard_id")
+_STATUS_COUNTERS = (
+    "sample_count",
+    "active_guilds_sum",
+    "queue_depth_sum",
+    "latency_count",
+    "latency_ms_sum",
+    "loop_lag_count",
+    "loop_lag_p99_ms_sum",
+)
+_STATUS_MAXIMA = (
+    "active_guilds_max",
+    "queue_depth_max",
+    "latency_ms_max",
+    "loop_lag_max_ms",
+)
+
 
+def status_bucket_rows(samples: Iterable[tuple]) -> list[dict]:
+    """Sum health samples into one row per granularity, bucket and shard.
 
+    ``samples`` are ``(taken_at, shard_id, active_guilds, queue_depth,
+    latency_ms, loop_lag_p99_ms, loop_lag_max_ms)``; latency and loop lag
+    may be None.
+    """
+    rows: dict[tuple, dict] = {}
+    for taken_at, shard_id, guilds, queue_depth, latency, lag_p99, lag_max in samples:
+        for granularity in STATUS_GRANULARITIES:
+            start = bucket_start(taken_at, granularity)
+            row = rows.get((granularity, start, shard_id))
+            if row is None:
+                row = dict.fromkeys(_STATUS_COUNTERS + _STATUS_MAXIMA, 0)
+                row["granularity"] = granularity
+                row["bucket_start"] = start
+                row["shard_id"] = shard_id
+                rows[(granularity, start, shard_id)] = row
+            row["sample_count"] += 1
+            row["active_guilds_sum"] += guilds
+            row["active_guilds_max"] = max(row["active_guilds_max"], guilds)
+            row["queue_depth_sum"] += queue_depth
+            row["queue_depth_max"] = max(row["queue_depth_max"], queue_depth)
+            if latency is not None:
+                row["latency_count"] += 1
+                row["latency_ms_sum"] += latency
+                row["latency_ms_max"] = max(row["latency_ms_max"], latency)
+            if lag_p99 is not None:
+                row["loop_lag_count"] += 1
+                row["loop_lag_p99_ms_sum"] += lag_p99
+                row["loop_lag_max_ms"] = max(row["loop_lag_max_ms"], lag_max or 0.0)
+    return list(rows.values())
+
+
+class StatusHistoryRepository:
+    """Repository for the downsampled bot health history."""
+
+    def add_buckets(self, session: Session, rows: list[dict]) -> None:
+        """Merge rows from ``status_bucket_rows`` into the stored buckets."""
+        # Chunked to stay under the bound parameter limit after a backlog.
+        for offset in range(0, len(rows), 500):
+            _upsert_increment(
+                session,
+                StatusSample,
+                _STATUS_KEYS,
+                _STATUS_COUNTERS,
+                rows[offset : offset + 500],
+                _STATUS_MAXIMA,
+            )
+
+    def prune(self, session: Session, granularity: str, before: datetime) -> int:
+        """Delete ``granularity`` buckets that start before ``before``."""
+        result = session.execute(
+            delete(StatusSample).where(
+                StatusSample.granularity == granularity,
+                StatusSample.bucket_start < before,
+            )
+        )
+        return result.rowcount or 0
+
+    def get_series(
+        self,
+        session: Session,
+        granularity: str,
+        since: datetime,
+        shard_id: int | None = None,
+    ) -> list[tuple]:
+        """Per bucket: start, shards, samples, guilds, queue depth avg/max,
+        latency sum/count/max and loop lag p99 sum/count/max.
+
+        Guild counts and queue depths are per-shard averages summed over the
+        shards; a range scan of the (granularity, bucket_start) index.
+        """
+        count = StatusSample.sample_count
+        stmt = (
+            select(
+                StatusSample.bucket_start,
+                func.count(StatusSample.shard_id),
+                func.sum(count),
+                func.sum(StatusSample.active_guilds_sum / count),
+                func.sum(StatusSample.queue_depth_sum / count),
+                func.sum(StatusSample.queue_depth_max),
+                func.sum(StatusSample.latency_ms_sum),
+                func.sum(StatusSample.latency_count),
+                func.max(StatusSample.latency_ms_max),
+                func.sum(StatusSample.loop_lag_p99_ms_sum),
+                func.sum(StatusSample.loop_lag_count),
+                func.max(StatusSample.loop_lag_max_ms),
+            )
+            .where(
+                StatusSample.granularity == granularity,
+                StatusSample.bucket_start >= since,
+            )
+            .group_by(StatusSample.bucket_start)
+            .order_by(StatusSample.bucket_start)
+        )
+        if shard_id is not None:
+            stmt = stmt.where(StatusSample.shard_id == shard_id)
+        return [tuple(row) for row in session.execute(stmt).all()]
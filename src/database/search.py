@@ -0,0 +1,167 @@
+"""Full-text search over reported content, report reasons and LLM reasoning.
+
+Neither SQLite's ``unicode61`` tokenizer nor PostgreSQL's ``simple`` parser
+splits Chinese text into words: a run like ``加客服私聊`` is a single token,
+so searching ``客服`` would never match. Documents and queries are therefore
+pre-tokenized here the same way: NFKC-folded and lower-cased, Latin words
+and numbers kept whole, and every CJK run split into overlapping bigrams
+(``加客 客服 服私 私聊``). A query word becomes a phrase of its tokens, so
+``免费领取`` only matches those four characters in a row. A single CJK
+character is searched as a prefix of the bigrams.
+
+SQLite keeps the tokenized text in an FTS5 table keyed by report id
+(``rowid``); PostgreSQL keeps a weighted ``tsvector`` per report with a GIN
+index. ``ReportRepository`` updates the document whenever a report's text
+changes, and deleting a report removes it (trigger or foreign key).
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import re
+import unicodedata
+
+from sqlalchemy import Connection, text
+
+SEARCH_TABLE = "report_search"
+# Indexed report columns, with their bm25 weight (SQLite) or tsvector
+# weight class (PostgreSQL).
+SEARCH_FIELDS = {
+    "content": ("reported_message_content", 1.0, "A"),
+    "reason": ("report_reason", 0.5, "B"),
+    "reasoning": ("llm_reasoning", 0.3, "C"),
+}
+
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_TOKEN_RE = re.compile(rf"[{_CJK}]+|[^\W_{_CJK}]+")
+_CJK_RE = re.compile(rf"[{_CJK}]")
+
+
+def search_terms(value: str | None) -> str:
+    """Space-separated index tokens for ``value``."""
+    return " ".join(_tokens(value or ""))
+
+
+def _tokens(value: str) -> list[str]:
+    tokens = []
+    for match in _TOKEN_RE.finditer(unicodedata.normalize("NFKC", value).lower()):
+        run = match.group(0)
+        if _CJK_RE.match(run) and len(run) > 1:
+            tokens.extend(run[index : index + 2] for index in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def _query_phrases(query: str) -> list[tuple[list[str], bool]]:
+    """(tokens, is_prefix) for each whitespace-separated query word."""
+    phrases = []
+    for word in query.split():
+        tokens = _tokens(word)
+        if tokens:
+            single_cjk = len(tokens) == 1 and _CJK_RE.fullmatch(tokens[0]) is not None
+            phrases.append((tokens, single_cjk))
+    return phrases
+
+
+def fts5_query(query: str, field: str | None = None) -> str | None:
+    """FTS5 MATCH expression ANDing the query words, or None if empty."""
+    parts = []
+    for tokens, prefix in _query_phrases(query):
+        parts.append(f'"{" ".join(tokens)}"' + ("*" if prefix else ""))
+    if not parts:
+        return None
+    expression = " AND ".join(parts)
+    return f"{{{field}}}: ({expression})" if field else expression
+
+
+def tsquery(query: str, field: str | None = None) -> str | None:
+    """``to_tsquery('simple', ...)`` text ANDing the query words, or None."""
+    weight = SEARCH_FIELDS[field][2] if field else ""
+    parts = []
+    for tokens, prefix in _query_phrases(query):
+        if prefix:
+            parts.append(f"'{tokens[0]}':*{weight}")
+        else:
+            suffix = f":{weight}" if weight else ""
+            parts.append(
+                "(" + " <-> ".join(f"'{token}'{suffix}" for token in tokens) + ")"
+            )
+    return " & ".join(parts) if parts else None
+
+
+def create_search_schema(conn: Connection) -> None:
+    """Create the search table, its index and delete hook if missing."""
+    if conn.dialect.name == "postgresql":
+        conn.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+                "report_id INTEGER PRIMARY KEY "
+                "REFERENCES report_logs (id) ON DELETE CASCADE, "
+                "document TSVECTOR NOT NULL)"
+            )
+        )
+        conn.execute(
+            text(
+                f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_document "
+                f"ON {SEARCH_TABLE} USING GIN (document)"
+            )
+        )
+        return
+    if conn.dialect.name != "sqlite":
+        return
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+        {"name": SEARCH_TABLE},
+    ).first()
+    if exists:
+        return
+    columns = ", ".join(SEARCH_FIELDS)
+    weights = ", ".join(str(weight) for _, weight, _ in SEARCH_FIELDS.values())
+    conn.execute(
+        text(
+            f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5({columns}, "
+            "tokenize = 'unicode61 remove_diacritics 0')"
+        )
+    )
+    # Persist the column weights so ``rank`` is a weighted bm25.
+    conn.execute(
+        text(
+            f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rank) "
+            f"VALUES ('rank', 'bm25({weights})')"
+        )
+    )
+    conn.execute(
+        text(
+            f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete "
+            f"AFTER DELETE ON report_logs BEGIN "
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id; END"
+        )
+    )
+
+
+def encode_cursor(values: tuple) -> str:
+    """Opaque page cursor for the last hit of a page."""
+    raw = json.dumps(list(values), separators=(",", ":")).encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, order: str) -> tuple:
+    """Inverse of ``encode_cursor``; raises ValueError for a bad cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("invalid cursor") from exc
+    # Relevance cursors are (score, id, floor); recent cursors are (id,).
+    size = 3 if order == "relevance" else 1
+    if (
+        not isinstance(values, list)
+        or len(values) != size
+        or not all(isinstance(value, (int, float)) for value in values)
+    ):
+        raise ValueError("invalid cursor")
+    if size == 1:
+        return (int(values[0]),)
+    return float(values[0]), int(values[1]), int(values[2])
@@ -1,34 +1,63 @@
 """Entry point."""
 
 import asyncio
-import sys
+import signal
+import time
 from pathlib import Path
 
 from src.bot.client import get_bot
 from src.config import get_settings
-from src.database import init_db
+from src.utils.timing import StartupTimer, process_started
+
+
+def _init_database(timer: StartupTimer) -> None:
+    started = time.perf_counter()
+    from src.database import init_db
+
+    init_db()
+    timer.record_background("db_init", time.perf_counter() - started)
+
+
+def _install_signal_handlers(bot) -> None:
+    """Drain reports on SIGTERM (platform restarts) and SIGINT."""
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, bot.request_shutdown, signum.name)
+        except NotImplementedError:  # pragma: no cover - Windows
+            return
 
 
 async def main() -> None:
     """Run the bot."""
+    timer = StartupTimer(process_started())
+    timer.mark("imports")
     print("Starting Discord LLM Guard Bot...")
 
     settings = get_settings()
+    timer.mark("settings")
 
     data_dir = Path("data")
     data_dir.mkdir(parents=True, exist_ok=True)
-    init_db()
 
     bot = get_bot()
+    bot.startup_timer = timer
+    # Schema checks run in a thread while the bot logs in and connects;
+    # handlers that touch the database wait for it via bot.wait_for_db().
+    db_init = asyncio.ensure_future(asyncio.to_thread(_init_database, timer))
+    bot.set_db_init(db_init)
+    _install_signal_handlers(bot)
     try:
-        await bot.start(settings.discord_token)
+        await bot.login(settings.discord_token)
+        timer.mark("login")
+        await bot.connect()
     except KeyboardInterrupt:
         print("\nInterrupted, shutting down...")
     finally:
         await bot.close()
+    if db_init.done() and not db_init.cancelled() and db_init.exception():
+        raise db_init.exception()
 
 
 if __name__ == "__main__":
     asyncio.run(main())
-
-
@@ -10,25 +10,110 @@ def _format_history(history: Iterable[dict]) -> str:
     for item in history:
         content = item.get("content", "").strip() or "(空消息)"
         created_at = item.get("created_at", "unknown")
-        lines.append(f"- {created_at}: {content}")
+        location = item.get("channel_name")
+        if location and item.get("guild_name"):
+            location = f"{item['guild_name']} #{location}"
+        elif location:
+            location = f"#{location}"
+        if location:
+            lines.append(f"- {created_at} [{location}]: {content}")
+        else:
+            lines.append(f"- {created_at}: {content}")
     return "\n".join(lines) if lines else "(无历史消息)"
 
 
+def _format_attachments(attachments: Iterable[dict]) -> str:
+    lines = []
+    for item in attachments:
+        details = [item.get("content_type") or "未知类型"]
+        if item.get("width"):
+            details.append(f"{item['width']}×{item['height']}")
+        details.append(f"{(item.get('size') or 0) / 1024:.0f} KB")
+        lines.append(f"- {item.get('filename')}（{'，'.join(details)}）")
+    return "\n".join(lines)
+
+
+def _format_links(links: Iterable[dict]) -> str:
+    lines = []
+    for item in links:
+        line = f"- {item['url']}"
+        if item.get("hops"):
+            line += f" → {item['final_url']}（{item['hops']} 次跳转）"
+        if not item.get("complete"):
+            line += f"（未能完整解析：{item.get('error') or '超时'}）"
+        lines.append(line)
+        for domain, counts in (item.get("history") or {}).items():
+            lines.append(
+                f"  {domain} 曾出现在 {counts['bans']} 次封禁、"
+                f"{counts['invalid']} 次无效举报中"
+            )
+    return "\n".join(lines)
+
+
+_DECISION_NAMES = {"BAN": "已封禁", "INVALID_REPORT": "无效举报"}
+
+
+def _format_cases(cases: Iterable[dict], max_chars: int) -> str:
+    """Past cases, most similar first, cut off at ``max_chars``."""
+    lines: list[str] = []
+    used = 0
+    for case in cases:
+        content = " ".join(case.get("content", "").split()) or "(空消息)"
+        reason = " ".join(case.get("reason", "").split())
+        decision = _DECISION_NAMES.get(case.get("decision"), case.get("decision"))
+        similarity = case["similarity"]
+        line = f"- 结论 {decision}（相似度 {similarity:.2f}）：{content[:300]}"
+        if reason:
+            line += f"\n  举报原因：{reason[:100]}"
+        if used + len(line) > max_chars:
+            break
+        lines.append(line)
+        used += len(line) + 1
+    return "\n".join(lines)
+
+
 def build_analysis_prompt(
     *,
     reported_message_content: str,
     user_history: list[dict],
     user_info: dict,
     report_reason: str,
+    similar_cases: list[dict] | None = None,
+    similar_cases_max_chars: int = 1200,
+    attachments: list[dict] | None = None,
+    links: list[dict] | None = None,
 ) -> str:
-    """Build prompt for LLM analysis."""
+    """Build prompt for LLM analysis.
+
+    ``similar_cases`` are earlier decided reports from the case index; they
+    are listed as reference only, within ``similar_cases_max_chars``.
+    ``attachments`` are described by name, type, size and dimensions only;
+    ``links`` show where each link redirects and its domains' past reports.
+    """
     history_text = _format_history(user_history)
     roles = ", ".join(user_info.get("roles", [])) or "(无角色)"
+    attachments_text = _format_attachments(attachments or [])
+    attachments_section = (
+        f"[被举报消息附件]（模型无法查看内容）\n{attachments_text}\n\n"
+        if attachments_text
+        else ""
+    )
+    links_text = _format_links(links or [])
+    links_section = f"[链接分析]\n{links_text}\n\n" if links_text else ""
+    cases_text = _format_cases(similar_cases or [], similar_cases_max_chars)
+    cases_section = (
+        "[本社区过往类似案例]（仅供参考，请以本次消息为准）\n"
+        f"{cases_text}\n\n"
+        if cases_text
+        else ""
+    )
 
     return (
         "你是 Discord 频道的内容审核助手，请根据以下信息判断是否需要封禁。\n"
         "输出三种结论之一：BAN / INVALID_REPORT / NEED_GM。\n\n"
         f"[被举报消息]\n{reported_message_content}\n\n"
+        f"{attachments_section}"
+        f"{links_section}"
         f"[举报原因]\n{report_reason}\n\n"
         "[被举报用户信息]\n"
         f"- ID: {user_info.get('id')}\n"
@@ -39,6 +124,7 @@ def build_analysis_prompt(
         f"- 角色: {roles}\n\n"
         "[最近历史消息]\n"
         f"{history_text}\n\n"
+        f"{cases_section}"
         "请给出结论、置信度(0-1)与理由。\n"
         "仅输出 JSON，不要包含其他文字。"
     )
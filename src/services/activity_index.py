@@ -0,0 +1,167 @@
+"""In-memory index of recent messages per user, fed by gateway events.
+
+Reports only see the reported channel through REST, while raiders post the
+same spam across many channels (and guilds). ``on_message`` records every
+guild message here, so report handling can show the LLM a user's recent
+activity everywhere the bot can see without any Discord API calls.
+
+Memory is bounded three ways: messages per user, characters per message and
+messages in total; past the total the least recently active users are
+evicted first.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Any, NamedTuple
+
+import discord
+
+from src.config import get_settings
+
+
+class IndexedMessage(NamedTuple):
+    message_id: int
+    guild_id: int
+    channel_id: int
+    created_at: float
+    content: str
+    channel_name: str | None
+    guild_name: str | None
+
+
+class ActivityIndex:
+    """Recent messages per user with strict size caps."""
+
+    def __init__(
+        self,
+        max_messages: int,
+        per_user: int,
+        max_chars: int,
+        max_age_seconds: float,
+    ) -> None:
+        self.max_messages = max_messages
+        self.per_user = per_user
+        self.max_chars = max_chars
+        self.max_age_seconds = max_age_seconds
+        self.evicted_users = 0
+        self._users: OrderedDict[int, deque[IndexedMessage]] = OrderedDict()
+        self._total = 0
+
+    def __len__(self) -> int:
+        return self._total
+
+    @property
+    def users(self) -> int:
+        return len(self._users)
+
+    def record(self, message: discord.Message) -> None:
+        guild = message.guild
+        if guild is None or message.author.bot or self.per_user <= 0:
+            return
+        entry = IndexedMessage(
+            message.id,
+            guild.id,
+            message.channel.id,
+            message.created_at.timestamp(),
+            (message.content or "")[: self.max_chars],
+            getattr(message.channel, "name", None),
+            getattr(guild, "name", None),
+        )
+        user_id = message.author.id
+        entries = self._users.get(user_id)
+        if entries is None:
+            entries = self._users[user_id] = deque(maxlen=self.per_user)
+        else:
+            self._users.move_to_end(user_id)
+        if len(entries) < self.per_user:
+            self._total += 1
+        entries.append(entry)
+        while self._total > self.max_messages and self._users:
+            _, dropped = self._users.popitem(last=False)
+            self._total -= len(dropped)
+            self.evicted_users += 1
+
+    def recent(
+        self,
+        user_id: int,
+        guild_id: int | None,
+        limit: int,
+    ) -> list[dict[str, Any]]:
+        """Newest-first history items for ``user_id``.
+
+        ``guild_id=None`` returns activity from every guild the bot shares
+        with the user.
+        """
+        entries = self._users.get(user_id)
+        if not entries:
+            return []
+        cutoff = datetime.now(timezone.utc).timestamp() - self.max_age_seconds
+        items = []
+        for entry in reversed(entries):
+            if entry.created_at < cutoff:
+                break
+            if guild_id is not None and entry.guild_id != guild_id:
+                continue
+            items.append(_to_item(user_id, entry, include_guild=guild_id is None))
+            if len(items) >= limit:
+                break
+        return items
+
+
+def _to_item(user_id: int, entry: IndexedMessage, include_guild: bool) -> dict:
+    item = {
+        "id": entry.message_id,
+        "author_id": user_id,
+        "channel_id": entry.channel_id,
+        "content": entry.content,
+        "created_at": datetime.fromtimestamp(
+            entry.created_at, timezone.utc
+        ).isoformat(),
+        "url": (
+            "https://discord.com/channels/"
+            f"{entry.guild_id}/{entry.channel_id}/{entry.message_id}"
+        ),
+        "channel_name": entry.channel_name,
+    }
+    if include_guild:
+        item["guild_name"] = entry.guild_name
+    return item
+
+
+def merge_history(*sources: list[dict[str, Any]], limit: int) -> list[dict]:
+    """Combine history lists newest first, keeping each message once."""
+    seen: set[int] = set()
+    merged = []
+    for item in sorted(
+        (item for source in sources for item in source),
+        key=lambda item: item.get("created_at") or "",
+        reverse=True,
+    ):
+        if item["id"] in seen:
+            continue
+        seen.add(item["id"])
+        merged.append(item)
+        if len(merged) >= limit:
+            break
+    return merged
+
+
+_index: ActivityIndex | None = None
+
+
+def get_activity_index() -> ActivityIndex | None:
+    """Get the index, or None when ``HISTORY_SOURCE=channel``."""
+    global _index
+    settings = get_settings()
+    if settings.history_source == "channel":
+        return None
+    if _index is None:
+        _index = ActivityIndex(
+            max_messages=settings.history_index_max_messages,
+            per_user=settings.history_index_per_user,
+            max_chars=settings.history_index_max_chars,
+            max_age_seconds=settings.history_index_max_age_hours * 3600,
+        )
+    return _index
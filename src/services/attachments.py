@@ -0,0 +1,333 @@
+"""Attachment inspection: perceptual hashes of reported images.
+
+Image spam (QR codes, fake giveaway banners) often comes with little or no
+text, so the content-only verdict cache and the prompt miss it. Reported
+image attachments are downloaded with a size cap, decoded and hashed in a
+worker thread (64-bit pHash and dHash), and looked up in an index of images
+from earlier bans. A repeat is banned without an LLM call; anything else is
+described to the LLM by file name, type, size and dimensions.
+
+Lookups use multi-index hashing: each hash is split into 8 bytes and
+indexed per byte, so two hashes within Hamming distance 7 share at least
+one exact byte and a lookup only compares against that byte's bucket.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import threading
+from collections import defaultdict
+from typing import Any, Iterable, NamedTuple
+
+import aiohttp
+
+from src.config import get_settings
+
+try:  # Optional: without Pillow, attachments are only described.
+    import numpy as np
+    from PIL import Image
+except ImportError:  # pragma: no cover - depends on environment
+    Image = None
+
+_BANDS = 8
+_MAX_PIXELS = 40_000_000
+_IMAGE_TYPES = ("image/png", "image/jpeg", "image/gif", "image/webp", "image/bmp")
+
+
+class ImageHashes(NamedTuple):
+    phash: int
+    dhash: int
+    width: int
+    height: int
+    format: str | None
+
+
+class BannedImage(NamedTuple):
+    report_id: int | None
+    guild_id: int
+    dhash: int
+
+
+def hashing_available() -> bool:
+    return Image is not None
+
+
+def _dct_matrix(size: int) -> Any:
+    k = np.arange(size)
+    matrix = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * size))
+    matrix[0] *= 1 / np.sqrt(2)
+    return matrix * np.sqrt(2 / size)
+
+
+_DCT_32 = _dct_matrix(32) if Image is not None else None
+
+
+def _bits(flags: Any) -> int:
+    return int.from_bytes(np.packbits(flags.ravel()).tobytes(), "big")
+
+
+def phash(image: Image.Image) -> int:
+    """64-bit DCT hash: low frequencies of a 32x32 grayscale thumbnail."""
+    pixels = np.asarray(
+        image.convert("L").resize((32, 32), Image.Resampling.LANCZOS),
+        dtype=np.float64,
+    )
+    low = (_DCT_32 @ pixels @ _DCT_32.T)[:8, :8]
+    # The DC term only reflects overall brightness.
+    median = np.median(low.ravel()[1:])
+    return _bits(low > median)
+
+
+def dhash(image: Image.Image) -> int:
+    """64-bit gradient hash: left-to-right brightness steps on a 9x8 thumbnail."""
+    pixels = np.asarray(
+        image.convert("L").resize((9, 8), Image.Resampling.LANCZOS),
+        dtype=np.int16,
+    )
+    return _bits(pixels[:, 1:] > pixels[:, :-1])
+
+
+def hash_image(data: bytes) -> ImageHashes | None:
+    """Decode ``data`` and hash its first frame; None if it is not an image."""
+    if Image is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            width, height = image.size
+            if width * height > _MAX_PIXELS:
+                return None
+            # JPEGs can decode straight to a reduced size; hashes use 32x32.
+            image.draft("L", (64, 64))
+            image.load()
+            # One resize serves both hashes; reducing_gap box-filters large
+            # images first, which is much faster than plain Lanczos.
+            gray = image.convert("L").resize(
+                (32, 32), Image.Resampling.LANCZOS, reducing_gap=2.0
+            )
+            return ImageHashes(phash(gray), dhash(gray), width, height, image.format)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+
+def hamming(left: int, right: int) -> int:
+    return (left ^ right).bit_count()
+
+
+def to_unsigned(value: int) -> int:
+    """Hash as stored in a signed BIGINT column -> unsigned 64-bit value."""
+    return value + (1 << 64) if value < 0 else value
+
+
+class HammingIndex:
+    """64-bit hashes searchable by Hamming distance up to ``_BANDS - 1``."""
+
+    def __init__(self) -> None:
+        self._bands: list[dict[int, list[int]]] = [
+            defaultdict(list) for _ in range(_BANDS)
+        ]
+        self._values: dict[int, list[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def add(self, key: int, value: Any) -> None:
+        if key in self._values:
+            # Rows this process wrote come back on the next refresh.
+            if value not in self._values[key]:
+                self._values[key].append(value)
+            return
+        self._values[key] = [value]
+        for band, bucket in enumerate(self._bands):
+            bucket[(key >> (band * 8)) & 0xFF].append(key)
+
+    def search(self, key: int, max_distance: int) -> list[tuple[int, int, Any]]:
+        """(distance, stored hash, value) within ``max_distance``, closest first."""
+        max_distance = min(max_distance, _BANDS - 1)
+        seen: set[int] = set()
+        found = []
+        for band, bucket in enumerate(self._bands):
+            for candidate in bucket.get((key >> (band * 8)) & 0xFF, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                distance = hamming(key, candidate)
+                if distance <= max_distance:
+                    found.extend(
+                        (distance, candidate, value)
+                        for value in self._values[candidate]
+                    )
+        found.sort(key=lambda item: item[0])
+        return found
+
+
+class BannedImageIndex:
+    """pHash index of images from banned reports, synced with ``banned_images``."""
+
+    def __init__(self, max_distance: int) -> None:
+        self.max_distance = max_distance
+        self.last_id = 0
+        self._index = HammingIndex()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def add(self, hashes: ImageHashes, guild_id: int, report_id: int | None) -> None:
+        with self._lock:
+            self._index.add(
+                hashes.phash, BannedImage(report_id, guild_id, hashes.dhash)
+            )
+
+    def match(
+        self, hashes: ImageHashes, guild_id: int | None
+    ) -> tuple[BannedImage, int] | None:
+        """Closest banned image whose pHash and dHash are both near ``hashes``.
+
+        ``guild_id=None`` matches images banned in any guild.
+        """
+        with self._lock:
+            found = self._index.search(hashes.phash, self.max_distance)
+        for distance, _, banned in found:
+            if guild_id is not None and banned.guild_id != guild_id:
+                continue
+            if hamming(banned.dhash, hashes.dhash) <= self.max_distance:
+                return banned, distance
+        return None
+
+    def refresh_sync(self) -> int:
+        """Load rows other processes (or earlier runs) added."""
+        from src.database import get_read_session
+        from src.database.repository import ImageHashRepository
+
+        with get_read_session() as session:
+            rows = ImageHashRepository().list_after(session, self.last_id)
+        for row in rows:
+            hashes = ImageHashes(
+                to_unsigned(row.phash), to_unsigned(row.dhash), 0, 0, None
+            )
+            self.add(hashes, row.guild_id, row.report_id)
+            self.last_id = max(self.last_id, row.id)
+        return len(rows)
+
+    def remember_sync(
+        self, images: list[ImageHashes], guild_id: int, report_id: int | None
+    ) -> None:
+        """Persist the images of a banned report and index them."""
+        from src.database import get_session
+        from src.database.repository import ImageHashRepository
+
+        with get_session() as session:
+            ImageHashRepository().add_images(session, images, guild_id, report_id)
+        for hashes in images:
+            self.add(hashes, guild_id, report_id)
+
+
+_http: aiohttp.ClientSession | None = None
+
+
+async def download(url: str, max_bytes: int) -> bytes | None:
+    """Stream ``url`` into memory; None if it fails or exceeds ``max_bytes``."""
+    global _http
+    if _http is None or _http.closed:
+        _http = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15))
+    try:
+        async with _http.get(url) as response:
+            if response.status != 200:
+                return None
+            if (response.content_length or 0) > max_bytes:
+                return None
+            buffer = bytearray()
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                buffer.extend(chunk)
+                if len(buffer) > max_bytes:
+                    return None
+            return bytes(buffer)
+    except (aiohttp.ClientError, TimeoutError) as exc:
+        print(f"[ATTACH] download failed: {type(exc).__name__}: {exc}")
+        return None
+
+
+async def close_http() -> None:
+    global _http
+    if _http is not None:
+        await _http.close()
+        _http = None
+
+
+def _is_image(attachment: Any) -> bool:
+    content_type = (getattr(attachment, "content_type", None) or "").split(";")[0]
+    if content_type:
+        return content_type in _IMAGE_TYPES
+    name = (getattr(attachment, "filename", "") or "").lower()
+    return name.endswith((".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp"))
+
+
+async def inspect_attachments(
+    attachments: Iterable[Any], guild_id: int
+) -> list[dict[str, Any]]:
+    """Describe, and for images hash and match, a message's ``attachments``.
+
+    Each item has ``filename``, ``content_type`` and ``size``; hashed images
+    add ``width``, ``height``, ``phash``, ``dhash`` and, for a repeat of a
+    banned image, ``match_report_id`` and ``match_distance``.
+    """
+    settings = get_settings()
+    index = get_banned_image_index()
+    items = []
+    for attachment in list(attachments)[: settings.attachment_max_count]:
+        item: dict[str, Any] = {
+            "filename": attachment.filename,
+            "content_type": attachment.content_type,
+            "size": attachment.size,
+        }
+        items.append(item)
+        if (
+            Image is None
+            or not _is_image(attachment)
+            or attachment.size > settings.attachment_max_bytes
+        ):
+            continue
+        data = await download(attachment.url, settings.attachment_max_bytes)
+        if data is None:
+            continue
+        hashes = await asyncio.to_thread(hash_image, data)
+        if hashes is None:
+            continue
+        item.update(
+            width=hashes.width,
+            height=hashes.height,
+            phash=f"{hashes.phash:016x}",
+            dhash=f"{hashes.dhash:016x}",
+        )
+        match = index.match(
+            hashes, None if settings.image_match_cross_guild else guild_id
+        )
+        if match is not None:
+            banned, distance = match
+            item.update(match_report_id=banned.report_id, match_distance=distance)
+    return items
+
+
+def item_hashes(item: dict[str, Any]) -> ImageHashes | None:
+    """Hashes recorded on an ``inspect_attachments`` item, if any."""
+    if "phash" not in item:
+        return None
+    return ImageHashes(
+        int(item["phash"], 16),
+        int(item["dhash"], 16),
+        item["width"],
+        item["height"],
+        None,
+    )
+
+
+_index: BannedImageIndex | None = None
+
+
+def get_banned_image_index() -> BannedImageIndex:
+    """Get the process-wide banned image index (filled by ``refresh_sync``)."""
+    global _index
+    if _index is None:
+        _index = BannedImageIndex(get_settings().image_match_max_distance)
+    return _index
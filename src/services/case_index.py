@@ -0,0 +1,340 @@
+"""Index of adjudicated reports for retrieving similar past cases.
+
+Each confidently decided BAN / INVALID_REPORT report is embedded as a hashed
+character n-gram vector (1-3 grams, log term frequency, L2-normalized) and
+kept in ``.npy`` files under ``CASE_INDEX_DIR``:
+
+- ``vectors.npy``   float32 (capacity, dim)
+- ``report_ids.npy`` / ``guild_ids.npy`` int64 (capacity,)
+- ``decisions.npy`` int8 (capacity,)
+- ``state.json``    fill count, next ring slot, highest synced report id
+
+The arrays are memory-mapped on startup, so loading costs nothing until
+queried. Once ``capacity`` cases are stored the oldest slots are reused.
+The index follows ``report_logs`` by id (``sync_sync``); each bot process
+keeps its own copy. Shard processes (``DISCORD_SHARD_IDS``) use a
+subdirectory per shard set, and a process holds an exclusive lock on its
+directory, so a second process writing the same files refuses to open it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from sqlalchemy import select
+
+from src.config import get_settings
+from src.utils.helpers import parse_id_ranges
+
+try:  # Optional: Windows has no flock; one process per directory there.
+    import fcntl
+except ImportError:  # pragma: no cover - depends on platform
+    fcntl = None
+
+DECISIONS = ("BAN", "INVALID_REPORT")
+_DECISION_CODES = {decision: code for code, decision in enumerate(DECISIONS, 1)}
+
+_URL_RE = re.compile(r"https?://([^/\s]+)\S*", re.IGNORECASE)
+_DIGITS_RE = re.compile(r"\d+")
+# Re-read this many ids below the watermark: reports resolve out of order.
+_SYNC_OVERLAP = 1000
+_SYNC_BATCH = 2000
+
+
+def embed(text: str, dim: int) -> np.ndarray:
+    """Hashed 1-3 character n-gram vector of ``text``, L2-normalized."""
+    vector = np.zeros(dim, dtype=np.float32)
+    normalized = " ".join(text.split()).casefold()
+    normalized = _URL_RE.sub(lambda match: match.group(1), normalized)
+    normalized = _DIGITS_RE.sub("0", normalized)
+    if not normalized:
+        return vector
+    counts: dict[int, int] = {}
+    for size in (1, 2, 3):
+        for start in range(len(normalized) - size + 1):
+            key = zlib.crc32(normalized[start : start + size].encode("utf-8"))
+            # The top bit picks the sign so collisions cancel out on average.
+            signed = (key % dim) * (1 if key & 0x80000000 else -1)
+            counts[signed] = counts.get(signed, 0) + 1
+    for signed, count in counts.items():
+        weight = 1.0 + math.log(count)
+        if signed < 0:
+            vector[-signed] -= weight
+        else:
+            vector[signed] += weight
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+class CaseIndex:
+    """Memory-mapped ring buffer of case vectors with brute-force search."""
+
+    def __init__(self, directory: str | Path, dim: int, capacity: int) -> None:
+        self.directory = Path(directory)
+        self.dim = dim
+        self.capacity = capacity
+        self.count = 0
+        self.next_slot = 0
+        self.last_report_id = 0
+        self._known: set[int] = set()
+        self._sync_lock = asyncio.Lock()
+        self._sync_again = False
+        self._sync_task: asyncio.Task[None] | None = None
+        self._open()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _path(self, name: str) -> Path:
+        return self.directory / name
+
+    def _open(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Held until the process exits; the ring cursor is per process.
+        self._lock_fd = os.open(self._path(".lock"), os.O_RDWR | os.O_CREAT)
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(self._lock_fd)
+                raise RuntimeError(
+                    f"{self.directory} is used by another process; "
+                    "give each bot process its own CASE_INDEX_DIR"
+                ) from None
+        state_path = self._path("state.json")
+        state: dict[str, Any] = {}
+        if state_path.exists():
+            state = json.loads(state_path.read_text(encoding="utf-8"))
+        fresh = state.get("dim") != self.dim or state.get("capacity") != self.capacity
+        arrays = {
+            "vectors": (np.float32, (self.capacity, self.dim)),
+            "report_ids": (np.int64, (self.capacity,)),
+            "guild_ids": (np.int64, (self.capacity,)),
+            "decisions": (np.int8, (self.capacity,)),
+        }
+        for name, (dtype, shape) in arrays.items():
+            path = self._path(f"{name}.npy")
+            if fresh or not path.exists():
+                fresh = True
+                array = np.lib.format.open_memmap(
+                    path, mode="w+", dtype=dtype, shape=shape
+                )
+            else:
+                array = np.load(path, mmap_mode="r+")
+            setattr(self, f"_{name}", array)
+        if fresh:
+            # Shape changed or files missing: refill from the database.
+            print(f"[CASES] new index at {self.directory} ({self.capacity} cases)")
+            self._save_state()
+            return
+        self.count = int(state["count"])
+        self.next_slot = int(state["next_slot"])
+        self.last_report_id = int(state["last_report_id"])
+        self._known = set(self._report_ids[: self.count].tolist())
+
+    def _save_state(self) -> None:
+        for name in ("vectors", "report_ids", "guild_ids", "decisions"):
+            getattr(self, f"_{name}").flush()
+        state = {
+            "dim": self.dim,
+            "capacity": self.capacity,
+            "count": self.count,
+            "next_slot": self.next_slot,
+            "last_report_id": self.last_report_id,
+        }
+        tmp = self._path("state.json.tmp")
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp, self._path("state.json"))
+
+    def add(
+        self, report_id: int, guild_id: int | None, text: str, decision: str
+    ) -> bool:
+        """Store one case; return False if it is already indexed or unusable."""
+        code = _DECISION_CODES.get(decision)
+        if code is None or report_id in self._known:
+            return False
+        slot = self.next_slot
+        if self.count == self.capacity:
+            self._known.discard(int(self._report_ids[slot]))
+        self._vectors[slot] = embed(text, self.dim)
+        self._report_ids[slot] = report_id
+        self._guild_ids[slot] = guild_id or 0
+        self._decisions[slot] = code
+        self._known.add(report_id)
+        self.next_slot = (slot + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.last_report_id = max(self.last_report_id, report_id)
+        return True
+
+    def search(
+        self,
+        text: str,
+        k: int,
+        guild_id: int | None = None,
+        min_similarity: float = 0.0,
+        exclude_id: int | None = None,
+    ) -> list[tuple[int, str, float]]:
+        """Top ``k`` (report_id, decision, cosine similarity), best first."""
+        if self.count == 0 or k <= 0:
+            return []
+        query = embed(text, self.dim)
+        scores = self._vectors[: self.count] @ query
+        if guild_id is not None:
+            scores = np.where(self._guild_ids[: self.count] == guild_id, scores, -1.0)
+        if exclude_id is not None:
+            scores = np.where(
+                self._report_ids[: self.count] == exclude_id, -1.0, scores
+            )
+        k = min(k, self.count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (
+                int(self._report_ids[slot]),
+                DECISIONS[int(self._decisions[slot]) - 1],
+                float(scores[slot]),
+            )
+            for slot in top
+            if scores[slot] >= min_similarity
+        ]
+
+    def sync_sync(self) -> int:
+        """Index resolved reports the database has and this index lacks."""
+        from src.database import get_read_session
+        from src.database.models import ReportLog
+
+        min_confidence = get_settings().case_index_min_confidence
+        added = 0
+        after = max(0, self.last_report_id - _SYNC_OVERLAP)
+        if self.count == 0:
+            # Empty index: start from the newest ``capacity`` reports.
+            after = max(0, self._latest_report_id() - self.capacity * 4)
+        while True:
+            with get_read_session() as session:
+                rows = session.execute(
+                    select(
+                        ReportLog.id,
+                        ReportLog.guild_id,
+                        ReportLog.reported_message_content,
+                        ReportLog.llm_decision,
+                    )
+                    .where(
+                        ReportLog.id > after,
+                        ReportLog.resolved_at.is_not(None),
+                        ReportLog.action_success.is_(True),
+                        ReportLog.llm_decision.in_(DECISIONS),
+                        ReportLog.llm_confidence >= min_confidence,
+                    )
+                    .order_by(ReportLog.id)
+                    .limit(_SYNC_BATCH)
+                ).all()
+            for report_id, guild_id, content, decision in rows:
+                added += self.add(report_id, guild_id, content or "", decision)
+            if len(rows) < _SYNC_BATCH:
+                break
+            after = rows[-1][0]
+        if added:
+            self._save_state()
+        return added
+
+    def _latest_report_id(self) -> int:
+        from sqlalchemy import func
+
+        from src.database import get_read_session
+        from src.database.models import ReportLog
+
+        with get_read_session() as session:
+            return int(session.scalar(select(func.max(ReportLog.id))) or 0)
+
+    async def sync(self) -> int:
+        """Run ``sync_sync`` in a thread; calls during a sync coalesce."""
+        if self._sync_lock.locked():
+            self._sync_again = True
+            return 0
+        added = 0
+        async with self._sync_lock:
+            self._sync_again = True
+            while self._sync_again:
+                self._sync_again = False
+                try:
+                    added += await asyncio.to_thread(self.sync_sync)
+                except Exception as exc:  # pragma: no cover
+                    print(f"[CASES] sync failed: {type(exc).__name__}: {exc}")
+                    break
+        return added
+
+    def schedule_sync(self) -> None:
+        """Sync in the background, e.g. right after a report resolves."""
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.create_task(self.sync())
+        else:
+            self._sync_again = True
+
+
+def load_cases_sync(report_ids: list[int]) -> dict[int, dict[str, Any]]:
+    """Content, reason and verdict of the given reports, keyed by id."""
+    from src.database import get_read_session
+    from src.database.models import ReportLog
+
+    if not report_ids:
+        return {}
+    with get_read_session() as session:
+        rows = session.execute(
+            select(
+                ReportLog.id,
+                ReportLog.reported_message_content,
+                ReportLog.report_reason,
+                ReportLog.llm_decision,
+                ReportLog.llm_confidence,
+            ).where(ReportLog.id.in_(report_ids))
+        ).all()
+    return {
+        row.id: {
+            "content": row.reported_message_content or "",
+            "reason": row.report_reason or "",
+            "decision": row.llm_decision,
+            "confidence": row.llm_confidence,
+        }
+        for row in rows
+    }
+
+
+_index: CaseIndex | None = None
+_index_lock = threading.Lock()
+
+
+def case_index_directory() -> Path:
+    """``CASE_INDEX_DIR``, with a subdirectory per shard set."""
+    settings = get_settings()
+    directory = Path(settings.case_index_dir)
+    shard_ids = parse_id_ranges(settings.discord_shard_ids)
+    if shard_ids is not None:
+        directory /= "shards-" + "_".join(str(shard_id) for shard_id in shard_ids)
+    return directory
+
+
+def get_case_index() -> CaseIndex:
+    """Get the process-wide case index, opening its files on first use.
+
+    Called from worker threads, so opening is serialized: two instances
+    would both write the same files.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            settings = get_settings()
+            _index = CaseIndex(
+                case_index_directory(),
+                settings.case_index_dim,
+                settings.case_index_max_cases,
+            )
+        return _index
@@ -6,6 +6,22 @@ from typing import Any
 
 import discord
 
+from src.config import get_settings
+from src.utils.cache import TTLCache
+
+_member_info_cache: TTLCache[tuple[int, int], dict[str, Any]] | None = None
+
+
+def get_member_info_cache() -> TTLCache[tuple[int, int], dict[str, Any]]:
+    """Prompt info of members, keyed by (guild_id, user_id)."""
+    global _member_info_cache
+    if _member_info_cache is None:
+        settings = get_settings()
+        _member_info_cache = TTLCache(
+            settings.member_info_cache_size, settings.member_info_cache_ttl_seconds
+        )
+    return _member_info_cache
+
 
 class DiscordService:
     """Discord API wrapper."""
@@ -26,6 +42,28 @@ class DiscordService:
         except discord.HTTPException:
             return None
 
+    async def get_member_info(
+        self, guild: discord.Guild, user_id: int
+    ) -> dict[str, Any] | None:
+        """Get prompt info of a guild member by ID.
+
+        With the lean member cache discord.py keeps no members, so the info
+        of fetched members is held briefly in a small LRU instead.
+        """
+        member = guild.get_member(user_id)
+        if member:
+            return self.get_user_info(member)
+        cache = get_member_info_cache()
+        info = cache.get((guild.id, user_id))
+        if info is not None:
+            return info
+        member = await self.get_member(guild, user_id)
+        if member is None:
+            return None
+        info = self.get_user_info(member)
+        cache.set((guild.id, user_id), info)
+        return info
+
     def get_user_info(self, member: discord.Member) -> dict[str, Any]:
         """Get user info for prompt building."""
         return {
@@ -40,7 +78,7 @@ class DiscordService:
     async def get_message_history(
         self,
         channel: discord.abc.Messageable,
-        user: discord.abc.User,
+        user: discord.abc.Snowflake,
         limit: int,
         scan_limit: int | None = None,
     ) -> list[dict[str, Any]]:
@@ -56,6 +94,10 @@ class DiscordService:
                 continue
             history_items.append(
                 {
+                    "id": msg.id,
+                    "author_id": msg.author.id,
+                    "channel_id": msg.channel.id,
+                    "channel_name": getattr(msg.channel, "name", None),
                     "content": msg.content,
                     "created_at": msg.created_at.isoformat(),
                     "url": msg.jump_url,
@@ -67,7 +109,10 @@ class DiscordService:
         return history_items
 
     async def send_reply(
-        self, message: discord.Message, content: str, mention_author: bool = True
+        self,
+        message: discord.Message | discord.PartialMessage,
+        content: str,
+        mention_author: bool = True,
     ) -> None:
         """Reply to a message."""
         await message.reply(content, mention_author=mention_author)
@@ -79,11 +124,15 @@ class DiscordService:
         await channel.send(content)
 
     async def ban_member(
-        self, guild: discord.Guild, member: discord.Member, delete_message_days: int
+        self,
+        guild: discord.Guild,
+        member: discord.abc.Snowflake,
+        delete_message_days: int,
     ) -> bool:
-        """Ban a member."""
+        """Ban a member (or any object with its id)."""
         try:
             await guild.ban(member, delete_message_days=delete_message_days)
+            get_member_info_cache().pop((guild.id, member.id))
             return True
         except discord.Forbidden:
             return False
@@ -0,0 +1,152 @@
+"""Per-guild configuration: overrides of the global settings, cached.
+
+``guild_configs`` holds what a guild may set differently from the process
+``Settings`` (GM user and role, history and ban limits, model and cascade
+tier, proactive scanning, rate limits); NULL columns inherit the global
+value. The report path never queries the table: ``GuildConfigStore`` keeps
+every configured guild's resolved ``GuildPolicy`` in memory, and the bot
+calls ``refresh_sync`` every ``GUILD_CONFIG_REFRESH_SECONDS``. A refresh is
+one ``SUM(version)`` query, and the rows are only reloaded when that table
+version has changed, so console edits reach every process within seconds.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import Any
+
+from src.config import get_settings
+
+LLM_TIERS = ("cascade", "large", "small")
+
+
+@dataclass(frozen=True)
+class GuildPolicy:
+    """Effective moderation settings of one guild.
+
+    ``proactive_scan_enabled`` is None unless the guild overrides it; then
+    ``PROACTIVE_SCAN_ENABLED`` and ``PROACTIVE_SCAN_GUILD_IDS`` decide.
+    ``version`` is the guild's row version, 0 for the global defaults.
+    """
+
+    gm_user_id: int
+    gm_role_id: int | None
+    history_message_limit: int
+    ban_delete_days: int
+    llm_model: str
+    llm_tier: str
+    llm_cascade_min_confidence: float
+    proactive_scan_enabled: bool | None
+    proactive_score_threshold: int
+    proactive_max_per_minute: int
+    report_rate_limit_per_minute: int
+    version: int = 0
+
+
+OVERRIDE_FIELDS = tuple(
+    field.name for field in fields(GuildPolicy) if field.name != "version"
+)
+
+
+def _default_values() -> dict[str, Any]:
+    settings = get_settings()
+    return {
+        "gm_user_id": settings.discord_gm_user_id,
+        # Role ids only exist in one guild, so there is no global default.
+        "gm_role_id": None,
+        "history_message_limit": settings.history_message_limit,
+        "ban_delete_days": settings.ban_delete_days,
+        "llm_model": settings.llm_model,
+        "llm_tier": "cascade",
+        "llm_cascade_min_confidence": settings.llm_cascade_min_confidence,
+        "proactive_scan_enabled": None,
+        "proactive_score_threshold": settings.proactive_score_threshold,
+        "proactive_max_per_minute": settings.proactive_max_per_minute,
+        "report_rate_limit_per_minute": settings.report_rate_limit_per_minute,
+    }
+
+
+def resolve_policy(
+    overrides: dict[str, Any] | None = None,
+    version: int = 0,
+    defaults: dict[str, Any] | None = None,
+) -> GuildPolicy:
+    """The global settings with the non-None ``overrides`` applied.
+
+    ``overrides`` maps ``guild_configs`` columns to values; other keys are
+    ignored.
+    """
+    values = dict(defaults or _default_values())
+    if overrides:
+        for name in OVERRIDE_FIELDS:
+            value = overrides.get(name)
+            if value is not None:
+                values[name] = value
+    return GuildPolicy(**values, version=version)
+
+
+class GuildConfigStore:
+    """In-memory policies of every configured guild."""
+
+    def __init__(self) -> None:
+        self.version: int | None = None
+        self.default = resolve_policy()
+        self._policies: dict[int, GuildPolicy] = {}
+        # Guilds that turned proactive scanning on themselves.
+        self.proactive_guilds: frozenset[int] = frozenset()
+
+    def __len__(self) -> int:
+        return len(self._policies)
+
+    def get(self, guild_id: int | None) -> GuildPolicy:
+        """Policy of ``guild_id``; the defaults for unconfigured guilds."""
+        return self._policies.get(guild_id, self.default)
+
+    def load(self, rows: list[Any], version: int) -> None:
+        """Replace every policy with ones resolved from ``guild_configs`` rows."""
+        defaults = _default_values()
+        policies = {}
+        for row in rows:
+            # Zipping the plain row is several times faster than attribute
+            # access on it, which matters with thousands of guilds.
+            values = dict(zip(row._fields, row))
+            policies[values["guild_id"]] = resolve_policy(
+                values, values["version"], defaults
+            )
+        self._policies = policies
+        self.proactive_guilds = frozenset(
+            guild_id
+            for guild_id, policy in policies.items()
+            if policy.proactive_scan_enabled
+        )
+        self.version = version
+
+    def refresh_sync(self) -> bool:
+        """Reload the policies if the table changed; return whether it did."""
+        from src.database import get_read_session
+        from src.database.repository import GuildConfigRepository
+
+        repo = GuildConfigRepository()
+        with get_read_session() as session:
+            version = repo.get_version(session)
+            if version == self.version:
+                return False
+            rows = repo.list_config_rows(session)
+        self.load(rows, version)
+        return True
+
+
+_store: GuildConfigStore | None = None
+
+
+def get_guild_config_store() -> GuildConfigStore:
+    """Get the process-wide guild config store."""
+    global _store
+    if _store is None:
+        _store = GuildConfigStore()
+    return _store
+
+
+def guild_policy(guild_id: int | None) -> GuildPolicy:
+    """Cached policy of ``guild_id``; never touches the database."""
+    return get_guild_config_store().get(guild_id)
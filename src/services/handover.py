@@ -0,0 +1,123 @@
+"""Hand unfinished reports over from a stopping process to the next one.
+
+Railway (like most platforms) stops a deployment with SIGTERM and kills it
+a few seconds later. On SIGTERM the bot drains its report queue
+(``ReportScheduler.drain``): queued reports and reports that arrive during
+the drain are saved to ``pending_reports`` right away, running ones get
+``SHUTDOWN_DRAIN_SECONDS`` to finish and are saved as interrupted if they
+do not. Only ids and the reason are saved; every
+``PENDING_REPORT_RESUME_SECONDS`` the processes serving those guilds take
+the rows and queue the reports, whose workers fetch the messages again.
+Dedupe claims are already held, so resumed reports skip them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+from typing import Any
+
+import discord
+
+from src.services.report_task import ReportTask
+from src.services.scheduler import Pending, get_report_scheduler
+
+
+def pending_report(task: ReportTask) -> Pending:
+    """The ``pending_reports`` row that would resume ``task``."""
+    return {
+        "guild_id": task.guild_id,
+        "channel_id": task.channel_id,
+        "report_message_id": task.report_message_id,
+        "reported_message_id": task.reported_message_id,
+        # Proactive reports have no reporter to rank them by.
+        "reporter_id": 0 if task.proactive else task.reporter_id,
+        "report_reason": task.report_reason,
+        "report_source": task.source,
+        "stage": "queued",
+        "attempts": 0,
+    }
+
+
+def save_pending_sync(records: list[Pending]) -> None:
+    from src.database import get_session
+    from src.database.repository import PendingReportRepository
+
+    with get_session() as session:
+        PendingReportRepository().add_pending(session, records)
+
+
+def _take_pending_sync(guild_ids: list[int]) -> list[Pending]:
+    from src.database import get_session
+    from src.database.repository import PendingReportRepository
+
+    repo = PendingReportRepository()
+    with get_session() as session:
+        if not guild_ids or not repo.has_pending(session):
+            return []
+        return repo.take_pending(session, guild_ids)
+
+
+async def resume_pending_reports(bot: Any) -> int:
+    """Queue the reports other processes left for ``bot``'s guilds.
+
+    The messages are fetched by the queue workers, so a large hand-over is
+    queued at once and resolved with the workers' concurrency.
+    """
+    scheduler = get_report_scheduler()
+    if scheduler.draining:
+        return 0
+    guild_ids = [guild.id for guild in bot.guilds]
+    records = await asyncio.to_thread(_take_pending_sync, guild_ids)
+    for record in records:
+        record.pop("created_at", None)
+        record_id = record.pop("id")
+        await scheduler.submit(
+            record["reporter_id"],
+            functools.partial(_resume_report, bot, record_id, record),
+            pending=record,
+        )
+    return len(records)
+
+
+async def _resume_report(bot: Any, record_id: int, record: Pending) -> None:
+    """Fetch a handed-over report's messages and handle it.
+
+    Reports whose channel or messages are gone are dropped; ones that hit
+    another Discord error are saved again for the next round.
+    """
+    from src.services.moderation_service import handle_report
+
+    try:
+        report_message, reported_message = await _fetch_messages(bot, record)
+    except (discord.NotFound, discord.Forbidden) as exc:
+        print(
+            f"[QUEUE] pending report {record_id} dropped: "
+            f"{type(exc).__name__}: {exc}"
+        )
+        return
+    except discord.HTTPException as exc:
+        print(f"[QUEUE] pending report {record_id} kept: {exc}")
+        await asyncio.to_thread(save_pending_sync, [record])
+        return
+    task = ReportTask.from_messages(
+        report_message,
+        reported_message,
+        record["report_reason"] or "",
+        record["report_source"],
+    )
+    del report_message, reported_message
+    await handle_report(task, bot)
+
+
+async def _fetch_messages(
+    bot: Any, record: Pending
+) -> tuple[discord.Message, discord.Message]:
+    channel = bot.get_channel(record["channel_id"])
+    if channel is None:
+        channel = await bot.fetch_channel(record["channel_id"])
+    report_message = await channel.fetch_message(record["report_message_id"])
+    if record["reported_message_id"] == record["report_message_id"]:
+        return report_message, report_message
+    reported_message = await channel.fetch_message(record["reported_message_id"])
+    return report_message, reported_message
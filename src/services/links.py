@@ -0,0 +1,399 @@
+"""Link analysis: expand redirects and check domains against a reputation store.
+
+Scam links usually hide behind shorteners and trackers, so the LLM only sees
+``bit.ly/...``. For each reported message, ``analyze_links`` follows every
+link's redirect chain by hand (HEAD, falling back to GET, redirects off) on
+one pooled HTTP session, all links in parallel within
+``LINK_BUDGET_MS``. Chains cut off by the budget keep the hops resolved so
+far.
+
+Every domain on a chain is then looked up in ``domain_reputation`` through a
+TTL cache. A domain is bad when a moderator blocked it, or, with
+``LINK_AUTO_BLOCK_MIN_BANS`` set, when that many banned reports and no
+invalid ones linked to it. Parent domains count, so blocking ``scam.xyz``
+also covers ``claim.scam.xyz``.
+
+Links are fetched from the bot's network, so hosts resolving to private,
+loopback or link-local addresses are refused unless
+``LINK_ALLOW_PRIVATE_HOSTS`` is set (for local test servers only). The
+check runs in the session's DNS resolver, on the addresses the connection
+then uses, so a host cannot pass with a public address and be fetched at a
+private one (DNS rebinding).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import re
+import socket
+import time
+from typing import Any, Iterable, NamedTuple
+from urllib.parse import urljoin, urlsplit
+
+import aiohttp
+from aiohttp.abc import AbstractResolver, ResolveResult
+from aiohttp.resolver import DefaultResolver
+
+from src.config import get_settings
+from src.utils.cache import TTLCache
+
+# Full-width punctuation ends a URL: Chinese text rarely puts a space after one.
+_URL_RE = re.compile(r"https?://[^\s<>\"'`|，。！？、；：（）【】「」]+", re.IGNORECASE)
+_TRAILING = ".,;:!?)]}>，。！？）】」"
+_REDIRECTS = {301, 302, 303, 307, 308}
+
+# Never counted toward reputation: they front every kind of link.
+SHORTENERS = frozenset(
+    {
+        "bit.ly",
+        "cutt.ly",
+        "goo.gl",
+        "is.gd",
+        "ow.ly",
+        "rb.gy",
+        "s.id",
+        "shorturl.at",
+        "t.co",
+        "t.ly",
+        "tiny.cc",
+        "tinyurl.com",
+    }
+)
+
+
+class LinkResult(NamedTuple):
+    url: str
+    chain: tuple[str, ...]  # every URL visited after ``url``
+    complete: bool  # False when cut off by the budget, an error or max hops
+    error: str | None
+
+    @property
+    def final_url(self) -> str:
+        return self.chain[-1] if self.chain else self.url
+
+    @property
+    def domains(self) -> list[str]:
+        seen = []
+        for url in (self.url, *self.chain):
+            domain = normalize_domain(url)
+            if domain and domain not in seen:
+                seen.append(domain)
+        return seen
+
+
+class BlockedHostError(Exception):
+    """The link points at a private or otherwise unreachable address."""
+
+
+def extract_urls(content: str | None, limit: int) -> list[str]:
+    """Distinct http(s) URLs in ``content``, in order of appearance."""
+    urls: list[str] = []
+    for match in _URL_RE.finditer(content or ""):
+        url = match.group(0).rstrip(_TRAILING)
+        if url not in urls:
+            urls.append(url)
+            if len(urls) >= limit:
+                break
+    return urls
+
+
+def normalize_domain(url_or_host: str) -> str | None:
+    """Lower-case host without ``www.``, IDNA-encoded; None if there is none."""
+    host = url_or_host
+    if "://" in url_or_host:
+        try:
+            host = urlsplit(url_or_host).hostname or ""
+        except ValueError:
+            return None
+    host = host.strip().rstrip(".").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if not host:
+        return None
+    try:
+        return host.encode("idna").decode("ascii")
+    except UnicodeError:
+        return host
+
+
+def parent_domains(domain: str) -> list[str]:
+    """``a.b.example.com`` -> itself, ``b.example.com``, ``example.com``."""
+    labels = domain.split(".")
+    if len(labels) < 2:
+        return [domain]
+    return [".".join(labels[index:]) for index in range(len(labels) - 1)]
+
+
+def _check_address(host: str) -> None:
+    """Refuse a literal non-global IP; aiohttp does not resolve those."""
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return
+    if not address.is_global:
+        raise BlockedHostError(f"{host} is not a public address")
+
+
+class PublicResolver(AbstractResolver):
+    """aiohttp's default resolver, refusing hosts with non-global addresses."""
+
+    def __init__(self) -> None:
+        self._resolver = DefaultResolver()
+
+    async def resolve(
+        self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET
+    ) -> list[ResolveResult]:
+        results = await self._resolver.resolve(host, port, family)
+        for result in results:
+            address = ipaddress.ip_address(result["host"])
+            if not address.is_global:
+                raise BlockedHostError(f"{host} resolves to {address}")
+        return results
+
+    async def close(self) -> None:
+        await self._resolver.close()
+
+
+class LinkResolver:
+    """Follow redirect chains on one pooled session, with a result cache."""
+
+    def __init__(
+        self,
+        max_redirects: int,
+        hop_timeout: float,
+        cache_seconds: float,
+        allow_private: bool,
+    ) -> None:
+        self.max_redirects = max_redirects
+        self.hop_timeout = hop_timeout
+        self.allow_private = allow_private
+        self.cache: TTLCache[str, LinkResult] = TTLCache(
+            maxsize=10_000, ttl=cache_seconds
+        )
+        self._session: aiohttp.ClientSession | None = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            resolver = None if self.allow_private else PublicResolver()
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=64, ttl_dns_cache=300, resolver=resolver
+                ),
+                headers={"User-Agent": "Mozilla/5.0 (compatible; LLMGuardLinkCheck)"},
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _next_hop(self, url: str) -> str | None:
+        """Redirect target of ``url``, or None if it does not redirect."""
+        session = self._get_session()
+        timeout = aiohttp.ClientTimeout(total=self.hop_timeout)
+        for method in ("HEAD", "GET"):
+            async with session.request(
+                method, url, allow_redirects=False, timeout=timeout
+            ) as response:
+                # Some shorteners reject HEAD; only their GET redirects.
+                if method == "HEAD" and response.status in (403, 405, 501):
+                    continue
+                if response.status in _REDIRECTS and "Location" in response.headers:
+                    return urljoin(url, response.headers["Location"])
+                return None
+        return None
+
+    async def resolve(self, url: str, chain: list[str]) -> LinkResult:
+        """Follow ``url``; hops are appended to ``chain`` as they resolve."""
+        cached = self.cache.get(url)
+        if cached is not None:
+            chain.extend(cached.chain)
+            return cached
+        current = url
+        error = None
+        complete = False
+        cacheable = True
+        try:
+            for _ in range(self.max_redirects + 1):
+                parts = urlsplit(current)
+                if parts.scheme not in ("http", "https") or not parts.hostname:
+                    complete = True
+                    break
+                if not self.allow_private:
+                    _check_address(parts.hostname)
+                target = await self._next_hop(current)
+                if target is None:
+                    complete = True
+                    break
+                chain.append(target)
+                current = target
+            else:
+                error = "too many redirects"
+        except BlockedHostError as exc:
+            error = str(exc)
+        except (aiohttp.ClientError, TimeoutError, ValueError) as exc:
+            error = type(exc).__name__
+            # Network errors may be transient; refused hosts are not.
+            cacheable = False
+        result = LinkResult(url, tuple(chain), complete, error)
+        if cacheable:
+            self.cache.set(url, result)
+        return result
+
+    async def resolve_all(self, urls: list[str], budget: float) -> list[LinkResult]:
+        """Resolve ``urls`` concurrently; unfinished ones are cut at ``budget``."""
+        if not urls:
+            return []
+        chains: list[list[str]] = [[] for _ in urls]
+        tasks = [
+            asyncio.create_task(self.resolve(url, chain))
+            for url, chain in zip(urls, chains)
+        ]
+        done, pending = await asyncio.wait(tasks, timeout=budget)
+        for task in pending:
+            task.cancel()
+        results = []
+        for url, chain, task in zip(urls, chains, tasks):
+            if task in done and task.exception() is None:
+                results.append(task.result())
+            else:
+                results.append(LinkResult(url, tuple(chain), False, "budget exceeded"))
+        return results
+
+
+class DomainReputationStore:
+    """TTL-cached view of ``domain_reputation``."""
+
+    def __init__(self, cache_seconds: float, auto_block_min_bans: int) -> None:
+        self.auto_block_min_bans = auto_block_min_bans
+        self.cache: TTLCache[str, tuple[str | None, int, int]] = TTLCache(
+            maxsize=50_000, ttl=cache_seconds
+        )
+
+    def lookup_sync(self, domains: Iterable[str]) -> dict[str, tuple]:
+        """(status, ban_count, invalid_count) for each domain and its parents."""
+        from src.database import get_read_session
+        from src.database.repository import DomainRepository
+
+        wanted = {parent for domain in domains for parent in parent_domains(domain)}
+        found: dict[str, tuple] = {}
+        missing = []
+        for domain in wanted:
+            cached = self.cache.get(domain)
+            if cached is None:
+                missing.append(domain)
+            else:
+                found[domain] = cached
+        if missing:
+            with get_read_session() as session:
+                rows = DomainRepository().get_domains(session, missing)
+            loaded = {
+                row.domain: (row.status, row.ban_count, row.invalid_count)
+                for row in rows
+            }
+            for domain in missing:
+                # Unknown domains are cached too; most links are unknown.
+                entry = loaded.get(domain, (None, 0, 0))
+                self.cache.set(domain, entry)
+                found[domain] = entry
+        return found
+
+    def verdict(self, domain: str, known: dict[str, tuple]) -> str | None:
+        """Return "block", "allow" or None for ``domain``, nearest parent first."""
+        for parent in parent_domains(domain):
+            status, bans, invalid = known.get(parent, (None, 0, 0))
+            if status in ("block", "allow"):
+                return status
+            if (
+                self.auto_block_min_bans > 0
+                and bans >= self.auto_block_min_bans
+                and invalid == 0
+            ):
+                return "block"
+        return None
+
+    def record_sync(self, domains: Iterable[str], decision: str) -> None:
+        from src.database import get_session
+        from src.database.repository import DomainRepository
+
+        domains = [domain for domain in domains if domain not in SHORTENERS]
+        if not domains:
+            return
+        with get_session() as session:
+            DomainRepository().record_outcome(session, domains, decision)
+        for domain in domains:
+            self.cache.pop(domain)
+
+
+async def analyze_links(content: str | None) -> list[dict[str, Any]]:
+    """Expanded links in ``content`` with the reputation of their domains.
+
+    Each item has ``url``, ``final_url``, ``hops``, ``complete``, ``error``,
+    ``domains`` and, for the first bad domain on the chain,
+    ``blocked_domain``. An allowed domain clears the chain.
+    """
+    settings = get_settings()
+    urls = extract_urls(content, settings.link_max_urls)
+    if not urls:
+        return []
+    started = time.monotonic()
+    results = await get_link_resolver().resolve_all(
+        urls, settings.link_budget_ms / 1000
+    )
+    store = get_domain_store()
+    all_domains = {domain for result in results for domain in result.domains}
+    known = await asyncio.to_thread(store.lookup_sync, all_domains)
+    items = []
+    for result in results:
+        item: dict[str, Any] = {
+            "url": result.url,
+            "final_url": result.final_url,
+            "hops": len(result.chain),
+            "complete": result.complete,
+            "error": result.error,
+            "domains": result.domains,
+        }
+        verdicts = [(domain, store.verdict(domain, known)) for domain in result.domains]
+        if not any(verdict == "allow" for _, verdict in verdicts):
+            blocked = [domain for domain, verdict in verdicts if verdict == "block"]
+            if blocked:
+                item["blocked_domain"] = blocked[0]
+        item["history"] = {
+            domain: {"bans": known[domain][1], "invalid": known[domain][2]}
+            for domain in result.domains
+            if domain in known and (known[domain][1] or known[domain][2])
+        }
+        items.append(item)
+    elapsed = (time.monotonic() - started) * 1000
+    if elapsed > settings.link_budget_ms * 1.5:
+        print(f"[LINKS] analysis took {elapsed:.0f} ms for {len(urls)} links")
+    return items
+
+
+_resolver: LinkResolver | None = None
+_store: DomainReputationStore | None = None
+
+
+def get_link_resolver() -> LinkResolver:
+    global _resolver
+    if _resolver is None:
+        settings = get_settings()
+        _resolver = LinkResolver(
+            max_redirects=settings.link_max_redirects,
+            hop_timeout=settings.link_budget_ms / 1000,
+            cache_seconds=settings.link_cache_seconds,
+            allow_private=settings.link_allow_private_hosts,
+        )
+    return _resolver
+
+
+def get_domain_store() -> DomainReputationStore:
+    global _store
+    if _store is None:
+        settings = get_settings()
+        _store = DomainReputationStore(
+            settings.domain_cache_seconds, settings.link_auto_block_min_bans
+        )
+    return _store
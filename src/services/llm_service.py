@@ -4,13 +4,16 @@ from __future__ import annotations
 
 import json
 import os
-from dataclasses import dataclass
+import re
+import time
+from dataclasses import dataclass, replace
 from enum import Enum
-
-from openai import AsyncOpenAI
+from typing import Any
 
 from src.config import get_settings
 
+_JSON_TOKEN_RE = re.compile(r'[{}"\\]')
+
 
 class LLMDecisionType(str, Enum):
     """Decision types returned by LLM."""
@@ -20,28 +23,96 @@ class LLMDecisionType(str, Enum):
     NEED_GM = "NEED_GM"
 
 
+@dataclass(frozen=True)
+class LLMCall:
+    """Cost of one chat completion."""
+
+    tier: str
+    model: str
+    tokens: int | None
+    latency_ms: float
+
+
 @dataclass(frozen=True)
 class LLMDecision:
-    """LLM analysis result."""
+    """LLM analysis result.
+
+    ``tier`` is the cascade tier that decided ("small" or "large"), "cache"
+    for a reused verdict, "image" for a repeat of a banned image or "link"
+    for a link to a blocked domain;
+    ``calls`` lists every completion made.
+    """
 
     decision: LLMDecisionType
     confidence: float
     reasoning: str
+    tier: str | None = None
+    calls: tuple[LLMCall, ...] = ()
 
 
-class LLMService:
-    """LLM service using OpenAI-compatible API."""
+_client: Any = None
+
+
+def _get_client() -> Any:
+    """Shared client, so reports reuse one HTTP connection pool."""
+    global _client
+    if _client is None:
+        # Imported here: openai is the slowest import in the bot and is not
+        # needed until the first report.
+        from openai import AsyncOpenAI
 
-    def __init__(self) -> None:
         settings = get_settings()
-        self._model = settings.llm_model
-        self._client = AsyncOpenAI(
+        _client = AsyncOpenAI(
             api_key=settings.llm_api_key,
             base_url=settings.llm_base_url,
         )
+    return _client
 
-    async def analyze_report(self, prompt: str) -> LLMDecision:
-        """Analyze report and return a decision."""
+
+class LLMService:
+    """LLM service using OpenAI-compatible API.
+
+    With ``LLM_SMALL_MODEL`` set, reports go to that model first and only
+    escalate to ``LLM_MODEL`` on NEED_GM or a confidence below
+    ``LLM_CASCADE_MIN_CONFIDENCE``.
+    """
+
+    def __init__(self) -> None:
+        settings = get_settings()
+        self._model = settings.llm_model
+        self._small_model = settings.llm_small_model
+        self._min_confidence = settings.llm_cascade_min_confidence
+        self._client = _get_client()
+
+    async def analyze_report(
+        self,
+        prompt: str,
+        *,
+        model: str | None = None,
+        tier: str = "cascade",
+        min_confidence: float | None = None,
+    ) -> LLMDecision:
+        """Analyze report and return a decision.
+
+        ``model``, ``tier`` and ``min_confidence`` are a guild's overrides:
+        ``tier="large"`` skips the small model and ``tier="small"`` never
+        escalates from it. Without ``LLM_SMALL_MODEL`` every tier is large.
+        """
+        model = model or self._model
+        if min_confidence is None:
+            min_confidence = self._min_confidence
+        if not self._small_model or tier == "large":
+            return await self._complete("large", model, prompt)
+        small = await self._complete("small", self._small_model, prompt)
+        if tier == "small" or (
+            small.decision != LLMDecisionType.NEED_GM
+            and small.confidence >= min_confidence
+        ):
+            return small
+        large = await self._complete("large", model, prompt)
+        return replace(large, calls=small.calls + large.calls)
+
+    async def _complete(self, tier: str, model: str, prompt: str) -> LLMDecision:
         system_prompt = (
             "你是 Discord 频道的内容审核助手。"
             "请只输出 JSON，不要包含多余文字。"
@@ -51,9 +122,10 @@ class LLMService:
             "字段名必须使用 decision/confidence/reasoning。"
         )
 
+        started = time.perf_counter()
         try:
             response = await self._client.chat.completions.create(
-                model=self._model,
+                model=model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": prompt},
@@ -64,7 +136,7 @@ class LLMService:
         except Exception:
             try:
                 response = await self._client.chat.completions.create(
-                    model=self._model,
+                    model=model,
                     messages=[
                         {"role": "system", "content": system_prompt},
                         {"role": "user", "content": prompt},
@@ -72,16 +144,36 @@ class LLMService:
                     temperature=0.2,
                 )
             except Exception as exc:  # pragma: no cover - network/runtime errors
+                call = LLMCall(tier, model, None, _elapsed_ms(started))
                 return LLMDecision(
                     decision=LLMDecisionType.NEED_GM,
                     confidence=0.0,
                     reasoning=f"LLM 调用失败：{type(exc).__name__}",
+                    tier=tier,
+                    calls=(call,),
                 )
 
+        usage = getattr(response, "usage", None)
+        call = LLMCall(
+            tier, model, getattr(usage, "total_tokens", None), _elapsed_ms(started)
+        )
         content = response.choices[0].message.content or ""
         if os.getenv("LLM_DEBUG_RAW"):
             print(f"[LLM_RAW] {content}")
-        return _parse_llm_response(content)
+        return replace(_parse_llm_response(content), tier=tier, calls=(call,))
+
+
+def _elapsed_ms(started: float) -> float:
+    return (time.perf_counter() - started) * 1000
+
+
+def tier_usage(result: LLMDecision) -> dict[str, int | float | None]:
+    """Per-tier token and latency columns for ``ReportLog``."""
+    usage: dict[str, int | float | None] = {}
+    for call in result.calls:
+        usage[f"llm_{call.tier}_tokens"] = call.tokens
+        usage[f"llm_{call.tier}_latency_ms"] = call.latency_ms
+    return usage
 
 
 def _parse_llm_response(content: str) -> LLMDecision:
@@ -146,16 +238,19 @@ def _extract_first_json_object(content: str) -> str | None:
     if start == -1:
         return None
 
+    # Jump between structural characters only; long reasoning text is skipped
+    # by the regex engine instead of a per-character Python loop.
     depth = 0
     in_string = False
-    escape = False
-    for idx in range(start, len(content)):
+    escaped_at = -1
+    for match in _JSON_TOKEN_RE.finditer(content, start):
+        idx = match.start()
+        if idx == escaped_at:
+            continue
         ch = content[idx]
         if in_string:
-            if escape:
-                escape = False
-            elif ch == "\\":
-                escape = True
+            if ch == "\\":
+                escaped_at = idx + 1
             elif ch == '"':
                 in_string = False
         else:
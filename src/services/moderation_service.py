@@ -3,96 +3,394 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import json
+from typing import Any
+
 import discord
 
 from src.config import get_settings
 from src.database import get_session
 from src.database.models import ReportLog
-from src.database.repository import ReportRepository
+from src.database.repository import (
+    MessageRepository,
+    ReportRepository,
+    RollupRepository,
+)
 from src.prompts.templates import build_analysis_prompt
+from src.services.activity_index import get_activity_index, merge_history
+from src.services.attachments import (
+    get_banned_image_index,
+    inspect_attachments,
+    item_hashes,
+)
 from src.services.discord_service import DiscordService
-from src.services.llm_service import LLMDecisionType, LLMService
+from src.services.guild_config import GuildPolicy, guild_policy
+from src.services.links import analyze_links, get_domain_store
+from src.services.llm_service import (
+    LLMDecision,
+    LLMDecisionType,
+    LLMService,
+    tier_usage,
+)
+from src.services.proactive import remember_spam
+from src.services.report_task import ReportTask
+from src.services.reputation import get_reputation_tracker
+from src.services.state_backend import StateBackend, get_state_backend
+from src.utils.timing import stage
 
 
-async def handle_report(
-    *,
-    report_message: discord.Message,
-    reported_message: discord.Message,
-    report_reason: str,
-) -> None:
-    """Handle a user report."""
+async def handle_report(task: ReportTask, client: discord.Client) -> None:
+    """Handle a report.
+
+    ``client`` resolves the guild and channel from the task's ids; no
+    ``discord.Message`` or ``Member`` is held while the report is analyzed.
+    Proactive tasks come from the scanner; there is no reporter to answer,
+    so only bans and GM reviews are announced in the channel.
+    """
+    proactive = task.proactive
     settings = get_settings()
     discord_service = DiscordService()
     llm_service = LLMService()
     report_repo = ReportRepository()
     report_id: int | None = None
 
-    if report_message.guild is None:
-        await discord_service.send_reply(report_message, "❌ 仅支持服务器内举报。")
+    guild = client.get_guild(task.guild_id)
+    if guild is None:
+        print(f"[QUEUE] report skipped: guild {task.guild_id} is not available")
         return
+    channel = task.channel(client)
+    policy = guild_policy(task.guild_id)
 
-    reported_member = await discord_service.get_member(
-        report_message.guild, reported_message.author.id
-    )
-    if reported_member is None:
-        await discord_service.send_reply(report_message, "❌ 无法找到被举报用户。")
+    with stage("member"):
+        # Only the prompt's user-info dict is kept, not the ``Member``.
+        user_info = await discord_service.get_member_info(
+            guild, task.reported_user_id
+        )
+    if user_info is None:
+        if not proactive:
+            await _reply(discord_service, channel, task, "❌ 无法找到被举报用户。")
         return
 
-    user_info = discord_service.get_user_info(reported_member)
-    user_history = await discord_service.get_message_history(
-        report_message.channel,
-        reported_member,
-        limit=settings.history_message_limit,
+    state = get_state_backend()
+    # The same text with different images is not the same message, and a
+    # verdict is only reused for the member it was reached for. Scanner
+    # escalations have no human report behind them, so they always get
+    # the full analysis.
+    cache_key = (
+        None
+        if task.attachments or proactive
+        else _verdict_cache_key(task.guild_id, task.reported_user_id, task.content)
     )
+    with stage("cache"):
+        cached = await _get_cached_verdict(state, cache_key)
 
-    prompt = build_analysis_prompt(
-        reported_message_content=reported_message.content,
-        user_history=user_history,
-        user_info=user_info,
-        report_reason=report_reason,
-    )
+    user_history: list[dict] = []
+    attachments: list[dict] = []
+    links: list[dict] = []
+    prompt = ""
+    if cached is None:
+        user_history, attachments, links, prompt = await _collect_evidence(
+            discord_service, task, channel, policy, user_info
+        )
 
     try:
-        report_id = await asyncio.to_thread(
-            _create_report_sync,
-            report_repo,
-            report_message,
-            reported_member,
-            reported_message,
-            report_reason,
-            user_history,
-        )
+        with stage("db_create"):
+            report_id = await asyncio.to_thread(
+                _create_report_sync,
+                report_repo,
+                task,
+                user_info["name"],
+                user_history,
+                attachments,
+            )
     except Exception as exc:  # pragma: no cover
         print(f"[DB] create_report failed: {type(exc).__name__}: {exc}")
 
-    llm_result = await llm_service.analyze_report(prompt)
+    image_match = next(
+        (item for item in attachments if "match_report_id" in item), None
+    )
+    blocked_link = next((item for item in links if "blocked_domain" in item), None)
+    with stage("llm"):
+        if cached is not None:
+            llm_result = cached
+        elif image_match is not None:
+            llm_result = _image_match_verdict(image_match)
+        elif blocked_link is not None:
+            llm_result = _blocked_link_verdict(blocked_link)
+        else:
+            llm_result = await llm_service.analyze_report(
+                prompt,
+                model=policy.llm_model,
+                tier=policy.llm_tier,
+                min_confidence=policy.llm_cascade_min_confidence,
+            )
+            await _cache_verdict(state, cache_key, llm_result)
     if report_id is not None:
         try:
-            await asyncio.to_thread(
-                _update_llm_result_sync,
-                report_repo,
-                report_id,
-                llm_result.decision.value,
-                llm_result.confidence,
-                llm_result.reasoning,
-            )
+            with stage("db_update"):
+                await asyncio.to_thread(
+                    _update_llm_result_sync,
+                    report_repo,
+                    report_id,
+                    llm_result.decision.value,
+                    llm_result.confidence,
+                    llm_result.reasoning,
+                    llm_result.tier,
+                    tier_usage(llm_result),
+                )
         except Exception as exc:  # pragma: no cover
             print(f"[DB] update_llm_result failed: {type(exc).__name__}: {exc}")
 
+    with stage("action"):
+        await _execute_decision(
+            discord_service,
+            report_repo,
+            report_id,
+            task,
+            guild,
+            channel,
+            llm_result,
+            policy,
+        )
+    if llm_result.decision == LLMDecisionType.BAN:
+        remember_spam(task.content)
+        if attachments and _trusted_ban(llm_result):
+            await _remember_images(task.guild_id, report_id, attachments)
+    if links and llm_result.decision != LLMDecisionType.NEED_GM:
+        await _record_link_outcome(links, llm_result.decision.value)
+    if settings.case_retrieval_enabled and report_id is not None:
+        from src.services.case_index import get_case_index
+
+        try:
+            get_case_index().schedule_sync()
+        except Exception as exc:  # pragma: no cover
+            print(f"[CASES] sync skipped: {type(exc).__name__}: {exc}")
+    if not proactive:
+        get_reputation_tracker().record(task.reporter_id, llm_result.decision.value)
+
+
+async def _reply(
+    discord_service: DiscordService, channel: Any, task: ReportTask, content: str
+) -> None:
+    """Reply to the report message without fetching it."""
+    await discord_service.send_reply(
+        channel.get_partial_message(task.report_message_id), content
+    )
+
+
+async def _collect_evidence(
+    discord_service: DiscordService,
+    task: ReportTask,
+    channel: Any,
+    policy: GuildPolicy,
+    user_info: dict,
+) -> tuple[list[dict], list[dict], list[dict], str]:
+    """History, attachments, links and the prompt for an uncached report."""
+    settings = get_settings()
+    with stage("history"):
+        user_history = await _collect_history(
+            discord_service, task, channel, policy.history_message_limit
+        )
+
+    attachments: list[dict] = []
+    if settings.attachment_scan_enabled and task.attachments:
+        with stage("attachments"):
+            attachments = await _inspect_attachments(task)
+
+    links: list[dict] = []
+    if settings.link_analysis_enabled and task.content:
+        with stage("links"):
+            links = await _analyze_links(task.content)
+
+    similar_cases: list[dict] = []
+    if settings.case_retrieval_enabled:
+        with stage("cases"):
+            similar_cases = await _find_similar_cases(task.guild_id, task.content)
+
+    with stage("prompt"):
+        prompt = build_analysis_prompt(
+            reported_message_content=task.content,
+            user_history=user_history,
+            user_info=user_info,
+            report_reason=task.report_reason,
+            similar_cases=similar_cases,
+            similar_cases_max_chars=settings.case_retrieval_max_chars,
+            attachments=attachments,
+            links=links,
+        )
+    return user_history, attachments, links, prompt
+
+
+async def _collect_history(
+    discord_service: DiscordService,
+    task: ReportTask,
+    channel: Any,
+    limit: int,
+) -> list[dict]:
+    """Recent messages by the reported member, newest first.
+
+    The activity index adds what the member posted in other channels (and,
+    with ``HISTORY_INDEX_CROSS_GUILD``, other guilds) at no API cost;
+    ``HISTORY_SOURCE=index`` skips the REST scan of the report channel.
+    """
+    settings = get_settings()
+    index = get_activity_index()
+    indexed: list[dict] = []
+    if index is not None:
+        cross_guild = settings.history_index_cross_guild
+        guild_id = None if cross_guild else task.guild_id
+        indexed = index.recent(task.reported_user_id, guild_id, limit)
+        if settings.history_source == "index":
+            return indexed
+    channel_history = await discord_service.get_message_history(
+        channel, discord.Object(id=task.reported_user_id), limit=limit
+    )
+    if not indexed:
+        return channel_history
+    return merge_history(indexed, channel_history, limit=limit)
+
+
+async def _inspect_attachments(task: ReportTask) -> list[dict]:
+    try:
+        return await inspect_attachments(task.attachments, task.guild_id)
+    except Exception as exc:  # pragma: no cover
+        print(f"[ATTACH] inspection failed: {type(exc).__name__}: {exc}")
+        return []
+
+
+def _image_match_verdict(item: dict) -> LLMDecision:
+    """Ban a repeat of an image from an earlier ban without asking the LLM."""
+    return LLMDecision(
+        decision=LLMDecisionType.BAN,
+        confidence=1.0,
+        reasoning=(
+            f"附件 {item['filename']} 与已封禁举报 #{item['match_report_id']} "
+            f"中的图片相同（感知哈希距离 {item['match_distance']}）。"
+        ),
+        tier="image",
+    )
+
+
+def _trusted_ban(result: LLMDecision) -> bool:
+    """Whether a ban may make its images auto-ban triggers.
+
+    A later match is banned without the LLM, so only confident verdicts of
+    the large model count; cached, link, image and small-model bans do not.
+    """
+    return (
+        result.tier == "large"
+        and result.confidence >= get_settings().image_autoban_min_confidence
+    )
+
+
+async def _remember_images(
+    guild_id: int, report_id: int | None, attachments: list[dict]
+) -> None:
+    images = [
+        hashes
+        for item in attachments
+        if "match_report_id" not in item and (hashes := item_hashes(item)) is not None
+    ]
+    if not images:
+        return
+    try:
+        await asyncio.to_thread(
+            get_banned_image_index().remember_sync, images, guild_id, report_id
+        )
+    except Exception as exc:  # pragma: no cover
+        print(f"[DB] remember images failed: {type(exc).__name__}: {exc}")
+
+
+async def _analyze_links(content: str) -> list[dict]:
+    try:
+        return await analyze_links(content)
+    except Exception as exc:  # pragma: no cover
+        print(f"[LINKS] analysis failed: {type(exc).__name__}: {exc}")
+        return []
+
+
+def _blocked_link_verdict(item: dict) -> LLMDecision:
+    """Ban a link to a known-bad domain without asking the LLM."""
+    return LLMDecision(
+        decision=LLMDecisionType.BAN,
+        confidence=1.0,
+        reasoning=(
+            f"链接 {item['url']} 指向已列入黑名单的域名 {item['blocked_domain']}。"
+        ),
+        tier="link",
+    )
+
+
+async def _record_link_outcome(links: list[dict], decision: str) -> None:
+    domains = {domain for item in links for domain in item["domains"]}
+    try:
+        await asyncio.to_thread(get_domain_store().record_sync, domains, decision)
+    except Exception as exc:  # pragma: no cover
+        print(f"[DB] record link outcome failed: {type(exc).__name__}: {exc}")
+
+
+async def _find_similar_cases(guild_id: int, content: str | None) -> list[dict]:
+    """Most similar decided reports for the prompt; empty on any failure."""
+    if not content or not content.strip():
+        return []
+    try:
+        return await asyncio.to_thread(_find_similar_cases_sync, guild_id, content)
+    except Exception as exc:  # pragma: no cover
+        print(f"[CASES] lookup failed: {type(exc).__name__}: {exc}")
+        return []
+
+
+def _find_similar_cases_sync(guild_id: int, content: str) -> list[dict]:
+    # Imported here so numpy is only loaded when retrieval is enabled.
+    from src.services.case_index import get_case_index, load_cases_sync
+
+    settings = get_settings()
+    hits = get_case_index().search(
+        content,
+        settings.case_retrieval_top_k,
+        guild_id=None if settings.case_retrieval_cross_guild else guild_id,
+        min_similarity=settings.case_retrieval_min_similarity,
+    )
+    cases = load_cases_sync([report_id for report_id, _, _ in hits])
+    return [
+        {**cases[report_id], "decision": decision, "similarity": similarity}
+        for report_id, decision, similarity in hits
+        if report_id in cases
+    ]
+
+
+async def _execute_decision(
+    discord_service: DiscordService,
+    report_repo: ReportRepository,
+    report_id: int | None,
+    task: ReportTask,
+    guild: discord.Guild,
+    channel: Any,
+    llm_result: LLMDecision,
+    policy: GuildPolicy,
+) -> None:
+    reported_mention = f"<@{task.reported_user_id}>"
     if llm_result.decision == LLMDecisionType.BAN:
         success = await discord_service.ban_member(
-            report_message.guild, reported_member, settings.ban_delete_days
+            guild, discord.Object(id=task.reported_user_id), policy.ban_delete_days
         )
-        if success:
-            await discord_service.send_reply(
-                report_message,
-                f"✅ 已封禁用户 {reported_member.mention}。",
+        if task.proactive:
+            # The scanned message is deleted with the ban; post in the channel.
+            if success:
+                try:
+                    await discord_service.send_channel_message(
+                        channel, f"🛡️ 自动扫描已封禁用户 {reported_mention}。"
+                    )
+                except discord.HTTPException as exc:  # pragma: no cover
+                    print(f"[SCAN] ban notice failed: {exc}")
+        elif success:
+            await _reply(
+                discord_service, channel, task, f"✅ 已封禁用户 {reported_mention}。"
             )
         else:
-            await discord_service.send_reply(
-                report_message,
-                "❌ 封禁失败，请检查 Bot 权限。",
+            await _reply(
+                discord_service, channel, task, "❌ 封禁失败，请检查 Bot 权限。"
             )
         await _update_action_log(
             report_repo, report_id, action="BAN", success=success, error=None
@@ -100,25 +398,28 @@ async def handle_report(
         return
 
     if llm_result.decision == LLMDecisionType.INVALID_REPORT:
-        await discord_service.send_reply(
-            report_message,
-            "✅ 未发现违规内容，感谢你的反馈。",
-        )
+        if not task.proactive:
+            await _reply(
+                discord_service, channel, task, "✅ 未发现违规内容，感谢你的反馈。"
+            )
         await _update_action_log(
             report_repo, report_id, action="INVALID_REPORT", success=True, error=None
         )
         return
 
-    gm_mention = f"<@{settings.discord_gm_user_id}>"
+    gm_mention = f"<@{policy.gm_user_id}>"
+    if policy.gm_role_id:
+        gm_mention += f" <@&{policy.gm_role_id}>"
+    reporter = "自动扫描" if task.proactive else f"<@{task.reporter_id}>"
     try:
         await discord_service.send_channel_message(
-            report_message.channel,
+            channel,
             (
                 f"{gm_mention} 收到需要人工审核的举报。\n"
-                f"被举报用户：{reported_member.mention}\n"
-                f"举报人：{report_message.author.mention}\n"
-                f"被举报消息：{reported_message.jump_url}\n"
-                f"举报原因：{report_reason}\n"
+                f"被举报用户：{reported_mention}\n"
+                f"举报人：{reporter}\n"
+                f"被举报消息：{task.jump_url}\n"
+                f"举报原因：{task.report_reason}\n"
                 f"LLM 理由：{llm_result.reasoning}"
             ),
         )
@@ -136,6 +437,62 @@ async def handle_report(
         raise
 
 
+def _verdict_cache_key(
+    guild_id: int, user_id: int, content: str | None
+) -> str | None:
+    normalized = " ".join((content or "").split()).casefold()
+    if not normalized:
+        return None
+    digest = hashlib.sha256(f"{guild_id}\n{user_id}\n{normalized}".encode("utf-8"))
+    return f"verdict:{digest.hexdigest()}"
+
+
+async def _get_cached_verdict(
+    state: StateBackend, cache_key: str | None
+) -> LLMDecision | None:
+    if cache_key is None or get_settings().verdict_cache_seconds <= 0:
+        return None
+    try:
+        cached = await state.get(cache_key)
+    except Exception as exc:  # pragma: no cover
+        print(f"[STATE] verdict cache read failed: {type(exc).__name__}: {exc}")
+        return None
+    if cached is None:
+        return None
+    data = json.loads(cached)
+    return LLMDecision(
+        decision=LLMDecisionType(data["decision"]),
+        confidence=float(data["confidence"]),
+        reasoning=data["reasoning"],
+        tier="cache",
+    )
+
+
+async def _cache_verdict(
+    state: StateBackend, cache_key: str | None, result: LLMDecision
+) -> None:
+    """Remember confident verdicts so repeats of the same spam skip the LLM."""
+    settings = get_settings()
+    if (
+        cache_key is None
+        or settings.verdict_cache_seconds <= 0
+        or result.confidence < settings.verdict_cache_min_confidence
+    ):
+        return
+    payload = json.dumps(
+        {
+            "decision": result.decision.value,
+            "confidence": result.confidence,
+            "reasoning": result.reasoning,
+        },
+        ensure_ascii=False,
+    )
+    try:
+        await state.set(cache_key, payload, settings.verdict_cache_seconds)
+    except Exception as exc:  # pragma: no cover
+        print(f"[STATE] verdict cache write failed: {type(exc).__name__}: {exc}")
+
+
 async def _update_action_log(
     repo: ReportRepository,
     report_id: int | None,
@@ -160,25 +517,39 @@ async def _update_action_log(
 
 def _create_report_sync(
     repo: ReportRepository,
-    report_message: discord.Message,
-    reported_member: discord.Member,
-    reported_message: discord.Message,
-    report_reason: str,
+    task: ReportTask,
+    reported_user_name: str,
     user_history: list[dict],
+    attachments: list[dict] | None = None,
 ) -> int:
+    history_blob = None
+    history_ids = None
+    proactive = task.proactive
     with get_session() as session:
+        if all(item.get("id") is not None for item in user_history):
+            message_repo = MessageRepository(get_settings().history_compress_min_bytes)
+            history_ids = json.dumps(message_repo.store_messages(session, user_history))
+        else:
+            history_blob = json.dumps(user_history, ensure_ascii=False)
         report = ReportLog(
-            guild_id=report_message.guild.id if report_message.guild else None,
-            channel_id=report_message.channel.id,
-            reporter_id=report_message.author.id,
-            reporter_name=report_message.author.name,
-            reported_user_id=reported_member.id,
-            reported_user_name=reported_member.name,
-            reported_message_id=reported_message.id,
-            reported_message_content=reported_message.content,
-            reported_message_url=reported_message.jump_url,
-            report_reason=report_reason,
-            reported_user_history=json.dumps(user_history, ensure_ascii=False),
+            guild_id=task.guild_id,
+            channel_id=task.channel_id,
+            # Proactive reports have no reporter, which keeps them out of
+            # the reporter rollups and reputation.
+            reporter_id=None if proactive else task.reporter_id,
+            reporter_name=None if proactive else task.reporter_name,
+            report_source=task.source,
+            reported_user_id=task.reported_user_id,
+            reported_user_name=reported_user_name,
+            reported_message_id=task.reported_message_id,
+            reported_message_content=task.content,
+            reported_message_url=task.jump_url,
+            report_reason=task.report_reason,
+            reported_user_history=history_blob,
+            reported_user_history_ids=history_ids,
+            reported_attachments=(
+                json.dumps(attachments, ensure_ascii=False) if attachments else None
+            ),
         )
         return repo.create_report(session, report)
 
@@ -189,6 +560,8 @@ def _update_llm_result_sync(
     decision: str,
     confidence: float,
     reasoning: str,
+    tier: str | None = None,
+    usage: dict[str, int | float | None] | None = None,
 ) -> None:
     with get_session() as session:
         repo.update_llm_result(
@@ -197,6 +570,8 @@ def _update_llm_result_sync(
             decision=decision,
             confidence=confidence,
             reasoning=reasoning,
+            tier=tier,
+            usage=usage,
         )
 
 
@@ -208,12 +583,14 @@ def _update_action_result_sync(
     error: str | None,
 ) -> None:
     with get_session() as session:
-        repo.update_action_result(
+        resolved = repo.update_action_result(
             session,
             report_id=report_id,
             action_taken=action,
             success=success,
             error_message=error,
         )
+        if resolved is not None:
+            RollupRepository().apply_resolved_report(session, resolved)
 
 
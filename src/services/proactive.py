@@ -0,0 +1,361 @@
+"""Proactive scanning: escalate suspicious messages nobody has reported yet.
+
+``on_message`` hands every guild message to ``ProactiveScanner.observe``,
+which only appends it to a bounded buffer. A background task scores the
+buffer in batches with cheap signals (account and membership age, links,
+mass mentions, repeats of known or copy-pasted spam) and sends messages at
+or above ``PROACTIVE_SCORE_THRESHOLD`` through the normal report queue as
+synthetic reports with ``report_source = "proactive"``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
+import random
+import re
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+import discord
+
+from src.config import get_settings
+from src.services.guild_config import get_guild_config_store, guild_policy
+from src.services.report_task import AttachmentRef, ReportTask
+from src.utils.cache import TTLCache
+from src.utils.helpers import parse_id_ranges
+
+_URL_RE = re.compile(r"https?://([^/\s]+)\S*", re.IGNORECASE)
+_INVITE_RE = re.compile(r"discord(?:\.gg|(?:app)?\.com/invite)/", re.IGNORECASE)
+_DIGITS_RE = re.compile(r"\d+")
+
+# Signal weights; a message escalates once its total reaches the threshold.
+# Copy-paste alone stays below the default threshold: short greetings repeat.
+# Known spam only counts next to an age or link signal (see ``score``).
+_WEIGHTS = {
+    "new_account": 2,
+    "new_member": 1,
+    "link": 1,
+    "invite": 2,
+    "mass_mention": 1,
+    "copy_paste": 2,
+    "known_spam": 5,
+}
+_SIGNAL_NAMES = {
+    "new_account": "新账号",
+    "new_member": "刚加入服务器",
+    "link": "包含链接",
+    "invite": "包含邀请链接",
+    "mass_mention": "@everyone/@here",
+    "copy_paste": "多人发送相同内容",
+    "known_spam": "与已封禁的垃圾消息相同",
+}
+_CORROBORATING = frozenset({"new_account", "new_member", "link", "invite"})
+
+# Fingerprints of content that got someone banned, shared by both sources.
+_known_spam: TTLCache[int, bool] = TTLCache(maxsize=50_000, ttl=7 * 86400)
+
+
+def fingerprint(content: str | None) -> int | None:
+    """Hash of content with case, spacing, numbers and URL paths normalized.
+
+    Spam waves vary ticket numbers and short-link paths between copies.
+    """
+    text = " ".join((content or "").split()).casefold()
+    if not text:
+        return None
+    text = _URL_RE.sub(lambda match: match.group(1), text)
+    text = _DIGITS_RE.sub("0", text)
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def remember_spam(content: str | None) -> None:
+    """Record content that was just banned so repeats escalate immediately."""
+    key = fingerprint(content)
+    if key is not None:
+        _known_spam.set(key, True)
+
+
+class ScannedMessage(NamedTuple):
+    """What scoring and escalation read of an observed message.
+
+    The buffer holds these rather than ``discord.Message`` objects, which
+    would keep their author ``Member``, embeds and state alive.
+    """
+
+    guild_id: int
+    channel_id: int
+    message_id: int
+    author_id: int
+    author_name: str
+    created_at: datetime | None
+    joined_at: datetime | None
+    content: str
+    mention_everyone: bool
+    attachments: tuple[AttachmentRef, ...]
+
+    @classmethod
+    def from_message(cls, message: discord.Message) -> ScannedMessage:
+        author = message.author
+        return cls(
+            message.guild.id,
+            message.channel.id,
+            message.id,
+            author.id,
+            author.name,
+            getattr(author, "created_at", None),
+            # discord.User (member left or not cached) has no joined_at.
+            getattr(author, "joined_at", None),
+            message.content or "",
+            bool(getattr(message, "mention_everyone", False)),
+            (
+                tuple(
+                    AttachmentRef(item.filename, item.content_type, item.size, item.url)
+                    for item in message.attachments
+                )
+                if message.attachments
+                else ()
+            ),
+        )
+
+    def report(self, reason: str) -> ReportTask:
+        """The proactive report for this message."""
+        return ReportTask(
+            guild_id=self.guild_id,
+            channel_id=self.channel_id,
+            report_message_id=self.message_id,
+            reporter_id=self.author_id,
+            reporter_name=self.author_name,
+            reported_message_id=self.message_id,
+            reported_user_id=self.author_id,
+            content=self.content,
+            report_reason=reason,
+            source="proactive",
+            attachments=self.attachments,
+        )
+
+
+def _age_signals(created_at: datetime | None, joined_at: datetime | None) -> list[str]:
+    settings = get_settings()
+    now = datetime.now(timezone.utc)
+    found = []
+    if created_at is not None and now - created_at < timedelta(
+        days=settings.proactive_new_account_days
+    ):
+        found.append("new_account")
+    if joined_at is not None and now - joined_at < timedelta(
+        hours=settings.proactive_new_member_hours
+    ):
+        found.append("new_member")
+    return found
+
+
+class ProactiveScanner:
+    """Buffer guild messages and escalate the suspicious ones in batches.
+
+    A guild's config can switch scanning on or off and change its threshold
+    and escalation limit; otherwise ``enabled`` and ``guild_ids`` decide.
+    """
+
+    def __init__(
+        self,
+        guild_ids: list[int] | None,
+        threshold: int,
+        sample_rate: float,
+        batch_size: int,
+        interval: float,
+        buffer_size: int,
+        enabled: bool = True,
+    ) -> None:
+        self.enabled = enabled
+        self.guild_ids = set(guild_ids) if guild_ids is not None else None
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.batch_size = batch_size
+        self.interval = interval
+        self.stats = {
+            "seen": 0,
+            "sampled_out": 0,
+            "dropped": 0,
+            "scanned": 0,
+            "escalated": 0,
+        }
+        self._buffer: deque[ScannedMessage] = deque(maxlen=buffer_size)
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._stopped = False
+        self._inline: set[asyncio.Task[None]] = set()
+        self._client: discord.Client | None = None
+        # fingerprint -> author ids seen posting it recently
+        self._recent: TTLCache[int, set[int]] = TTLCache(maxsize=20_000, ttl=120)
+
+    def observe(self, message: discord.Message, client: discord.Client) -> None:
+        """Queue ``message`` for scanning; never blocks the event handler.
+
+        ``client`` resolves the guild and channel of escalated reports.
+        """
+        guild = message.guild
+        if guild is None or message.author.bot or self._stopped:
+            return
+        if not self.scans(guild.id):
+            return
+        self.stats["seen"] += 1
+        author = message.author
+        # Established members rarely spam; on busy guilds scan a sample.
+        if (
+            self.sample_rate < 1.0
+            and not _age_signals(
+                getattr(author, "created_at", None), getattr(author, "joined_at", None)
+            )
+            and random.random() >= self.sample_rate
+        ):
+            self.stats["sampled_out"] += 1
+            return
+        if len(self._buffer) == self._buffer.maxlen:
+            self.stats["dropped"] += 1
+        self._buffer.append(ScannedMessage.from_message(message))
+        self._client = client
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+
+    async def stop(self) -> None:
+        """Stop scanning for good; messages observed afterwards are ignored."""
+        self._stopped = True
+        for task in self._inline:
+            task.cancel()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def scans(self, guild_id: int) -> bool:
+        """Whether messages in ``guild_id`` are scanned."""
+        enabled = guild_policy(guild_id).proactive_scan_enabled
+        if enabled is not None:
+            return enabled
+        return self.enabled and (self.guild_ids is None or guild_id in self.guild_ids)
+
+    def threshold_for(self, guild_id: int) -> int:
+        policy = guild_policy(guild_id)
+        return policy.proactive_score_threshold if policy.version else self.threshold
+
+    def signals(self, message: ScannedMessage) -> list[str]:
+        """Names of the suspicious signals present in ``message``."""
+        settings = get_settings()
+        content = message.content
+        found = _age_signals(message.created_at, message.joined_at)
+        if _INVITE_RE.search(content):
+            found.append("invite")
+        elif _URL_RE.search(content):
+            found.append("link")
+        if message.mention_everyone or ("@everyone" in content or "@here" in content):
+            found.append("mass_mention")
+        key = fingerprint(content)
+        if key is not None:
+            if _known_spam.get(key):
+                found.append("known_spam")
+            authors = self._recent.get(key) or set()
+            authors.add(message.author_id)
+            self._recent.set(key, authors)
+            if len(authors) >= settings.proactive_copy_paste_authors:
+                found.append("copy_paste")
+        return found
+
+    def score(self, signals: list[str]) -> int:
+        total = sum(_WEIGHTS[name] for name in signals)
+        if "known_spam" in signals and _CORROBORATING.isdisjoint(signals):
+            # Fingerprints fold numbers and URL paths, so short texts and
+            # same-host links collide; a repeat alone never escalates.
+            total -= _WEIGHTS["known_spam"]
+        return total
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # Let a burst accumulate so it is scored in one pass.
+            await asyncio.sleep(self.interval)
+            while self._buffer:
+                batch = [
+                    self._buffer.popleft()
+                    for _ in range(min(self.batch_size, len(self._buffer)))
+                ]
+                for message in batch:
+                    signals = self.signals(message)
+                    threshold = self.threshold_for(message.guild_id)
+                    if self.score(signals) >= threshold:
+                        await self._escalate(message, signals)
+                self.stats["scanned"] += len(batch)
+                # Yield between batches so a backlog cannot stall the loop.
+                await asyncio.sleep(0)
+
+    async def _escalate(self, message: ScannedMessage, signals: list[str]) -> None:
+        from src.services.handover import pending_report
+        from src.services.moderation_service import handle_report
+        from src.services.scheduler import get_report_scheduler
+        from src.services.state_backend import get_state_backend
+
+        settings = get_settings()
+        state = get_state_backend()
+        max_per_minute = guild_policy(message.guild_id).proactive_max_per_minute
+        try:
+            if max_per_minute > 0:
+                used = await state.hit(f"proactive:{message.guild_id}", 60)
+                if used > max_per_minute:
+                    return
+            # Same key as user reports, so whichever comes first wins.
+            claimed = await state.claim(
+                f"report:{message.guild_id}:{message.message_id}",
+                settings.report_dedupe_seconds,
+            )
+        except Exception as exc:  # pragma: no cover
+            print(f"[SCAN] escalation skipped: {type(exc).__name__}: {exc}")
+            return
+        if not claimed:
+            return
+        self.stats["escalated"] += 1
+        reason = "自动扫描：" + "、".join(_SIGNAL_NAMES[name] for name in signals)
+        report = message.report(reason)
+        scheduler = get_report_scheduler()
+        # Scanner escalations have no reporter; 0 ranks them as unknown.
+        submit = scheduler.submit(
+            0,
+            functools.partial(handle_report, report, self._client),
+            pending=pending_report(report),
+        )
+        if scheduler.workers > 0:
+            await submit
+            return
+        # Without a queue, submit runs the report inline; keep scanning.
+        task = asyncio.create_task(submit)
+        self._inline.add(task)
+        task.add_done_callback(self._inline.discard)
+
+
+_scanner: ProactiveScanner | None = None
+
+
+def get_proactive_scanner() -> ProactiveScanner | None:
+    """Get the scanner, or None when no guild has proactive scanning on."""
+    global _scanner
+    settings = get_settings()
+    if _scanner is None:
+        if (
+            not settings.proactive_scan_enabled
+            and not get_guild_config_store().proactive_guilds
+        ):
+            return None
+        _scanner = ProactiveScanner(
+            enabled=settings.proactive_scan_enabled,
+            guild_ids=parse_id_ranges(settings.proactive_scan_guild_ids),
+            threshold=settings.proactive_score_threshold,
+            sample_rate=settings.proactive_sample_rate,
+            batch_size=settings.proactive_batch_size,
+            interval=settings.proactive_batch_interval_ms / 1000,
+            buffer_size=settings.proactive_buffer_size,
+        )
+    return _scanner
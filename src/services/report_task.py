@@ -0,0 +1,90 @@
+"""Compact record of one report, extracted once from the Discord event.
+
+A ``discord.Message`` carries its author ``Member``, mentions, embeds,
+the referenced message and the connection state; queued reports used to
+pin two of them until a worker was free, and the reported ``Member`` for
+the whole LLM round-trip. ``ReportTask`` keeps only the ids and strings
+the pipeline reads. Discord objects are resolved from the client when an
+action needs them: the channel from the cache (or as a partial channel),
+the message to reply to as a ``PartialMessage``, the banned member by id.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, NamedTuple
+
+import discord
+
+
+class AttachmentRef(NamedTuple):
+    """What ``inspect_attachments`` needs of a ``discord.Attachment``."""
+
+    filename: str
+    content_type: str | None
+    size: int
+    url: str
+
+
+@dataclass(frozen=True, slots=True)
+class ReportTask:
+    """One report to handle; ``source="proactive"`` for scanner escalations."""
+
+    guild_id: int
+    channel_id: int
+    report_message_id: int
+    reporter_id: int
+    reporter_name: str
+    reported_message_id: int
+    reported_user_id: int
+    content: str
+    report_reason: str
+    source: str = "user"
+    attachments: tuple[AttachmentRef, ...] = ()
+
+    @classmethod
+    def from_messages(
+        cls,
+        report_message: discord.Message,
+        reported_message: discord.Message,
+        report_reason: str,
+        source: str = "user",
+    ) -> ReportTask:
+        """Extract a task; neither message is referenced afterwards."""
+        return cls(
+            guild_id=report_message.guild.id,
+            channel_id=report_message.channel.id,
+            report_message_id=report_message.id,
+            reporter_id=report_message.author.id,
+            reporter_name=report_message.author.name,
+            reported_message_id=reported_message.id,
+            reported_user_id=reported_message.author.id,
+            content=reported_message.content or "",
+            report_reason=report_reason,
+            source=source,
+            attachments=tuple(
+                AttachmentRef(item.filename, item.content_type, item.size, item.url)
+                for item in reported_message.attachments
+            ),
+        )
+
+    @property
+    def proactive(self) -> bool:
+        return self.source == "proactive"
+
+    @property
+    def jump_url(self) -> str:
+        """Link to the reported message (always in the report's channel)."""
+        return (
+            f"https://discord.com/channels/{self.guild_id}/{self.channel_id}/"
+            f"{self.reported_message_id}"
+        )
+
+    def channel(self, client: Any) -> Any:
+        """The report channel from ``client``'s cache, else a partial one."""
+        channel = client.get_channel(self.channel_id)
+        if channel is None:
+            channel = client.get_partial_messageable(
+                self.channel_id, guild_id=self.guild_id
+            )
+        return channel
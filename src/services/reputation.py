@@ -0,0 +1,78 @@
+"""Reporter reputation from past report outcomes.
+
+Outcomes are already persisted per report in ``reporter_rollups``, so the
+tracker keeps only an in-memory view: it is loaded from the rollups on
+startup, bumped as this process resolves reports, and re-synced from the
+database periodically to pick up outcomes recorded by other shards.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from src.config import get_settings
+
+# (ban, invalid, need_gm)
+Counts = tuple[int, int, int]
+
+
+class ReputationTracker:
+    """Per-reporter outcome counts and the score derived from them."""
+
+    def __init__(self, window_days: int) -> None:
+        self.window_days = window_days
+        self._counts: dict[int, Counts] = {}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def total(self, reporter_id: int) -> int:
+        return sum(self._counts.get(reporter_id, (0, 0, 0)))
+
+    def score(self, reporter_id: int) -> float:
+        """Share of useful reports in [0, 1]; 0.5 for unknown reporters.
+
+        A BAN counts fully and NEED_GM half. The +1/+2 smoothing keeps a
+        single outcome from pinning a new reporter to either end.
+        """
+        bans, _invalid, need_gm = self._counts.get(reporter_id, (0, 0, 0))
+        total = self.total(reporter_id)
+        return (bans + 0.5 * need_gm + 1) / (total + 2)
+
+    def record(self, reporter_id: int, decision: str) -> None:
+        bans, invalid, need_gm = self._counts.get(reporter_id, (0, 0, 0))
+        if decision == "BAN":
+            bans += 1
+        elif decision == "INVALID_REPORT":
+            invalid += 1
+        elif decision == "NEED_GM":
+            need_gm += 1
+        else:
+            return
+        self._counts[reporter_id] = (bans, invalid, need_gm)
+
+    def preload(self, counts: dict[int, Counts]) -> None:
+        """Replace every count, e.g. with totals read from the rollups."""
+        self._counts = dict(counts)
+
+    def refresh_sync(self) -> int:
+        """Reload counts from ``reporter_rollups``; return the reporter count."""
+        from src.database import get_read_session
+        from src.database.repository import RollupRepository
+
+        since = datetime.now(timezone.utc) - timedelta(days=self.window_days)
+        with get_read_session() as session:
+            counts = RollupRepository().get_reporter_totals(session, since)
+        self.preload(counts)
+        return len(counts)
+
+
+_tracker: ReputationTracker | None = None
+
+
+def get_reputation_tracker() -> ReputationTracker:
+    """Get the process-wide reputation tracker."""
+    global _tracker
+    if _tracker is None:
+        _tracker = ReputationTracker(get_settings().reputation_window_days)
+    return _tracker
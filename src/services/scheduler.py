@@ -0,0 +1,214 @@
+"""Priority queue in front of ``handle_report``.
+
+A fixed pool of workers drains the queue, so a report burst waits here
+instead of opening hundreds of LLM requests at once. While reports wait,
+those from reporters with a good track record go first: each report is
+ordered by ``enqueued_at + (1 - score) * REPORT_PRIORITY_WINDOW_SECONDS``.
+A trusted reporter therefore overtakes up to that window of backlog, a
+serial false reporter drops behind it, and nobody waits forever.
+
+On shutdown ``drain`` stops taking reports and hands the unfinished ones
+over to the next process through ``pending_reports`` (see
+``src.services.handover``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+import traceback
+from typing import Any, Awaitable, Callable
+
+from src.config import get_settings
+from src.services.reputation import ReputationTracker, get_reputation_tracker
+
+Job = Callable[[], Awaitable[None]]
+# ``pending_reports`` columns describing a job, so it can be handed over.
+Pending = dict[str, Any]
+
+# Reports interrupted this many times are dropped instead of handed over
+# again, so a report that kills the process cannot do so forever.
+_MAX_INTERRUPTIONS = 3
+
+
+class ReportScheduler:
+    """Run report jobs on ``workers`` tasks, best reporters first."""
+
+    def __init__(
+        self,
+        workers: int,
+        priority_window: float,
+        tracker: ReputationTracker,
+    ) -> None:
+        self.workers = workers
+        self.priority_window = priority_window
+        self.tracker = tracker
+        self.active = 0
+        self.draining = False
+        # Every submitted report ends up finished, handed over or lost.
+        self.submitted = 0
+        self.finished = 0
+        # Reports saved for another process, and ones that could not be.
+        self.handed_over = 0
+        self.lost = 0
+        self._queue: (
+            asyncio.PriorityQueue[tuple[float, int, Job, Pending | None]] | None
+        ) = None
+        self._tasks: list[asyncio.Task[None]] = []
+        self._seq = itertools.count()
+        # Task running each report, with the report's description.
+        self._running: dict[asyncio.Task[Any], Pending | None] = {}
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def priority(self, reporter_id: int) -> float:
+        """Sort key for a report submitted now; lower runs first."""
+        delay = (1 - self.tracker.score(reporter_id)) * self.priority_window
+        return time.monotonic() + delay
+
+    async def submit(
+        self, reporter_id: int, job: Job, pending: Pending | None = None
+    ) -> None:
+        """Queue ``job``; with no workers configured, run it right away.
+
+        While draining, a report with a ``pending`` description is saved for
+        the next process instead.
+        """
+        self.submitted += 1
+        if self.draining and pending is not None:
+            await self._hand_over([pending])
+            return
+        if self.workers <= 0 or self.draining:
+            await self._run(job, pending)
+            return
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+            self._tasks = [
+                asyncio.create_task(self._worker()) for _ in range(self.workers)
+            ]
+        item = (self.priority(reporter_id), next(self._seq), job, pending)
+        await self._queue.put(item)
+
+    async def join(self) -> None:
+        """Wait until every queued report has been handled."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def drain(self, timeout: float) -> dict[str, int]:
+        """Stop taking reports, let running ones finish, hand the rest over.
+
+        Queued reports are saved right away. Running ones get ``timeout``
+        seconds; then they are cancelled and saved as interrupted. Returns
+        how many reports finished, were handed over and were lost.
+        """
+        self.draining = True
+        handed_over, lost = self.handed_over, self.lost
+        queued: list[Pending | None] = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                queued.append(self._queue.get_nowait()[3])
+                self._queue.task_done()
+        await self._hand_over(queued)
+        running = len(self._running)
+        if self._running:
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout)
+            except TimeoutError:
+                pass
+        interrupted = list(self._running.items())
+        for task, _ in interrupted:
+            task.cancel()
+        await asyncio.gather(*(task for task, _ in interrupted), return_exceptions=True)
+        retry = []
+        for _, pending in interrupted:
+            attempts = pending.get("attempts", 0) + 1 if pending is not None else 0
+            if pending is None or attempts > _MAX_INTERRUPTIONS:
+                self.lost += 1
+                continue
+            retry.append({**pending, "stage": "interrupted", "attempts": attempts})
+        await self._hand_over(retry)
+        await self.stop()
+        return {
+            "finished": running - len(interrupted),
+            "handed_over": self.handed_over - handed_over,
+            "lost": self.lost - lost,
+        }
+
+    async def stop(self) -> None:
+        """Cancel the workers; queued reports are dropped."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    async def _hand_over(self, records: list[Pending | None]) -> None:
+        from src.services.handover import save_pending_sync
+
+        saved = [record for record in records if record is not None]
+        self.lost += len(records) - len(saved)
+        if not saved:
+            return
+        try:
+            await asyncio.to_thread(save_pending_sync, saved)
+        except Exception as exc:
+            self.lost += len(saved)
+            ids = ", ".join(str(record["reported_message_id"]) for record in saved)
+            print(
+                f"[QUEUE] could not hand over {len(saved)} reports "
+                f"(messages {ids}): {type(exc).__name__}: {exc}"
+            )
+            return
+        self.handed_over += len(saved)
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        while True:
+            _, _, job, pending = await self._queue.get()
+            try:
+                await self._run(job, pending)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job, pending: Pending | None = None) -> None:
+        task = asyncio.current_task()
+        assert task is not None
+        self.active += 1
+        self._running[task] = pending
+        self._idle.clear()
+        try:
+            await job()
+        except Exception as exc:
+            print(f"[QUEUE] report failed: {type(exc).__name__}: {exc}")
+            traceback.print_exc()
+        finally:
+            self.active -= 1
+            self._running.pop(task, None)
+            if not self._running:
+                self._idle.set()
+        # Not reached when the drain cancels the report.
+        self.finished += 1
+
+
+_scheduler: ReportScheduler | None = None
+
+
+def get_report_scheduler() -> ReportScheduler:
+    """Get the process-wide report scheduler."""
+    global _scheduler
+    if _scheduler is None:
+        settings = get_settings()
+        window = (
+            settings.report_priority_window_seconds
+            if settings.report_priority_enabled
+            else 0.0
+        )
+        _scheduler = ReportScheduler(
+            settings.report_workers, window, get_reputation_tracker()
+        )
+    return _scheduler
@@ -0,0 +1,190 @@
+"""Shared state backends for dedupe, rate limits and the verdict cache.
+
+A single bot process can keep this state in memory. Sharded deployments run
+several processes that must agree on it, so the database backend stores it
+in the ``shared_state`` table instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select
+
+from src.config import get_settings
+from src.database import get_session
+from src.database.models import SharedState
+from src.database.repository import _as_utc, _dialect_insert
+
+
+class StateBackend(ABC):
+    """Key/value state with expiry shared by every bot process."""
+
+    @abstractmethod
+    async def claim(self, key: str, ttl_seconds: int) -> bool:
+        """Set ``key`` if absent or expired; return whether this caller won."""
+
+    @abstractmethod
+    async def hit(self, key: str, window_seconds: int) -> int:
+        """Count one event in the current fixed window; return the count so far."""
+
+    @abstractmethod
+    async def get(self, key: str) -> str | None:
+        """Return a live value or None."""
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        """Store ``value`` under ``key`` for ``ttl_seconds``."""
+
+
+class MemoryStateBackend(StateBackend):
+    """Process-local backend; correct only for a single bot process."""
+
+    def __init__(self, max_entries: int = 100_000) -> None:
+        self._values: dict[str, tuple[str, float]] = {}
+        self._counters: dict[str, tuple[int, float]] = {}
+        self._max_entries = max_entries
+
+    def _prune(self) -> None:
+        if len(self._values) + len(self._counters) < self._max_entries:
+            return
+        now = time.monotonic()
+        self._values = {k: v for k, v in self._values.items() if v[1] > now}
+        self._counters = {k: v for k, v in self._counters.items() if v[1] > now}
+
+    async def claim(self, key: str, ttl_seconds: int) -> bool:
+        now = time.monotonic()
+        current = self._values.get(key)
+        if current is not None and current[1] > now:
+            return False
+        self._prune()
+        self._values[key] = ("1", now + ttl_seconds)
+        return True
+
+    async def hit(self, key: str, window_seconds: int) -> int:
+        now = time.monotonic()
+        count, expires_at = self._counters.get(key, (0, 0.0))
+        if expires_at <= now:
+            self._prune()
+            count, expires_at = 0, now + window_seconds
+        self._counters[key] = (count + 1, expires_at)
+        return count + 1
+
+    async def get(self, key: str) -> str | None:
+        current = self._values.get(key)
+        if current is None or current[1] <= time.monotonic():
+            return None
+        return current[0]
+
+    async def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        self._prune()
+        self._values[key] = (value, time.monotonic() + ttl_seconds)
+
+
+class DatabaseStateBackend(StateBackend):
+    """Backend on the shared database, safe across shard processes."""
+
+    _PURGE_EVERY = 500
+
+    def __init__(self) -> None:
+        self._writes = 0
+
+    async def claim(self, key: str, ttl_seconds: int) -> bool:
+        return await asyncio.to_thread(self._claim_sync, key, ttl_seconds)
+
+    async def hit(self, key: str, window_seconds: int) -> int:
+        return await asyncio.to_thread(self._hit_sync, key, window_seconds)
+
+    async def get(self, key: str) -> str | None:
+        return await asyncio.to_thread(self._get_sync, key)
+
+    async def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        await asyncio.to_thread(self._set_sync, key, value, ttl_seconds)
+
+    def _claim_sync(self, key: str, ttl_seconds: int) -> bool:
+        now = datetime.now(timezone.utc)
+        with get_session() as session:
+            self._maybe_purge(session, now)
+            stmt = _dialect_insert(session, SharedState)
+            stmt = stmt.values(
+                key=key,
+                value="1",
+                counter=0,
+                expires_at=now + timedelta(seconds=ttl_seconds),
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["key"],
+                set_={"value": "1", "expires_at": stmt.excluded.expires_at},
+                where=SharedState.expires_at <= now,
+            ).returning(SharedState.key)
+            return session.execute(stmt).first() is not None
+
+    def _hit_sync(self, key: str, window_seconds: int) -> int:
+        now = datetime.now(timezone.utc)
+        window = int(now.timestamp()) // window_seconds
+        window_key = f"{key}:{window}"
+        expires_at = datetime.fromtimestamp((window + 1) * window_seconds, timezone.utc)
+        with get_session() as session:
+            self._maybe_purge(session, now)
+            stmt = _dialect_insert(session, SharedState)
+            stmt = stmt.values(
+                key=window_key, value=None, counter=1, expires_at=expires_at
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["key"],
+                set_={"counter": SharedState.counter + 1},
+            ).returning(SharedState.counter)
+            return int(session.execute(stmt).scalar_one())
+
+    def _get_sync(self, key: str) -> str | None:
+        with get_session() as session:
+            row = session.execute(
+                select(SharedState.value, SharedState.expires_at).where(
+                    SharedState.key == key
+                )
+            ).first()
+        if row is None or _as_utc(row.expires_at) <= datetime.now(timezone.utc):
+            return None
+        return row.value
+
+    def _set_sync(self, key: str, value: str, ttl_seconds: int) -> None:
+        now = datetime.now(timezone.utc)
+        with get_session() as session:
+            self._maybe_purge(session, now)
+            stmt = _dialect_insert(session, SharedState)
+            stmt = stmt.values(
+                key=key,
+                value=value,
+                counter=0,
+                expires_at=now + timedelta(seconds=ttl_seconds),
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["key"],
+                set_={
+                    "value": stmt.excluded.value,
+                    "expires_at": stmt.excluded.expires_at,
+                },
+            )
+            session.execute(stmt)
+
+    def _maybe_purge(self, session, now: datetime) -> None:
+        self._writes += 1
+        if self._writes % self._PURGE_EVERY == 0:
+            session.execute(delete(SharedState).where(SharedState.expires_at <= now))
+
+
+_backend: StateBackend | None = None
+
+
+def get_state_backend() -> StateBackend:
+    """Get the configured shared state backend."""
+    global _backend
+    if _backend is None:
+        if get_settings().state_backend == "database":
+            _backend = DatabaseStateBackend()
+        else:
+            _backend = MemoryStateBackend()
+    return _backend
@@ -0,0 +1,125 @@
+"""Bot health history: in-memory samples, flushed as downsampled buckets.
+
+``bot_status`` only holds the latest heartbeat per shard. For capacity
+charts the bot also samples every shard's guild count, queue depth, gateway
+latency and loop lag each ``STATUS_SAMPLE_SECONDS`` into a bounded ring
+buffer; nothing is written per sample. The 60 s heartbeat flushes the buffer
+in one transaction: the samples are summed per shard into MINUTE, HOUR and
+DAY buckets (count, sum and max of each metric) and merged into
+``status_samples``, so the coarse resolutions are maintained incrementally
+rather than recomputed. Each resolution has its own retention, enforced by
+range deletes on the (granularity, bucket_start) index about once an hour.
+If the database is unavailable the samples stay buffered; when the buffer
+is full the oldest are dropped.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+from src.config import get_settings
+
+# Samples kept while the database is unreachable: 16 shards for ~8.5 hours
+# at the default interval.
+_MAX_BUFFERED = 50_000
+_PRUNE_INTERVAL = 3600.0
+
+
+def retention() -> dict[str, timedelta]:
+    """How long each resolution is kept."""
+    settings = get_settings()
+    return {
+        "MINUTE": timedelta(hours=settings.status_history_minute_hours),
+        "HOUR": timedelta(days=settings.status_history_hour_days),
+        "DAY": timedelta(days=settings.status_history_day_days),
+    }
+
+
+class StatusHistory:
+    """Ring buffer of health samples and its flush to ``status_samples``."""
+
+    def __init__(self, max_samples: int = _MAX_BUFFERED) -> None:
+        self._samples: deque[tuple] = deque(maxlen=max_samples)
+        # record() runs on the event loop, flush_sync() in a worker thread.
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self._pruned_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(
+        self,
+        shard_id: int,
+        active_guilds: int,
+        queue_depth: int,
+        latency_ms: float | None,
+        loop_lag: dict[str, float] | None,
+        taken_at: datetime | None = None,
+    ) -> None:
+        """Buffer one sample of ``shard_id``; never touches the database."""
+        sample = (
+            taken_at or datetime.now(timezone.utc),
+            shard_id,
+            active_guilds,
+            queue_depth,
+            latency_ms,
+            loop_lag["p99"] if loop_lag else None,
+            loop_lag["max"] if loop_lag else None,
+        )
+        with self._lock:
+            if len(self._samples) == self._samples.maxlen:
+                self.dropped += 1
+            self._samples.append(sample)
+
+    def flush_sync(self) -> int:
+        """Write the buffered samples; return how many were written."""
+        from src.database import get_session
+        from src.database.repository import (
+            StatusHistoryRepository,
+            status_bucket_rows,
+        )
+
+        with self._lock:
+            samples = list(self._samples)
+            self._samples.clear()
+        repo = StatusHistoryRepository()
+        prune = time.monotonic() - self._pruned_at >= _PRUNE_INTERVAL
+        try:
+            with get_session() as session:
+                if samples:
+                    repo.add_buckets(session, status_bucket_rows(samples))
+                if prune:
+                    now = datetime.now(timezone.utc)
+                    for granularity, keep in retention().items():
+                        repo.prune(session, granularity, now - keep)
+        except Exception:
+            self._restore(samples)
+            raise
+        if prune:
+            self._pruned_at = time.monotonic()
+        return len(samples)
+
+    def _restore(self, samples: list[tuple]) -> None:
+        """Put unwritten samples back in front of the ones recorded since."""
+        with self._lock:
+            pending = list(self._samples)
+            self._samples.clear()
+            self._samples.extend(samples)
+            self._samples.extend(pending)
+            maxlen = self._samples.maxlen or 0
+            self.dropped += max(0, len(samples) + len(pending) - maxlen)
+
+
+_history: StatusHistory | None = None
+
+
+def get_status_history() -> StatusHistory:
+    """Get the process-wide status history buffer."""
+    global _history
+    if _history is None:
+        _history = StatusHistory()
+    return _history
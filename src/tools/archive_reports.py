@@ -0,0 +1,64 @@
+"""Archive old resolved reports, or restore an archive file."""
+
+from __future__ import annotations
+
+import argparse
+
+from src.config import get_settings
+from src.database import get_session, init_db
+from src.database.archive import archive_reports, compact_hot_table, restore_archive
+from src.database.repository import ArchiveRepository
+
+
+def main() -> None:
+    """Run the archive command."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    archive_parser = subparsers.add_parser(
+        "archive", help="Archive old resolved reports"
+    )
+    archive_parser.add_argument(
+        "--days", type=int, default=None, help="Retention days (default: settings)"
+    )
+    archive_parser.add_argument("--batch-size", type=int, default=1000)
+    archive_parser.add_argument(
+        "--vacuum", action="store_true", help="Also VACUUM SQLite databases"
+    )
+
+    restore_parser = subparsers.add_parser("restore", help="Restore an archive file")
+    restore_parser.add_argument("path")
+
+    subparsers.add_parser("list", help="List archive files")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    init_db()
+
+    if args.command == "archive":
+        days = args.days or settings.report_retention_days
+        if not days:
+            parser.error("--days or REPORT_RETENTION_DAYS is required")
+        written = archive_reports(days, settings.report_archive_dir, args.batch_size)
+        for path, count in written:
+            print(f"Archived {count} reports -> {path}")
+        if not written:
+            print("Nothing to archive")
+        compact_hot_table(full=args.vacuum)
+    elif args.command == "restore":
+        restored = restore_archive(args.path)
+        print(f"Restored {restored} reports from {args.path}")
+    else:
+        with get_session() as session:
+            archives = ArchiveRepository().list_archives(session)
+        for archive in archives:
+            restored = " (restored)" if archive.restored_at else ""
+            print(
+                f"{archive.month}  {archive.row_count:>8} rows  "
+                f"ids {archive.min_report_id}-{archive.max_report_id}  "
+                f"{archive.file_path}{restored}"
+            )
+
+
+if __name__ == "__main__":
+    main()
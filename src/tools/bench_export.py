@@ -0,0 +1,256 @@
+"""Benchmark streaming report export: throughput and memory per format.
+
+Seeds a SQLite database with synthetic resolved reports (or reuses one
+given with ``--db``), then exports it in a fresh interpreter per format and
+reports rows/s, output size and peak memory. RSS includes SQLite's memory
+map of the database file, so the anonymous ("heap") peak is reported too;
+that is the figure that should stay flat as the table grows. The ``list``
+mode loads the rows as ORM objects and serializes one JSON document, the
+way ``/api/reports`` does, for comparison; it is capped at ``--list-rows``.
+
+Examples::
+
+    python -m src.tools.bench_export --rows 1000000
+    python -m src.tools.bench_export --db ./data/export-bench.db --formats csv parquet
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+_REASONS = (
+    "消息包含诈骗链接并诱导私聊，属于典型的垃圾广告。",
+    "内容为正常聊天，举报理由不成立。",
+    "涉及投资诱导，但证据不足，建议人工复核。",
+)
+
+
+def _set_environment(db_path: Path) -> None:
+    os.environ.update(
+        {
+            "DATABASE_URL": f"sqlite:///{db_path}",
+            "DISCORD_TOKEN": os.environ.get("DISCORD_TOKEN", "bench"),
+            "DISCORD_GM_ROLE_ID": os.environ.get("DISCORD_GM_ROLE_ID", "0"),
+            "LLM_API_KEY": os.environ.get("LLM_API_KEY", "bench"),
+        }
+    )
+
+
+def seed(rows: int, seed: int, batch_size: int = 10_000) -> None:
+    """Insert ``rows`` synthetic resolved reports."""
+    from sqlalchemy import insert
+
+    from src.database import get_session, init_db
+    from src.database.models import ReportLog
+    from src.tools.build_case_index import _synthetic_text
+
+    init_db()
+    rng = random.Random(seed)
+    start = datetime.now(timezone.utc) - timedelta(days=365)
+    decisions = {"BAN": 0, "INVALID_REPORT": 1}
+    for offset in range(0, rows, batch_size):
+        batch = []
+        for number in range(offset, min(rows, offset + batch_size)):
+            content, decision = _synthetic_text(rng)
+            if rng.random() < 0.1:
+                decision = "NEED_GM"
+            created = start + timedelta(seconds=number * 365 * 86400 / rows)
+            batch.append(
+                {
+                    "guild_id": 10**17 + rng.randrange(20),
+                    "channel_id": 10**17 + rng.randrange(1000),
+                    "reporter_id": 10**16 + rng.randrange(5000),
+                    "reporter_name": f"reporter{rng.randrange(5000)}",
+                    "report_source": "user",
+                    "reported_user_id": 10**16 + rng.randrange(100_000),
+                    "reported_user_name": f"user{rng.randrange(100_000)}",
+                    "reported_message_id": 10**18 + number,
+                    "reported_message_content": content,
+                    "reported_message_url": "https://discord.com/channels/1/2/3",
+                    "report_reason": "广告",
+                    "llm_decision": decision,
+                    "llm_confidence": round(rng.uniform(0.5, 1.0), 3),
+                    "llm_reasoning": _REASONS[decisions.get(decision, 2)],
+                    "llm_tier": "large",
+                    "llm_large_tokens": rng.randint(300, 600),
+                    "llm_large_latency_ms": rng.uniform(300, 900),
+                    "action_taken": "BAN" if decision == "BAN" else None,
+                    "action_success": decision == "BAN" or None,
+                    "status": "RESOLVED",
+                    "resolved_at": created + timedelta(seconds=5),
+                    "created_at": created,
+                    "updated_at": created + timedelta(seconds=5),
+                }
+            )
+        with get_session() as session:
+            session.execute(insert(ReportLog), batch)
+
+
+def _anon_rss_mb() -> float:
+    """Anonymous (heap) RSS; SQLite's mmap of the database file is excluded."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+class _PeakSampler(threading.Thread):
+    def __init__(self) -> None:
+        super().__init__(daemon=True)
+        self.peak = _anon_rss_mb()
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(0.05):
+            self.peak = max(self.peak, _anon_rss_mb())
+
+
+def run_worker(mode: str, list_rows: int) -> dict[str, Any]:
+    """Export the whole table in ``mode`` and measure it."""
+    from src.database.export import ExportFilter, iter_export, iter_report_batches
+    from src.tools.loadgen import _rss_mb
+
+    # Import everything up front so the baseline covers library code.
+    if mode == "list":
+        from sqlalchemy import select
+
+        from src.api.app import _serialize_report
+        from src.database import get_read_session
+        from src.database.models import ReportLog
+    rss_before = _rss_mb()
+    anon_before = _anon_rss_mb()
+    sampler = _PeakSampler()
+    sampler.start()
+    started = time.perf_counter()
+    written = rows = 0
+    if mode == "list":
+        with get_read_session() as session:
+            reports = session.scalars(
+                select(ReportLog).order_by(ReportLog.id).limit(list_rows)
+            ).all()
+            payload = json.dumps(
+                [_serialize_report(report) for report in reports], ensure_ascii=False
+            ).encode("utf-8")
+        rows, written = len(reports), len(payload)
+    elif mode == "rows":
+        # Read and convert rows without encoding: the database side alone.
+        for batch in iter_report_batches(ExportFilter()):
+            rows += len(batch)
+    else:
+        from sqlalchemy import func, select
+
+        from src.database import get_read_session
+        from src.database.models import ReportLog
+
+        with get_read_session() as session:
+            rows = session.scalar(select(func.count(ReportLog.id)))
+        started = time.perf_counter()
+        with open(os.devnull, "wb") as sink:
+            for chunk in iter_export(mode, ExportFilter()):
+                sink.write(chunk)
+                written += len(chunk)
+    elapsed = time.perf_counter() - started
+    sampler.stopped.set()
+    sampler.join()
+    return {
+        "mode": mode,
+        "rows": rows,
+        "seconds": elapsed,
+        "output_mb": written / 1024 / 1024,
+        "rss_mb": {
+            "baseline": rss_before,
+            "peak": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "heap_baseline": anon_before,
+            "heap_peak": max(sampler.peak, _anon_rss_mb()),
+        },
+    }
+
+
+def main() -> None:
+    """Seed (if needed) and export once per format in subprocesses."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--db", type=Path, help="Reuse or create this SQLite file")
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        default=["rows", "ndjson", "csv", "parquet", "list"],
+        choices=["rows", "ndjson", "csv", "parquet", "list"],
+    )
+    parser.add_argument(
+        "--list-rows", type=int, default=100_000, help="Row cap for the list mode"
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print a JSON result")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    db_path = args.db or Path(tempfile.mkdtemp(prefix="llm-guard-export-")) / "bench.db"
+    _set_environment(db_path)
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.list_rows)))
+        return
+
+    if not db_path.exists():
+        started = time.perf_counter()
+        seed(args.rows, args.seed)
+        print(
+            f"Seeded {args.rows} reports in {time.perf_counter() - started:.0f}s "
+            f"({db_path.stat().st_size / 1024 / 1024:.0f} MB)",
+            file=sys.stderr,
+        )
+
+    results = []
+    for mode in args.formats:
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "src.tools.bench_export",
+                "--worker",
+                mode,
+                "--db",
+                str(db_path),
+                "--list-rows",
+                str(args.list_rows),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        rss = result["rss_mb"]
+        print(
+            f"{result['mode']:<8} {result['rows']:>8} rows  "
+            f"{result['rows'] / result['seconds']:>9.0f} rows/s  "
+            f"{result['output_mb']:8.1f} MB out  "
+            f"RSS {rss['baseline']:6.1f} -> peak {rss['peak']:7.1f} MB  "
+            f"heap {rss['heap_baseline']:6.1f} -> peak {rss['heap_peak']:7.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
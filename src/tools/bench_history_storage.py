@@ -0,0 +1,146 @@
+"""Benchmark report history storage: JSON blob per report vs message references."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.database.models import Base, ReportLog
+from src.database.repository import MessageRepository
+
+_WORDS = (
+    "USDT",
+    "客服",
+    "返利",
+    "空投",
+    "免费领取",
+    "点击链接",
+    "加我私聊",
+    "稳赚不赔",
+    "airdrop",
+    "giveaway",
+    "claim",
+    "wallet",
+    "support",
+    "http://bit.ly/x",
+    "今天",
+    "大家好",
+    "有人吗",
+    "gm",
+    "lol",
+    "nice",
+)
+
+
+def _synthetic_history(
+    rng: random.Random, users: int, pool: int
+) -> dict[int, list[dict]]:
+    streams: dict[int, list[dict]] = {}
+    message_id = 10**17
+    for user_id in range(1, users + 1):
+        messages = []
+        for _ in range(pool):
+            message_id += 1
+            words = rng.randint(5, 60) if rng.random() > 0.05 else rng.randint(300, 600)
+            messages.append(
+                {
+                    "id": message_id,
+                    "author_id": user_id,
+                    "channel_id": 1,
+                    "content": " ".join(rng.choice(_WORDS) for _ in range(words)),
+                    "created_at": "2026-01-01T00:00:00+00:00",
+                    "url": f"https://discord.com/channels/1/1/{message_id}",
+                }
+            )
+        streams[user_id] = messages
+    return streams
+
+
+def _run(layout: str, reports: int, history_limit: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    users = max(1, reports // 20)
+    streams = _synthetic_history(rng, users, history_limit * 3)
+    message_repo = MessageRepository()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        engine = create_engine(f"sqlite:///{db_path}", future=True)
+        Base.metadata.create_all(engine)
+        latencies: list[float] = []
+        started = time.perf_counter()
+        for _ in range(reports):
+            user_id = rng.randint(1, users)
+            offset = rng.randint(0, history_limit * 2)
+            history = streams[user_id][offset : offset + history_limit]
+            t0 = time.perf_counter()
+            with Session(engine) as session, session.begin():
+                report = ReportLog(
+                    guild_id=1,
+                    channel_id=1,
+                    reporter_id=rng.randint(1, 10_000),
+                    reported_user_id=user_id,
+                    reported_message_content=history[-1]["content"],
+                    report_reason="spam",
+                )
+                if layout == "blob":
+                    report.reported_user_history = json.dumps(
+                        history, ensure_ascii=False
+                    )
+                else:
+                    ids = message_repo.store_messages(session, history)
+                    report.reported_user_history_ids = json.dumps(ids)
+                session.add(report)
+            latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+        size = os.path.getsize(db_path)
+
+    latencies.sort()
+    return {
+        "layout": layout,
+        "reports": reports,
+        "db_bytes": size,
+        "bytes_per_report": size / reports,
+        "inserts_per_sec": reports / elapsed,
+        "insert_ms_p50": latencies[len(latencies) // 2] * 1000,
+        "insert_ms_p95": latencies[int(len(latencies) * 0.95)] * 1000,
+        "insert_ms_mean": statistics.fmean(latencies) * 1000,
+    }
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reports", type=int, default=100_000)
+    parser.add_argument("--history-limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print JSON only")
+    args = parser.parse_args()
+
+    results = [
+        _run(layout, args.reports, args.history_limit, args.seed)
+        for layout in ("blob", "refs")
+    ]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        print(
+            f"{result['layout']:>5}: {result['bytes_per_report']:8.0f} B/report  "
+            f"{result['inserts_per_sec']:8.0f} inserts/s  "
+            f"p50 {result['insert_ms_p50']:.2f} ms  "
+            f"p95 {result['insert_ms_p95']:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
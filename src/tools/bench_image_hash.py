@@ -0,0 +1,234 @@
+"""Benchmark perceptual image hashing and banned-image matching.
+
+Hashes a fixture corpus (a directory of images, or generated QR codes,
+banners and noise images) and reports decode+hash throughput, how often
+edited copies (re-encoded, resized, cropped, watermarked) still match their
+original, how often unrelated images match by accident, and index lookup
+time.
+
+Examples::
+
+    python -m src.tools.bench_image_hash --generate 300
+    python -m src.tools.bench_image_hash --fixtures ./fixtures/spam --threads 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from src.services.attachments import (
+    BannedImageIndex,
+    HammingIndex,
+    ImageHashes,
+    hash_image,
+    hashing_available,
+)
+
+try:
+    from PIL import Image, ImageDraw
+except ImportError:  # pragma: no cover - depends on environment
+    Image = None
+
+
+def _encode(image: Image.Image, fmt: str, **options) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, **options)
+    return buffer.getvalue()
+
+
+def _qr_like(rng: random.Random) -> Image.Image:
+    modules = 25
+    scale = rng.choice((8, 10, 12))
+    image = Image.new("L", ((modules + 8) * scale,) * 2, 255)
+    draw = ImageDraw.Draw(image)
+    for y in range(modules):
+        for x in range(modules):
+            if rng.random() < 0.5:
+                left, top = (x + 4) * scale, (y + 4) * scale
+                draw.rectangle((left, top, left + scale - 1, top + scale - 1), 0)
+    for x, y in ((4, 4), (4 + modules - 7, 4), (4, 4 + modules - 7)):
+        left, top = x * scale, y * scale
+        draw.rectangle((left, top, left + 7 * scale - 1, top + 7 * scale - 1), 0)
+        draw.rectangle(
+            (left + scale, top + scale, left + 6 * scale - 1, top + 6 * scale - 1),
+            255,
+        )
+        draw.rectangle(
+            (
+                left + 2 * scale,
+                top + 2 * scale,
+                left + 5 * scale - 1,
+                top + 5 * scale - 1,
+            ),
+            0,
+        )
+    return image.convert("RGB")
+
+
+def _banner(rng: random.Random) -> Image.Image:
+    width, height = rng.choice(((1200, 630), (1024, 512), (800, 800)))
+    start = [rng.randint(0, 255) for _ in range(3)]
+    end = [rng.randint(0, 255) for _ in range(3)]
+    image = Image.new("RGB", (width, height))
+    draw = ImageDraw.Draw(image)
+    for x in range(width):
+        ratio = x / width
+        color = tuple(int(a + (b - a) * ratio) for a, b in zip(start, end))
+        draw.line((x, 0, x, height), fill=color)
+    for _ in range(rng.randint(3, 8)):
+        left, top = rng.randint(0, width - 100), rng.randint(0, height - 60)
+        draw.rectangle(
+            (left, top, left + rng.randint(60, 400), top + rng.randint(30, 200)),
+            fill=tuple(rng.randint(0, 255) for _ in range(3)),
+        )
+    draw.text(
+        (width // 10, height // 2),
+        f"FREE NITRO GIVEAWAY #{rng.randint(1, 9999)}",
+        fill=(255, 255, 255),
+    )
+    return image
+
+
+def _noise(rng: random.Random) -> Image.Image:
+    small = Image.frombytes(
+        "RGB", (16, 12), bytes(rng.randint(0, 255) for _ in range(16 * 12 * 3))
+    )
+    return small.resize((640, 480), Image.Resampling.BICUBIC)
+
+
+def _generate(count: int, seed: int) -> list[tuple[str, bytes]]:
+    rng = random.Random(seed)
+    makers = (_qr_like, _banner, _noise)
+    corpus = []
+    for number in range(count):
+        image = makers[number % len(makers)](rng)
+        if number % 2:
+            corpus.append((f"{number}.jpg", _encode(image, "JPEG", quality=90)))
+        else:
+            corpus.append((f"{number}.png", _encode(image, "PNG")))
+    return corpus
+
+
+def _load(directory: Path) -> list[tuple[str, bytes]]:
+    return [
+        (path.name, path.read_bytes())
+        for path in sorted(directory.iterdir())
+        if path.is_file()
+    ]
+
+
+def _variants(data: bytes, rng: random.Random) -> dict[str, bytes]:
+    with Image.open(io.BytesIO(data)) as original:
+        image = original.convert("RGB")
+    width, height = image.size
+    crop = int(min(width, height) * 0.04)
+    marked = image.copy()
+    ImageDraw.Draw(marked).text(
+        (rng.randint(0, width // 2), rng.randint(0, height // 2)),
+        "@user123",
+        fill=(255, 0, 0),
+    )
+    return {
+        "jpeg_q60": _encode(image, "JPEG", quality=60),
+        "resize_50": _encode(image.resize((width // 2, height // 2)), "PNG"),
+        "crop_4pct": _encode(
+            image.crop((crop, crop, width - crop, height - crop)), "PNG"
+        ),
+        "watermark": _encode(marked, "PNG"),
+    }
+
+
+def _matches(index: BannedImageIndex, hashes: ImageHashes | None) -> bool:
+    return hashes is not None and index.match(hashes, None) is not None
+
+
+def main() -> None:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", type=Path, help="Directory of images to hash")
+    parser.add_argument(
+        "--generate", type=int, default=300, help="Images to generate (no --fixtures)"
+    )
+    parser.add_argument(
+        "--threads", type=int, default=4, help="Threads for a second hashing pass"
+    )
+    parser.add_argument("--max-distance", type=int, default=6)
+    parser.add_argument(
+        "--index-size", type=int, default=10_000, help="Random hashes for lookups"
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if not hashing_available():
+        raise SystemExit("Pillow and numpy are required: pip install Pillow numpy")
+    rng = random.Random(args.seed)
+    corpus = (
+        _load(args.fixtures) if args.fixtures else _generate(args.generate, args.seed)
+    )
+    total_mb = sum(len(data) for _, data in corpus) / 1024 / 1024
+    print(f"Corpus: {len(corpus)} files, {total_mb:.1f} MB")
+
+    started = time.perf_counter()
+    hashed = [hash_image(data) for _, data in corpus]
+    single = time.perf_counter() - started
+    ok = [
+        (name, data, hashes) for (name, data), hashes in zip(corpus, hashed) if hashes
+    ]
+    print(
+        f"Hashing, 1 thread: {len(corpus) / single:.0f} images/s "
+        f"({single / len(corpus) * 1000:.2f} ms/image), {len(ok)} decoded"
+    )
+    if args.threads > 1:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(args.threads) as pool:
+            list(pool.map(hash_image, (data for _, data in corpus)))
+        elapsed = time.perf_counter() - started
+        print(f"Hashing, {args.threads} threads: {len(corpus) / elapsed:.0f} images/s")
+
+    index = BannedImageIndex(args.max_distance)
+    for number, (_, _, hashes) in enumerate(ok):
+        index.add(hashes, 0, number)
+
+    recall: dict[str, list[int]] = {}
+    for _, data, _ in ok:
+        for kind, variant in _variants(data, rng).items():
+            counts = recall.setdefault(kind, [0, 0])
+            counts[0] += _matches(index, hash_image(variant))
+            counts[1] += 1
+    print(f"Edited copies matched at distance <= {args.max_distance}:")
+    for kind, (matched, total) in recall.items():
+        print(f"  {kind:<10} {matched}/{total} ({matched / total:.1%})")
+
+    # Each original is indexed under its own position; any other hit is a
+    # false match between unrelated images.
+    false_matches = sum(
+        any(
+            banned.report_id != number
+            and (banned.dhash ^ hashes.dhash).bit_count() <= args.max_distance
+            for _, _, banned in index._index.search(hashes.phash, args.max_distance)
+        )
+        for number, (_, _, hashes) in enumerate(ok)
+    )
+    print(f"Distinct corpus images matching another one: {false_matches}/{len(ok)}")
+
+    lookup = HammingIndex()
+    for number in range(args.index_size):
+        lookup.add(rng.getrandbits(64), number)
+    probes = [rng.getrandbits(64) for _ in range(2000)]
+    started = time.perf_counter()
+    for probe in probes:
+        lookup.search(probe, args.max_distance)
+    elapsed = time.perf_counter() - started
+    print(
+        f"Lookup in {args.index_size} hashes: "
+        f"{elapsed / len(probes) * 1e6:.0f} µs/lookup"
+    )
+
+
+if __name__ == "__main__":
+    main()
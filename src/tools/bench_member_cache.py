@@ -0,0 +1,234 @@
+"""Measure bot RSS on large synthetic guilds with and without the lean member cache.
+
+Each mode runs in a fresh interpreter. The worker builds a discord.py client
+with the same member cache options ``LLMGuardBot`` uses, feeds it GUILD_CREATE
+payloads carrying every member (what startup chunking delivers) plus a stream
+of member joins, then looks up reported members through
+``DiscordService.get_member`` against a fake REST endpoint.
+
+Examples::
+
+    python -m src.tools.bench_member_cache --guilds 2 --members 100000
+    python -m src.tools.bench_member_cache --members 250000 --lookups 2000 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+from typing import Any
+
+_JOINED_AT = "2025-06-01T00:00:00+00:00"
+
+
+def _member_payload(user_id: int, role_ids: list[str]) -> dict[str, Any]:
+    return {
+        "user": {
+            "id": str(user_id),
+            "username": f"user{user_id % 10_000_000}",
+            "discriminator": "0",
+            "global_name": None,
+            "avatar": None,
+        },
+        "roles": role_ids,
+        "joined_at": _JOINED_AT,
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+def _guild_payload(guild_id: int, members: int, first_user: int) -> dict[str, Any]:
+    roles = [
+        {
+            "id": str(guild_id + index),
+            "name": "@everyone" if index == 0 else f"role{index}",
+            "permissions": "0",
+            "position": index,
+            "color": 0,
+            "hoist": False,
+            "managed": False,
+            "mentionable": False,
+        }
+        for index in range(10)
+    ]
+    role_ids = [role["id"] for role in roles[1:]]
+    return {
+        "id": str(guild_id),
+        "name": f"guild-{guild_id}",
+        "owner_id": str(first_user),
+        "roles": roles,
+        "channels": [],
+        "emojis": [],
+        "stickers": [],
+        "features": [],
+        "large": True,
+        "member_count": members,
+        "members": [
+            _member_payload(first_user + index, role_ids[: index % 4])
+            for index in range(members)
+        ],
+    }
+
+
+def _rss_mb() -> float:
+    from src.tools.loadgen import _rss_mb
+
+    return _rss_mb()
+
+
+def run_worker(
+    lean: bool, guilds: int, members: int, joins: int, lookups: int, seed: int
+) -> dict[str, Any]:
+    """Load the fixture into a client and return memory and lookup stats."""
+    os.environ.setdefault("DISCORD_TOKEN", "bench")
+    os.environ.setdefault("DISCORD_GM_ROLE_ID", "0")
+    os.environ.setdefault("LLM_API_KEY", "bench")
+    import discord
+
+    from src.bot.client import member_cache_options
+    from src.services.discord_service import DiscordService, get_member_info_cache
+
+    intents = discord.Intents.default()
+    intents.members = True
+    intents.message_content = True
+    client = discord.Client(intents=intents, **member_cache_options(lean))
+    state = client._connection
+
+    gc.collect()
+    rss_before = _rss_mb()
+    guild_ids = []
+    for index in range(guilds):
+        guild_id = 10**17 + index * 1_000_000
+        payload = _guild_payload(guild_id, members, 10**15 + index * members)
+        state._add_guild_from_data(payload)
+        guild_ids.append(guild_id)
+        for offset in range(joins):
+            state.parse_guild_member_add(
+                {
+                    "guild_id": str(guild_id),
+                    **_member_payload(10**16 + index * joins + offset, []),
+                }
+            )
+        del payload
+    gc.collect()
+    rss_loaded = _rss_mb()
+
+    fetches = 0
+
+    async def fake_get_member(guild_id: int, member_id: int) -> dict[str, Any]:
+        nonlocal fetches
+        fetches += 1
+        return _member_payload(int(member_id), [])
+
+    client.http.get_member = fake_get_member  # type: ignore[method-assign]
+    service = DiscordService()
+    rng = random.Random(seed)
+    # Reports cluster on a few raiders, so draw from a small pool of members.
+    pool = [rng.randrange(members) for _ in range(max(1, lookups // 4))]
+
+    async def lookup_all() -> int:
+        found = 0
+        for _ in range(lookups):
+            index = rng.randrange(guilds)
+            guild = state._get_guild(guild_ids[index])
+            user_id = 10**15 + index * members + rng.choice(pool)
+            found += await service.get_member_info(guild, user_id) is not None
+        return found
+
+    found = asyncio.run(lookup_all())
+    gc.collect()
+    cache = get_member_info_cache()
+    return {
+        "mode": "lean" if lean else "full",
+        "guilds": guilds,
+        "members_per_guild": members,
+        "joins_per_guild": joins,
+        "cached_members": sum(len(guild._members) for guild in state.guilds),
+        "rss_mb": {
+            "baseline": rss_before,
+            "loaded": rss_loaded,
+            "after_lookups": _rss_mb(),
+        },
+        "lookups": lookups,
+        "found": found,
+        "rest_fetches": fetches,
+        "member_cache": {"size": len(cache), "hits": cache.hits},
+    }
+
+
+def main() -> None:
+    """Run both modes in subprocesses and compare."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--guilds", type=int, default=2)
+    parser.add_argument("--members", type=int, default=100_000, help="Per guild")
+    parser.add_argument("--joins", type=int, default=5_000, help="Per guild")
+    parser.add_argument("--lookups", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print a JSON result")
+    parser.add_argument("--worker", choices=("lean", "full"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_worker(
+            args.worker == "lean",
+            args.guilds,
+            args.members,
+            args.joins,
+            args.lookups,
+            args.seed,
+        )
+        print(json.dumps(result))
+        return
+
+    results = []
+    for mode in ("full", "lean"):
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "src.tools.bench_member_cache",
+                "--worker",
+                mode,
+                "--guilds",
+                str(args.guilds),
+                "--members",
+                str(args.members),
+                "--joins",
+                str(args.joins),
+                "--lookups",
+                str(args.lookups),
+                "--seed",
+                str(args.seed),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        rss = result["rss_mb"]
+        print(
+            f"{result['mode']:<5} cached members {result['cached_members']:>8}  "
+            f"RSS {rss['baseline']:.0f} -> {rss['loaded']:.0f} MB "
+            f"(+{rss['loaded'] - rss['baseline']:.0f})  "
+            f"lookups {result['found']}/{result['lookups']}, "
+            f"REST fetches {result['rest_fetches']}, "
+            f"cache hits {result['member_cache']['hits']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""Measure the memory a queued or in-flight report keeps alive.
+
+Builds real discord.py objects from gateway payloads: a guild with a text
+channel, spam messages with an attachment and an embed, and report
+messages replying to them (a reply carries the referenced message, as
+``on_message`` receives it). Then it keeps ``--reports`` queue entries
+alive the old way (a ``functools.partial`` over both ``discord.Message``
+objects) and the new way (a ``ReportTask``) and compares the traced
+allocations per report. The in-flight comparison adds what the pipeline
+held during the LLM call: the fetched reported ``Member`` before, the
+prompt's user-info dict now.
+
+Examples::
+
+    python -m src.tools.bench_report_task --reports 5000
+    python -m src.tools.bench_report_task --content-chars 1500 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import gc
+import itertools
+import json
+import os
+import tracemalloc
+from typing import Any, Callable
+
+_TIMESTAMP = "2026-10-19T08:00:00.000000+00:00"
+
+
+def _user(user_id: int) -> dict[str, Any]:
+    return {
+        "id": str(user_id),
+        "username": f"user{user_id % 10_000_000}",
+        "discriminator": "0",
+        "global_name": f"User {user_id % 1000}",
+        "avatar": "a" * 32,
+    }
+
+
+def _member(role_ids: list[str]) -> dict[str, Any]:
+    return {
+        "roles": role_ids,
+        "joined_at": _TIMESTAMP,
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+def _message(
+    message_id: int,
+    guild_id: int,
+    channel_id: int,
+    author_id: int,
+    content: str,
+    role_ids: list[str],
+    *,
+    extras: bool,
+    referenced: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    payload: dict[str, Any] = {
+        "id": str(message_id),
+        "channel_id": str(channel_id),
+        "guild_id": str(guild_id),
+        "author": _user(author_id),
+        "member": _member(role_ids),
+        "content": content,
+        "timestamp": _TIMESTAMP,
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+        "flags": 0,
+    }
+    if extras:
+        payload["attachments"] = [
+            {
+                "id": str(message_id + 1),
+                "filename": "claim.png",
+                "size": 48213,
+                "url": f"https://cdn.discordapp.com/attachments/{channel_id}/"
+                f"{message_id}/claim.png",
+                "proxy_url": f"https://media.discordapp.net/attachments/"
+                f"{channel_id}/{message_id}/claim.png",
+                "content_type": "image/png",
+                "width": 512,
+                "height": 512,
+            }
+        ]
+        payload["embeds"] = [
+            {
+                "type": "rich",
+                "title": "Free Nitro",
+                "description": "Claim your gift before it expires",
+                "url": "https://bit.ly/nitro-claim",
+                "color": 5793266,
+            }
+        ]
+    if referenced is not None:
+        payload["type"] = 19
+        payload["message_reference"] = {
+            "message_id": referenced["id"],
+            "channel_id": str(channel_id),
+            "guild_id": str(guild_id),
+        }
+        payload["referenced_message"] = referenced
+        payload["mentions"] = [{**_user(int(referenced["author"]["id"]))}]
+    return payload
+
+
+def _traced(build: Callable[[], list[Any]]) -> tuple[list[Any], int]:
+    """Objects returned by ``build`` and the bytes they keep alive."""
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    gc.collect()
+    return kept, tracemalloc.get_traced_memory()[0] - before
+
+
+async def _handle_report(**_: Any) -> None:
+    return None
+
+
+def run(reports: int, content_chars: int, extras: bool) -> dict[str, Any]:
+    """Build the fixture and measure both representations."""
+    os.environ.setdefault("DISCORD_TOKEN", "bench")
+    os.environ.setdefault("DISCORD_GM_ROLE_ID", "0")
+    os.environ.setdefault("LLM_API_KEY", "bench")
+    import discord
+
+    from src.services.discord_service import DiscordService
+    from src.services.handover import pending_report
+    from src.services.report_task import ReportTask
+
+    intents = discord.Intents.default()
+    intents.members = True
+    intents.message_content = True
+    # The lean member cache, so fetched members are only held by reports.
+    client = discord.Client(
+        intents=intents,
+        member_cache_flags=discord.MemberCacheFlags.none(),
+        max_messages=None,
+    )
+    state = client._connection
+    guild_id, channel_id = 10**17, 10**17 + 1
+    roles = [
+        {
+            "id": str(guild_id + 100 + index),
+            "name": "@everyone" if index == 0 else f"role{index}",
+            "permissions": "0",
+            "position": index,
+            "color": 0,
+            "hoist": False,
+            "managed": False,
+            "mentionable": False,
+        }
+        for index in range(6)
+    ]
+    role_ids = [role["id"] for role in roles[1:3]]
+    state._add_guild_from_data(
+        {
+            "id": str(guild_id),
+            "name": "bench",
+            "owner_id": "1",
+            "roles": roles,
+            "channels": [
+                {
+                    "id": str(channel_id),
+                    "type": 0,
+                    "name": "general",
+                    "position": 0,
+                    "permission_overwrites": [],
+                }
+            ],
+            "emojis": [],
+            "stickers": [],
+            "features": [],
+            "member_count": 2,
+            "members": [],
+        }
+    )
+    guild = state._get_guild(guild_id)
+    channel = guild.get_channel(channel_id)
+    ids = itertools.count(10**18, 10)
+    text = ("免费领取 Nitro 加我私聊 https://bit.ly/claim " * 50)[:content_chars]
+
+    def messages() -> list[tuple[Any, Any]]:
+        pairs = []
+        for index in range(reports):
+            spammer, reporter = 10**16 + index, 10**15 + index
+            spam = _message(
+                next(ids), guild_id, channel_id, spammer, text, role_ids, extras=extras
+            )
+            report = _message(
+                next(ids),
+                guild_id,
+                channel_id,
+                reporter,
+                "<@1> 这是垃圾",
+                [],
+                extras=False,
+                referenced=spam,
+            )
+            message = discord.Message(state=state, channel=channel, data=report)
+            pairs.append((message, message.reference.resolved))
+        return pairs
+
+    def member(user_id: int) -> Any:
+        data = {**_member(role_ids), "user": _user(user_id)}
+        return discord.Member(data=data, guild=guild, state=state)
+
+    def old_queue() -> list[Any]:
+        return [
+            (
+                0.0,
+                index,
+                functools.partial(
+                    _handle_report,
+                    report_message=report,
+                    reported_message=spam,
+                    report_reason="这是垃圾",
+                ),
+                pending_report(ReportTask.from_messages(report, spam, "这是垃圾")),
+            )
+            for index, (report, spam) in enumerate(messages())
+        ]
+
+    def new_queue() -> list[Any]:
+        entries = []
+        for index, (report, spam) in enumerate(messages()):
+            task = ReportTask.from_messages(report, spam, "这是垃圾")
+            entries.append(
+                (
+                    0.0,
+                    index,
+                    functools.partial(_handle_report, task, client),
+                    pending_report(task),
+                )
+            )
+        return entries
+
+    service = DiscordService()
+    tracemalloc.start()
+    # Before: the worker held the fetched Member next to both messages.
+    old, old_bytes = _traced(old_queue)
+    reported_ids = [entry[2].keywords["reported_message"].author.id for entry in old]
+    _, old_member_bytes = _traced(lambda: [member(user_id) for user_id in reported_ids])
+    del old
+    # Now: only the prompt's user-info dict outlives the member lookup.
+    new, new_bytes = _traced(new_queue)
+    _, new_info_bytes = _traced(
+        lambda: [
+            service.get_user_info(member(entry[2].args[0].reported_user_id))
+            for entry in new
+        ]
+    )
+    tracemalloc.stop()
+    task = new[0][2].args[0]
+    return {
+        "reports": reports,
+        "content_chars": content_chars,
+        "attachment_and_embed": extras,
+        "queued_bytes_per_report": {
+            "messages": old_bytes / reports,
+            "report_task": new_bytes / reports,
+        },
+        "inflight_bytes_per_report": {
+            "messages": (old_bytes + old_member_bytes) / reports,
+            "report_task": (new_bytes + new_info_bytes) / reports,
+        },
+        "report_task_has_dict": hasattr(task, "__dict__"),
+    }
+
+
+def main() -> None:
+    """Measure and print bytes per queued and in-flight report."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--reports", type=int, default=5000)
+    parser.add_argument("--content-chars", type=int, default=300)
+    parser.add_argument(
+        "--plain", action="store_true", help="No attachment or embed on the spam"
+    )
+    parser.add_argument("--json", action="store_true", help="Print a JSON result")
+    args = parser.parse_args()
+
+    result = run(args.reports, args.content_chars, not args.plain)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    for name in ("queued", "inflight"):
+        sizes = result[f"{name}_bytes_per_report"]
+        before, after = sizes["messages"], sizes["report_task"]
+        print(
+            f"{name:<8} {before / 1024:6.1f} KB -> {after / 1024:5.1f} KB per report "
+            f"({before / after:.1f}x less), "
+            f"{before * result['reports'] / 1024 / 1024:.1f} -> "
+            f"{after * result['reports'] / 1024 / 1024:.1f} MB for "
+            f"{result['reports']} reports"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Benchmark report full-text search on a large synthetic table.
+
+Seeds a SQLite database with synthetic reports (or reuses one given with
+``--db``), builds the search index and times ``/api/reports/search``-style
+queries: first pages by relevance (within ``--window`` newest matches, as
+the API does) and by recency, with and without a guild filter, plus paging
+deep into a broad query with the cursor.
+
+Examples::
+
+    python -m src.tools.bench_search --rows 1000000
+    python -m src.tools.bench_search --db ./data/search-bench.db --queries 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from src.tools.bench_export import _set_environment, seed
+from src.utils.helpers import percentile
+
+_QUERIES = ("客服", "USDT", "免费领取", "nitro giveaway", "空投 私聊", "公告", "wallet")
+
+
+def main() -> None:
+    """Seed, index and time searches."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--db", type=Path, help="Reuse or create this SQLite file")
+    parser.add_argument("--queries", type=int, default=100, help="Runs per case")
+    parser.add_argument("--pages", type=int, default=50, help="Pages to walk")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--reindex", action="store_true", help="Rebuild (and time) the index"
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=10000,
+        help="SEARCH_RELEVANCE_WINDOW for relevance searches, 0 = rank all",
+    )
+    args = parser.parse_args()
+
+    db_path = args.db or Path(tempfile.mkdtemp(prefix="llm-guard-search-")) / "bench.db"
+    _set_environment(db_path)
+    from sqlalchemy import func, select, text
+
+    from src.database import get_read_session, get_session, init_db
+    from src.database.models import ReportLog
+    from src.database.repository import SearchRepository, rebuild_search_index
+    from src.database.search import SEARCH_TABLE
+
+    if not db_path.exists():
+        started = time.perf_counter()
+        seed(args.rows, args.seed)
+        print(f"Seeded {args.rows} reports in {time.perf_counter() - started:.0f}s")
+    init_db()
+    with get_session() as session:
+        total = session.scalar(select(func.count(ReportLog.id)))
+        indexed = session.scalar(text(f"SELECT count(*) FROM {SEARCH_TABLE}"))
+    if indexed != total or args.reindex:
+        size = db_path.stat().st_size
+        started = time.perf_counter()
+        rebuild_search_index(batch_size=5000)
+        elapsed = time.perf_counter() - started
+        growth = (db_path.stat().st_size - size) / 1024 / 1024
+        print(
+            f"Indexed {total} reports in {elapsed:.0f}s "
+            f"({total / elapsed:.0f}/s), database +{growth:.0f} MB"
+        )
+
+    repo = SearchRepository()
+    with get_read_session() as session:
+        guild_id = session.scalar(select(ReportLog.guild_id).limit(1))
+        cases = [
+            ("relevance", {}),
+            ("recent", {}),
+            ("relevance+guild", {"guild_id": guild_id}),
+            ("recent+guild", {"guild_id": guild_id}),
+        ]
+        for name, extra in cases:
+            order = name.split("+")[0]
+            for query in _QUERIES:
+                timings = []
+                hits = []
+                for _ in range(args.queries):
+                    started = time.perf_counter()
+                    floor = 0
+                    if order == "relevance" and args.window:
+                        floor = repo.relevance_floor(
+                            session, query, args.window, **extra
+                        )
+                    hits = repo.search(
+                        session, query, order=order, floor=floor, limit=21, **extra
+                    )
+                    timings.append(time.perf_counter() - started)
+                timings.sort()
+                print(
+                    f"{name:<16} {query:<16} p50 {percentile(timings, 50) * 1000:7.1f} "
+                    f"ms  p99 {percentile(timings, 99) * 1000:7.1f} ms  "
+                    f"({len(hits)} hits on page 1)"
+                )
+
+        for order in ("relevance", "recent"):
+            after = None
+            started = time.perf_counter()
+            floor = 0
+            if order == "relevance" and args.window:
+                floor = repo.relevance_floor(session, "客服", args.window)
+            for _ in range(args.pages):
+                hits = repo.search(
+                    session, "客服", order=order, after=after, floor=floor, limit=20
+                )
+                if not hits:
+                    break
+                last_id, score = hits[-1]
+                after = (score, last_id) if order == "relevance" else (last_id,)
+            elapsed = time.perf_counter() - started
+            print(
+                f"Paging '客服' by {order}: {args.pages} pages, "
+                f"{elapsed / args.pages * 1000:.1f} ms/page"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""Benchmark SQLite write throughput per SQLITE_PROFILE.
+
+Each profile runs in a fresh interpreter against a new database file. Reports
+go through the same three write transactions the bot uses (create with
+history snapshots, LLM result, action result plus rollups), issued from
+``asyncio.to_thread`` workers like ``handle_report``. Console reads run
+alongside them in a background thread.
+
+Examples::
+
+    python -m src.tools.bench_sqlite_writes --reports 2000 --concurrency 32
+    python -m src.tools.bench_sqlite_writes --profiles production --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from src.utils.helpers import percentile
+
+
+def _summary_ms(values: list[float]) -> dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "p50": percentile(ordered, 50) * 1000,
+        "p99": percentile(ordered, 99) * 1000,
+        "max": (ordered[-1] if ordered else 0.0) * 1000,
+    }
+
+
+async def _run(reports: int, concurrency: int, history: int) -> dict[str, Any]:
+    from sqlalchemy import event
+
+    from src.database import get_read_session, init_db
+    from src.database.repository import ReportRepository, _get_engine
+    from src.services.moderation_service import (
+        _create_report_sync,
+        _update_action_result_sync,
+        _update_llm_result_sync,
+    )
+    from src.services.report_task import ReportTask
+    from src.tools.fakes import (
+        FakeDiscord,
+        FakeGuild,
+        FakeMessage,
+        FakeUser,
+        next_snowflake,
+    )
+
+    init_db()
+    commits = 0
+
+    def on_commit(conn) -> None:
+        nonlocal commits
+        commits += 1
+
+    event.listen(_get_engine(), "commit", on_commit)
+
+    discord_state = FakeDiscord()
+    guild = FakeGuild(discord_state, next_snowflake(), "bench")
+    channel = guild.add_channel("general")
+    reporter = guild.add_member(FakeUser(next_snowflake(), "reporter"))
+    repo = ReportRepository()
+    latencies: dict[str, list[float]] = {"create": [], "llm": [], "action": []}
+    errors: dict[str, int] = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed(step: str, func, *args) -> Any:
+        started = time.perf_counter()
+        try:
+            return await asyncio.to_thread(func, *args)
+        except Exception as exc:
+            key = f"{type(exc).__name__}: {str(exc).splitlines()[0][:80]}"
+            errors[key] = errors.get(key, 0) + 1
+            return None
+        finally:
+            latencies[step].append(time.perf_counter() - started)
+
+    async def one_report(index: int) -> None:
+        async with semaphore:
+            member = guild.add_member(FakeUser(next_snowflake(), f"user{index}"))
+            reported = FakeMessage(
+                discord_state=discord_state,
+                channel=channel,
+                author=member,
+                content=f"免费领取 USDT 加我私聊 {index}",
+            )
+            report = FakeMessage(
+                discord_state=discord_state,
+                channel=channel,
+                author=reporter,
+                content="这是垃圾",
+            )
+            items = [
+                {
+                    "id": next_snowflake(),
+                    "author_id": member.id,
+                    "channel_id": channel.id,
+                    "content": f"history {index}-{n} " * 8,
+                    "created_at": "2026-01-01T00:00:00+00:00",
+                    "url": reported.jump_url,
+                }
+                for n in range(history)
+            ]
+            report_id = await timed(
+                "create",
+                _create_report_sync,
+                repo,
+                ReportTask.from_messages(report, reported, "这是垃圾"),
+                member.name,
+                items,
+            )
+            if report_id is None:
+                return
+            await timed(
+                "llm", _update_llm_result_sync, repo, report_id, "BAN", 0.95, "spam"
+            )
+            await timed(
+                "action", _update_action_result_sync, repo, report_id, "BAN", True, None
+            )
+
+    stop = threading.Event()
+    reads = 0
+    read_errors = 0
+
+    def console_reader() -> None:
+        nonlocal reads, read_errors
+        while not stop.is_set():
+            try:
+                with get_read_session() as session:
+                    repo.list_reports(session, limit=50)
+                reads += 1
+            except Exception:
+                read_errors += 1
+            time.sleep(0.01)
+
+    reader = threading.Thread(target=console_reader, daemon=True)
+    reader.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(one_report(index) for index in range(reports)))
+    wall = time.perf_counter() - started
+    stop.set()
+    reader.join()
+
+    return {
+        "reports": reports,
+        "concurrency": concurrency,
+        "wall_seconds": wall,
+        "reports_per_sec": reports / wall if wall else 0.0,
+        "commits_per_sec": commits / wall if wall else 0.0,
+        "latency_ms": {step: _summary_ms(values) for step, values in latencies.items()},
+        "errors": errors,
+        "console_reads": reads,
+        "console_read_errors": read_errors,
+    }
+
+
+def run_worker(profile: str, reports: int, concurrency: int, history: int) -> dict:
+    """Benchmark one profile in this process."""
+    db_dir = tempfile.mkdtemp(prefix="llm-guard-sqlite-")
+    os.environ.update(
+        {
+            "DATABASE_URL": f"sqlite:///{Path(db_dir) / 'bench.db'}",
+            "SQLITE_PROFILE": profile,
+            "DISCORD_TOKEN": os.environ.get("DISCORD_TOKEN", "bench"),
+            "DISCORD_GM_ROLE_ID": os.environ.get("DISCORD_GM_ROLE_ID", "0"),
+            "LLM_API_KEY": os.environ.get("LLM_API_KEY", "bench"),
+        }
+    )
+    result = asyncio.run(_run(reports, concurrency, history))
+    result["profile"] = profile
+    return result
+
+
+def main() -> None:
+    """Run each profile in a subprocess and compare."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--reports", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--history", type=int, default=10, help="Messages/report")
+    parser.add_argument("--profiles", nargs="+", default=["default", "production"])
+    parser.add_argument("--json", action="store_true", help="Print a JSON result")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_worker(args.worker, args.reports, args.concurrency, args.history)
+        print(json.dumps(result))
+        return
+
+    results = []
+    for profile in args.profiles:
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "src.tools.bench_sqlite_writes",
+                "--worker",
+                profile,
+                "--reports",
+                str(args.reports),
+                "--concurrency",
+                str(args.concurrency),
+                "--history",
+                str(args.history),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        create = result["latency_ms"]["create"]
+        action = result["latency_ms"]["action"]
+        print(
+            f"{result['profile']:<10} {result['reports_per_sec']:7.1f} reports/s  "
+            f"{result['commits_per_sec']:7.1f} commits/s  "
+            f"create p50 {create['p50']:6.1f} p99 {create['p99']:7.1f} ms  "
+            f"action p99 {action['p99']:7.1f} ms  "
+            f"errors {sum(result['errors'].values())}  "
+            f"console reads {result['console_reads']} "
+            f"({result['console_read_errors']} failed)"
+        )
+        for message, count in result["errors"].items():
+            print(f"    {count} x {message}")
+
+
+if __name__ == "__main__":
+    main()
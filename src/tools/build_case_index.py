@@ -0,0 +1,118 @@
+"""Build or refresh the similar-case index, and time lookups against it.
+
+Examples::
+
+    python -m src.tools.build_case_index
+    python -m src.tools.build_case_index --rebuild
+    python -m src.tools.build_case_index --synthetic 20000 --queries 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from src.utils.helpers import percentile
+
+_SPAM = (
+    "免费领取 USDT 空投，点击 http://bit.ly/{n} 加客服私聊",
+    "Claim your free nitro giveaway at https://discrod-gift.com/{n}",
+    "稳赚不赔的投资项目，日收益 {n}%，加我私聊",
+    "@everyone airdrop is live, connect wallet at https://claim-{n}.xyz",
+)
+_HAM = (
+    "有人一起打第 {n} 关吗",
+    "这个版本更新了什么，第 {n} 条公告没看懂",
+    "gm everyone, {n} days until the event",
+    "谢谢大家帮忙，问题解决了 {n}",
+)
+
+
+def _synthetic_text(rng: random.Random) -> tuple[str, str]:
+    if rng.random() < 0.5:
+        return rng.choice(_SPAM).format(n=rng.randint(1, 9999)), "BAN"
+    return rng.choice(_HAM).format(n=rng.randint(1, 9999)), "INVALID_REPORT"
+
+
+def main() -> None:
+    """Sync the index from the database, or benchmark a synthetic one."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--rebuild", action="store_true", help="Delete the index and refill it"
+    )
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        default=0,
+        help="Fill a temporary index with this many generated cases "
+        "instead of reading the database",
+    )
+    parser.add_argument(
+        "--queries", type=int, default=200, help="Lookups to time (0 = none)"
+    )
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    from src.config import get_settings
+    from src.services.case_index import CaseIndex, case_index_directory
+
+    settings = get_settings()
+    rng = random.Random(args.seed)
+    temp_dir = None
+    started = time.perf_counter()
+    if args.synthetic:
+        temp_dir = tempfile.mkdtemp(prefix="case-index-")
+        capacity = max(args.synthetic, 1)
+        index = CaseIndex(temp_dir, settings.case_index_dim, capacity)
+        guilds = [rng.randint(10**17, 10**18) for _ in range(4)]
+        for report_id in range(1, args.synthetic + 1):
+            text, decision = _synthetic_text(rng)
+            index.add(report_id, rng.choice(guilds), text, decision)
+        index._save_state()
+        print(f"Indexed {len(index)} synthetic cases", end="")
+    else:
+        from src.database import init_db
+
+        directory = case_index_directory()
+        if args.rebuild and directory.exists():
+            shutil.rmtree(directory)
+        init_db()
+        index = CaseIndex(
+            directory, settings.case_index_dim, settings.case_index_max_cases
+        )
+        added = index.sync_sync()
+        print(f"Indexed {added} new cases ({len(index)} total)", end="")
+    elapsed = time.perf_counter() - started
+    print(f" in {elapsed:.2f}s -> {index.directory}")
+    vector_mb = len(index) * index.dim * 4 / 1024 / 1024
+    print(f"Vectors: {len(index)} x {index.dim} float32 = {vector_mb:.1f} MB mapped")
+
+    if args.queries and len(index):
+        texts = [_synthetic_text(rng)[0] for _ in range(args.queries)]
+        timings = []
+        tracemalloc.start()
+        for text in texts:
+            query_started = time.perf_counter()
+            index.search(text, args.top_k, min_similarity=0.0)
+            timings.append((time.perf_counter() - query_started) * 1000)
+        _, peak = tracemalloc.get_traced_memory()
+        timings.sort()
+        tracemalloc.stop()
+        print(
+            f"Lookup top-{args.top_k} over {len(index)} cases: "
+            f"p50 {percentile(timings, 50):.2f} ms, "
+            f"p99 {percentile(timings, 99):.2f} ms, "
+            f"peak allocation {peak / 1024 / 1024:.1f} MB"
+        )
+
+    if temp_dir is not None:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Manage the link domain reputation list.
+
+Examples::
+
+    python -m src.tools.domains block scam-claim.xyz --note "fake nitro"
+    python -m src.tools.domains allow discord.com
+    python -m src.tools.domains clear scam-claim.xyz
+    python -m src.tools.domains import blocklist.txt
+    python -m src.tools.domains list --status block
+
+``import`` reads one domain per line (``#`` starts a comment) and blocks
+them all. Running bots pick changes up within ``DOMAIN_CACHE_SECONDS``.
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from src.database import get_read_session, get_session, init_db
+from src.database.repository import DomainRepository
+from src.services.links import normalize_domain
+
+
+def _read_domains(path: Path) -> list[str]:
+    domains = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        value = line.split("#", 1)[0].strip()
+        # Hosts-file style lines ("0.0.0.0 example.com") keep the last field.
+        domain = normalize_domain(value.split()[-1]) if value else None
+        if domain:
+            domains.append(domain)
+    return domains
+
+
+def main() -> None:
+    """Run one domain list command."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("block", "allow", "clear"):
+        command = commands.add_parser(name)
+        command.add_argument("domains", nargs="+")
+        command.add_argument("--note")
+    import_command = commands.add_parser("import")
+    import_command.add_argument("file", type=Path)
+    import_command.add_argument("--note")
+    list_command = commands.add_parser("list")
+    list_command.add_argument("--status", choices=("block", "allow"))
+    list_command.add_argument("--limit", type=int, default=1000)
+    args = parser.parse_args()
+
+    init_db()
+    repo = DomainRepository()
+    if args.command == "list":
+        with get_read_session() as session:
+            rows = repo.list_domains(session, args.status, args.limit)
+        for row in rows:
+            print(
+                f"{row.domain:<40} {row.status or '-':<6} "
+                f"bans={row.ban_count} invalid={row.invalid_count} {row.note or ''}"
+            )
+        return
+
+    if args.command == "import":
+        domains = _read_domains(args.file)
+        status = "block"
+    else:
+        domains = [normalize_domain(value) for value in args.domains]
+        domains = [domain for domain in domains if domain]
+        status = None if args.command == "clear" else args.command
+    with get_session() as session:
+        for domain in domains:
+            repo.set_status(session, domain, status, args.note)
+    print(f"{args.command}: {len(domains)} domains")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Export report logs as NDJSON, CSV or Parquet.
+
+Rows are streamed from the database (read replica when configured), so
+memory use stays flat regardless of table size. Parquet needs pyarrow.
+
+Examples::
+
+    python -m src.tools.export_reports -o reports.ndjson
+    python -m src.tools.export_reports --format csv --decision BAN --since 2026-01-01
+    python -m src.tools.export_reports --format parquet -o reports.parquet --history
+    python -m src.tools.export_reports --guild-id 123 --after-id 500000 | gzip > tail.gz
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
+
+from src.database import init_db
+from src.database.export import (
+    EXPORT_FORMATS,
+    ExportFilter,
+    export_available,
+    iter_export,
+)
+
+
+def _timestamp(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def main() -> None:
+    """Run the export."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    parser.add_argument("--guild-id", type=int)
+    parser.add_argument("--decision", help="BAN, INVALID_REPORT or NEED_GM")
+    parser.add_argument("--status", help="e.g. RESOLVED or PENDING")
+    parser.add_argument("--since", type=_timestamp, help="created_at >= (ISO, UTC)")
+    parser.add_argument("--until", type=_timestamp, help="created_at < (ISO, UTC)")
+    parser.add_argument("--after-id", type=int, help="Only ids above this (resume)")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument(
+        "--history", action="store_true", help="Fill in history message contents"
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    if not export_available(args.format):
+        parser.error("Parquet export needs pyarrow: pip install pyarrow")
+    if args.format == "parquet" and not args.output and sys.stdout.isatty():
+        parser.error("refusing to write Parquet to a terminal; use -o")
+
+    init_db()
+    filters = ExportFilter(
+        guild_id=args.guild_id,
+        decision=args.decision,
+        status=args.status,
+        since=args.since,
+        until=args.until,
+        after_id=args.after_id,
+        limit=args.limit,
+    )
+    started = time.perf_counter()
+    written = 0
+    with (
+        open(args.output, "wb") if args.output else nullcontext(sys.stdout.buffer)
+    ) as output:
+        for chunk in iter_export(args.format, filters, args.batch_size, args.history):
+            output.write(chunk)
+            written += len(chunk)
+        output.flush()
+    elapsed = time.perf_counter() - started
+    print(
+        f"Exported {written / 1024 / 1024:.1f} MB of {args.format} "
+        f"in {elapsed:.1f}s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
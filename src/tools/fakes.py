@@ -0,0 +1,239 @@
+"""In-memory stand-ins for discord.py objects used by replay and load tools.
+
+Only the attributes and coroutines the bot pipeline touches are implemented.
+Every Discord "HTTP" call sleeps for ``FakeDiscord.http_latency`` seconds so
+runs include realistic REST round-trips without talking to Discord.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator
+
+import discord
+
+_snowflakes = itertools.count(1_300_000_000_000_000_000)
+
+
+def next_snowflake() -> int:
+    """Return a unique, increasing fake snowflake."""
+    return next(_snowflakes)
+
+
+@dataclass
+class FakeDiscord:
+    """Shared knobs and counters for a fake Discord deployment."""
+
+    http_latency: float = 0.0
+    http_jitter: float = 0.0
+    calls: dict[str, int] = field(default_factory=dict)
+    bans: list[tuple[int, int, float]] = field(default_factory=list)
+    replies: int = 0
+
+    async def http(self, route: str) -> None:
+        self.calls[route] = self.calls.get(route, 0) + 1
+        delay = self.http_latency
+        if self.http_jitter:
+            delay += random.uniform(0, self.http_jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class FakeRole:
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+
+class FakeUser:
+    """Minimal ``discord.User``/``discord.Member``."""
+
+    def __init__(
+        self,
+        user_id: int,
+        name: str,
+        *,
+        bot: bool = False,
+        created_at: datetime | None = None,
+        joined_at: datetime | None = None,
+        roles: list[str] | None = None,
+    ) -> None:
+        now = datetime.now(timezone.utc)
+        self.id = user_id
+        self.name = name
+        self.bot = bot
+        self.created_at = created_at or now - timedelta(days=365)
+        self.joined_at = joined_at or now - timedelta(days=30)
+        self.roles = [FakeRole(role) for role in (roles or ["@everyone"])]
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+    def __eq__(self, other: object) -> bool:
+        return getattr(other, "id", None) == self.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+
+class FakeReference:
+    def __init__(self, message_id: int, resolved: Any = None) -> None:
+        self.message_id = message_id
+        self.resolved = resolved
+
+
+class FakeMessage:
+    """Minimal ``discord.Message``."""
+
+    def __init__(
+        self,
+        *,
+        discord_state: FakeDiscord,
+        channel: FakeChannel,
+        author: FakeUser,
+        content: str,
+        mentions: list[FakeUser] | None = None,
+        reference: FakeReference | None = None,
+        created_at: datetime | None = None,
+        message_id: int | None = None,
+    ) -> None:
+        self._discord = discord_state
+        self.id = message_id or next_snowflake()
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.mentions = mentions or []
+        self.reference = reference
+        self.created_at = created_at or datetime.now(timezone.utc)
+        self.attachments: list[Any] = []
+        self.received_at = time.perf_counter()
+
+    @property
+    def jump_url(self) -> str:
+        return (
+            f"https://discord.com/channels/{self.guild.id}/{self.channel.id}/{self.id}"
+        )
+
+    async def reply(self, content: str, mention_author: bool = True) -> FakeMessage:
+        await self._discord.http("reply")
+        self._discord.replies += 1
+        return FakeMessage(
+            discord_state=self._discord,
+            channel=self.channel,
+            author=self.author,
+            content=content,
+        )
+
+
+class FakePartialMessage:
+    """``discord.PartialMessage``: a message id to reply to."""
+
+    def __init__(self, channel: FakeChannel, message_id: int) -> None:
+        self.channel = channel
+        self.id = message_id
+
+    async def reply(self, content: str, mention_author: bool = True) -> None:
+        await self.channel._discord.http("reply")
+        self.channel._discord.replies += 1
+
+
+class FakeChannel:
+    """Minimal text channel keeping its recent messages in memory."""
+
+    def __init__(
+        self, discord_state: FakeDiscord, guild: FakeGuild, channel_id: int, name: str
+    ) -> None:
+        self._discord = discord_state
+        self.guild = guild
+        self.id = channel_id
+        self.name = name
+        self.messages: list[FakeMessage] = []
+
+    def add_message(self, message: FakeMessage, keep: int = 500) -> None:
+        self.messages.append(message)
+        if len(self.messages) > keep:
+            del self.messages[: len(self.messages) - keep]
+
+    async def history(self, limit: int | None = 100) -> AsyncIterator[FakeMessage]:
+        await self._discord.http("history")
+        for message in reversed(self.messages[-limit:] if limit else self.messages):
+            yield message
+
+    async def fetch_message(self, message_id: int) -> FakeMessage:
+        await self._discord.http("fetch_message")
+        for message in reversed(self.messages):
+            if message.id == message_id:
+                return message
+        raise discord.NotFound(_FakeResponse(404), "Unknown Message")
+
+    def get_partial_message(self, message_id: int) -> FakePartialMessage:
+        return FakePartialMessage(self, message_id)
+
+    async def send(self, content: str) -> None:
+        await self._discord.http("send")
+
+
+class FakeGuild:
+    """Minimal guild with a member map and ban recording."""
+
+    def __init__(self, discord_state: FakeDiscord, guild_id: int, name: str) -> None:
+        self._discord = discord_state
+        self.id = guild_id
+        self.name = name
+        self.members: dict[int, FakeUser] = {}
+        self.channels: list[FakeChannel] = []
+
+    def add_channel(self, name: str) -> FakeChannel:
+        channel = FakeChannel(self._discord, self, next_snowflake(), name)
+        self.channels.append(channel)
+        return channel
+
+    def add_member(self, member: FakeUser) -> FakeUser:
+        self.members[member.id] = member
+        return member
+
+    def get_member(self, user_id: int) -> FakeUser | None:
+        return self.members.get(user_id)
+
+    async def fetch_member(self, user_id: int) -> FakeUser:
+        await self._discord.http("fetch_member")
+        member = self.members.get(user_id)
+        if member is None:
+            raise discord.NotFound(_FakeResponse(404), "Unknown Member")
+        return member
+
+    async def ban(self, member: FakeUser, delete_message_days: int = 0) -> None:
+        await self._discord.http("ban")
+        self._discord.bans.append((self.id, member.id, time.perf_counter()))
+
+
+class FakeClient:
+    """The cache lookups of ``discord.Client`` the report pipeline uses."""
+
+    def __init__(self, user: FakeUser, guilds: list[FakeGuild]) -> None:
+        self.user = user
+        self.guilds = guilds
+
+    def get_guild(self, guild_id: int) -> FakeGuild | None:
+        return next((guild for guild in self.guilds if guild.id == guild_id), None)
+
+    def get_channel(self, channel_id: int) -> FakeChannel | None:
+        for guild in self.guilds:
+            for channel in guild.channels:
+                if channel.id == channel_id:
+                    return channel
+        return None
+
+
+class _FakeResponse:
+    """Just enough of ``aiohttp.ClientResponse`` for discord.HTTPException."""
+
+    def __init__(self, status: int) -> None:
+        self.status = status
+        self.reason = "fake"
@@ -0,0 +1,588 @@
+"""Load generator that simulates a Discord spam raid end to end.
+
+Synthetic messages are dispatched to the real ``on_message`` handler from
+``register_event_handlers`` the same way discord.py does it (one task per
+event), with stub Discord REST calls and a local stub LLM server. While the
+raid runs the generator samples in-flight handlers, event-loop lag, RSS and
+database commits, and it records time-to-ban for every banned spammer.
+
+Examples::
+
+    python -m src.tools.loadgen --reports 500 --duration 30 --guilds 5
+    python -m src.tools.loadgen --arrival burst --burst-size 100 --json
+    python -m src.tools.loadgen --reporter-pool 40 --workers 8 --fifo
+
+``--reporter-pool`` draws reporters from a fixed pool whose reputation is
+seeded up front: trusted reporters report the spam, serial false reporters
+report harmless messages. Comparing a run with ``--fifo`` shows what the
+reputation-ordered report queue does to time-to-ban. ``--proactive`` turns
+on the proactive scanner, so spam can be banned before the report arrives.
+
+``--sigterm SECONDS`` sends the process a SIGTERM mid-raid. It goes through
+the bot's own signal handlers to a real ``LLMGuardBot`` without a gateway,
+whose shutdown stops the scanner, drains the report queue, flushes the
+status history and closes the HTTP sessions. A second scheduler then
+resumes the handed-over reports, as the next process would, and the run
+checks that every report was resolved::
+
+    python -m src.tools.loadgen --reports 500 --duration 10 --sigterm 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import signal
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from src.tools.fakes import (
+    FakeClient,
+    FakeDiscord,
+    FakeGuild,
+    FakeMessage,
+    FakeReference,
+    FakeUser,
+    next_snowflake,
+)
+from src.tools.replay import configure_environment
+from src.tools.stub_llm import SPAM_KEYWORDS, StubLLMConfig, StubLLMServer
+from src.utils.helpers import percentile
+
+
+class FakeBot(FakeClient):
+    """Just enough of ``commands.Bot`` for ``register_event_handlers``."""
+
+    def __init__(self, user: FakeUser, guilds: list[FakeGuild]) -> None:
+        super().__init__(user, guilds)
+        self.handlers: dict[str, Callable[..., Awaitable[None]]] = {}
+
+    def event(
+        self, coro: Callable[..., Awaitable[None]]
+    ) -> Callable[..., Awaitable[None]]:
+        self.handlers[coro.__name__] = coro
+        return coro
+
+    async def process_commands(self, message: FakeMessage) -> None:
+        return None
+
+    async def wait_for_db(self) -> None:
+        return None
+
+
+def arrival_offsets(
+    count: int, duration: float, mode: str, burst_size: int, rng: random.Random
+) -> list[float]:
+    """Arrival times (seconds from start) for ``count`` reports."""
+    if mode == "burst":
+        bursts = max(1, -(-count // burst_size))
+        gap = duration / bursts
+        return [(index // burst_size) * gap for index in range(count)]
+    rate = count / duration
+    offsets, now = [], 0.0
+    for _ in range(count):
+        now += rng.expovariate(rate)
+        offsets.append(now)
+    return offsets
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm", encoding="ascii") as handle:
+            pages = int(handle.read().split()[1])
+        return pages * resource.getpagesize() / 1024 / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class _Sampler:
+    """Periodic sampler of in-flight handlers, loop lag, RSS and DB commits."""
+
+    def __init__(
+        self,
+        interval: float,
+        inflight: set[asyncio.Task],
+        queue_depth: Callable[[], int],
+    ) -> None:
+        self.interval = interval
+        self.inflight = inflight
+        self.queue_depth = queue_depth
+        self.commits = 0
+        self.lags: list[float] = []
+        self.timeline: list[dict[str, float]] = []
+        self._task: asyncio.Task | None = None
+        self._started = time.perf_counter()
+
+    def on_commit(self, *_: Any) -> None:
+        self.commits += 1
+
+    async def _run(self) -> None:
+        last_commits = 0
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - expected)
+            self.lags.append(lag)
+            self.timeline.append(
+                {
+                    "t": time.perf_counter() - self._started,
+                    "inflight": len(self.inflight),
+                    "queued": self.queue_depth(),
+                    "loop_lag_ms": lag * 1000,
+                    "rss_mb": _rss_mb(),
+                    "db_commits_per_sec": (self.commits - last_commits) / self.interval,
+                }
+            )
+            last_commits = self.commits
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+async def run_load(
+    *,
+    reports: int,
+    duration: float,
+    guild_count: int,
+    arrival: str,
+    burst_size: int,
+    spam_ratio: float,
+    chatter_per_report: int,
+    discord_latency: float,
+    sample_interval: float,
+    seed: int,
+    reporter_pool: int = 0,
+    sigterm: float | None = None,
+) -> dict[str, Any]:
+    """Run one raid simulation and return its measurements."""
+    from sqlalchemy import event
+
+    from src.bot.events import register_event_handlers
+    from src.database import init_db
+    from src.database.repository import _get_engine
+    from src.services import scheduler as scheduler_module
+    from src.services.proactive import get_proactive_scanner
+    from src.services.scheduler import get_report_scheduler
+
+    await asyncio.to_thread(init_db)
+    rng = random.Random(seed)
+    discord_state = FakeDiscord(
+        http_latency=discord_latency, http_jitter=discord_latency
+    )
+    guilds = [
+        FakeGuild(discord_state, next_snowflake(), f"guild-{i}")
+        for i in range(guild_count)
+    ]
+    channels = [guild.add_channel("general") for guild in guilds]
+    bot_user = FakeUser(next_snowflake(), "guard-bot", bot=True)
+    bot = FakeBot(bot_user, guilds)
+    register_event_handlers(bot)  # type: ignore[arg-type]
+    on_message = bot.handlers["on_message"]
+
+    scheduler = get_report_scheduler()
+    # Even indexes are trusted reporters, odd ones serial false reporters.
+    pool = [
+        [
+            guild.add_member(FakeUser(next_snowflake(), f"pool{i}"))
+            for i in range(reporter_pool)
+        ]
+        for guild in guilds
+    ]
+    scheduler.tracker.preload(
+        {
+            member.id: (20, 1, 2) if index % 2 == 0 else (1, 20, 1)
+            for members in pool
+            for index, member in enumerate(members)
+        }
+    )
+
+    inflight: set[asyncio.Task] = set()
+    sampler = _Sampler(sample_interval, inflight, lambda: scheduler.qsize)
+    engine = _get_engine()
+    event.listen(engine, "commit", sampler.on_commit)
+
+    reported_at: dict[int, float] = {}
+    spammers: set[int] = set()
+    targets: list[int] = []
+    guard = None
+    # Handed-over reports are fetched again after the raid, so keep them.
+    keep = 500 if sigterm is None else reports * (chatter_per_report + 2)
+    if sigterm is not None:
+        import aiohttp
+
+        from src.bot.client import get_bot
+        from src.main import _install_signal_handlers
+        from src.services import attachments
+        from src.services.links import get_link_resolver
+        from src.services.status_history import get_status_history
+
+        guard = get_bot()
+        # The loop-bound state login() would set up; there is no gateway.
+        await guard.__aenter__()
+        _install_signal_handlers(guard)
+        # What a running bot holds at shutdown: open HTTP sessions and
+        # status samples that have not been written yet.
+        get_link_resolver()._get_session()
+        if attachments._http is None:
+            attachments._http = aiohttp.ClientSession()
+        get_status_history().record(0, guild_count, 0, None, None)
+        loop = asyncio.get_running_loop()
+        loop.call_later(sigterm, os.kill, os.getpid(), signal.SIGTERM)
+    now = datetime.now(timezone.utc)
+
+    def dispatch(message: FakeMessage) -> None:
+        task = asyncio.create_task(on_message(message))
+        inflight.add(task)
+        task.add_done_callback(inflight.discard)
+
+    async def raid_report(index: int) -> None:
+        channel = channels[index % len(channels)]
+        guild = channel.guild
+        is_spam = rng.random() < spam_ratio
+        age = rng.randint(0, 3) if is_spam else rng.randint(200, 2000)
+        author = guild.add_member(
+            FakeUser(
+                next_snowflake(),
+                f"member{index}",
+                created_at=now - timedelta(days=age),
+                joined_at=now - timedelta(hours=rng.randint(1, 48)),
+            )
+        )
+        if reporter_pool:
+            members = pool[index % len(channels)]
+            pair = rng.randrange(len(members) // 2)
+            reporter = members[pair * 2 + (not is_spam)]
+        else:
+            reporter = guild.add_member(
+                FakeUser(next_snowflake(), f"reporter{index}")
+            )
+        for _ in range(chatter_per_report):
+            chatter = FakeMessage(
+                discord_state=discord_state,
+                channel=channel,
+                author=reporter,
+                content="有人吗",
+            )
+            channel.add_message(chatter, keep=keep)
+            dispatch(chatter)
+        if is_spam:
+            words = rng.sample(SPAM_KEYWORDS, 2)
+            content = f"{words[0]} {words[1]} https://bit.ly/{index}"
+            spammers.add(author.id)
+        else:
+            content = "今天的活动几点开始？"
+        target = FakeMessage(
+            discord_state=discord_state, channel=channel, author=author, content=content
+        )
+        channel.add_message(target, keep=keep)
+        targets.append(target.id)
+        dispatch(target)
+        report = FakeMessage(
+            discord_state=discord_state,
+            channel=channel,
+            author=reporter,
+            content=f"<@{bot_user.id}> 这是垃圾",
+            mentions=[bot_user],
+            reference=FakeReference(target.id),
+        )
+        channel.add_message(report, keep=keep)
+        reported_at[author.id] = time.perf_counter()
+        dispatch(report)
+
+    offsets = arrival_offsets(reports, duration, arrival, burst_size, rng)
+    rss_start = _rss_mb()
+    sampler.start()
+    started = time.perf_counter()
+    for index, offset in enumerate(offsets):
+        delay = started + offset - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await raid_report(index)
+    arrivals_done = time.perf_counter() - started
+    while inflight:
+        await asyncio.gather(*list(inflight), return_exceptions=True)
+    scanner = get_proactive_scanner()
+    if scanner is not None and guard is None:
+        # Let the scanner finish its last batch and drain what it escalated.
+        await asyncio.sleep(scanner.interval * 2)
+        await scheduler.join()
+        await scanner.stop()
+    await scheduler.join()
+    shutdown = None
+    if guard is not None and guard._closing is not None:
+        from src.services import attachments
+        from src.services.handover import resume_pending_reports
+        from src.services.links import get_link_resolver
+        from src.services.status_history import get_status_history
+
+        # Waits for the shutdown the signal started.
+        await guard.close()
+        # Totals, including reports that arrived after the drain started.
+        shutdown = {
+            "submitted": scheduler.submitted,
+            "finished": scheduler.finished,
+            "handed_over": scheduler.handed_over,
+            "lost": scheduler.lost,
+            "scanner_stopped": scanner is None or scanner._task is None,
+            "status_unflushed": len(get_status_history()),
+            "status_rows": await asyncio.to_thread(_count_status_samples),
+            "http_closed": attachments._http is None
+            and get_link_resolver()._session is None,
+            "bot_closed": guard.is_closed(),
+        }
+        # A fresh scheduler stands in for the next process.
+        scheduler_module._scheduler = None
+        shutdown["resumed"] = await resume_pending_reports(bot)
+        await get_report_scheduler().join()
+        shutdown["resolved"] = await asyncio.to_thread(_count_resolved, targets)
+        shutdown["dropped"] = reports - shutdown["resolved"]
+    drained = time.perf_counter() - started
+    await sampler.stop()
+    event.remove(engine, "commit", sampler.on_commit)
+
+    time_to_ban = sorted(
+        banned_at - reported_at[member_id]
+        for _, member_id, banned_at in discord_state.bans
+        if member_id in reported_at
+    )
+    lags = sorted(sampler.lags)
+    timeline = sampler.timeline
+    return {
+        "reports": reports,
+        "guilds": guild_count,
+        "arrival": arrival,
+        "duration_target_seconds": duration,
+        "arrivals_seconds": arrivals_done,
+        "drain_seconds": drained,
+        "throughput_per_sec": reports / drained if drained else 0.0,
+        "spam_reports": len(spammers),
+        "bans": len(discord_state.bans),
+        "missed_bans": len(
+            spammers - {member_id for _, member_id, _ in discord_state.bans}
+        ),
+        "time_to_ban_ms": {
+            "p50": percentile(time_to_ban, 50) * 1000,
+            "p95": percentile(time_to_ban, 95) * 1000,
+            "p99": percentile(time_to_ban, 99) * 1000,
+            "max": (time_to_ban[-1] if time_to_ban else 0.0) * 1000,
+        },
+        "inflight_peak": max((row["inflight"] for row in timeline), default=0),
+        "queued_peak": max((row["queued"] for row in timeline), default=0),
+        "workers": scheduler.workers,
+        "priority": scheduler.priority_window > 0,
+        "loop_lag_ms": {
+            "p50": percentile(lags, 50) * 1000,
+            "p99": percentile(lags, 99) * 1000,
+            "max": (lags[-1] if lags else 0.0) * 1000,
+        },
+        "rss_mb": {
+            "start": rss_start,
+            "peak": max((row["rss_mb"] for row in timeline), default=rss_start),
+        },
+        "db_commits": sampler.commits,
+        "db_commits_per_sec": {
+            "mean": sampler.commits / drained if drained else 0.0,
+            "peak": max((row["db_commits_per_sec"] for row in timeline), default=0.0),
+        },
+        "discord_calls": discord_state.calls,
+        "proactive": dict(scanner.stats) if scanner is not None else None,
+        "shutdown": shutdown,
+        "timeline": timeline,
+    }
+
+
+def _count_status_samples() -> int:
+    from sqlalchemy import func, select
+
+    from src.database import get_session
+    from src.database.models import StatusSample
+
+    with get_session() as session:
+        return session.scalar(select(func.count()).select_from(StatusSample)) or 0
+
+
+def _count_resolved(message_ids: list[int]) -> int:
+    """How many of the reported messages have a resolved report."""
+    from sqlalchemy import func, select
+
+    from src.database import get_read_session
+    from src.database.models import ReportLog
+
+    resolved = 0
+    with get_read_session() as session:
+        for start in range(0, len(message_ids), 500):
+            stmt = select(
+                func.count(func.distinct(ReportLog.reported_message_id))
+            ).where(
+                ReportLog.reported_message_id.in_(message_ids[start : start + 500]),
+                ReportLog.status.in_(("DONE", "FAILED")),
+            )
+            resolved += session.scalar(stmt) or 0
+    return resolved
+
+
+def _print_summary(result: dict[str, Any]) -> None:
+    print(
+        f"{result['reports']} reports over {result['guilds']} guilds "
+        f"({result['arrival']}, target {result['duration_target_seconds']:.0f}s): "
+        f"arrivals {result['arrivals_seconds']:.1f}s, "
+        f"drained {result['drain_seconds']:.1f}s, "
+        f"{result['throughput_per_sec']:.1f} reports/s"
+    )
+    ban = result["time_to_ban_ms"]
+    print(
+        f"bans {result['bans']}/{result['spam_reports']} "
+        f"(missed {result['missed_bans']})  "
+        f"time-to-ban p50 {ban['p50']:.0f} ms  p95 {ban['p95']:.0f} ms  "
+        f"p99 {ban['p99']:.0f} ms"
+    )
+    lag = result["loop_lag_ms"]
+    print(
+        f"in-flight peak {result['inflight_peak']}  "
+        f"queued peak {result['queued_peak']} "
+        f"({result['workers']} workers, "
+        f"{'priority' if result['priority'] else 'fifo'})  "
+        f"loop lag p50 {lag['p50']:.1f} ms  p99 {lag['p99']:.1f} ms  "
+        f"max {lag['max']:.1f} ms"
+    )
+    print(
+        f"RSS {result['rss_mb']['start']:.0f} -> {result['rss_mb']['peak']:.0f} MB  "
+        f"DB commits {result['db_commits']} "
+        f"(mean {result['db_commits_per_sec']['mean']:.1f}/s, "
+        f"peak {result['db_commits_per_sec']['peak']:.1f}/s)"
+    )
+    if result["proactive"] is not None:
+        scan = result["proactive"]
+        print(
+            f"proactive scan: {scan['seen']} seen, {scan['scanned']} scanned, "
+            f"{scan['escalated']} escalated, {scan['dropped']} dropped"
+        )
+    if result["shutdown"] is not None:
+        shutdown = result["shutdown"]
+        print(
+            f"SIGTERM drain: {shutdown['submitted']} submitted, "
+            f"{shutdown['finished']} finished, "
+            f"{shutdown['handed_over']} handed over, {shutdown['lost']} lost; "
+            f"{shutdown['resumed']} resumed, {shutdown['resolved']}/"
+            f"{result['reports']} resolved ({shutdown['dropped']} dropped)"
+        )
+    llm = result["llm"]
+    print(f"LLM stub: {llm['requests']} requests, {llm['errors']} injected errors")
+
+
+def main() -> None:
+    """Run the load generator."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--reports", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds")
+    parser.add_argument("--guilds", type=int, default=5)
+    parser.add_argument("--arrival", choices=("poisson", "burst"), default="poisson")
+    parser.add_argument("--burst-size", type=int, default=50)
+    parser.add_argument("--spam-ratio", type=float, default=0.8)
+    parser.add_argument(
+        "--chatter", type=int, default=2, help="Normal messages per report"
+    )
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Seconds")
+    parser.add_argument("--llm-jitter", type=float, default=0.5, help="Seconds")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--discord-latency", type=float, default=0.05, help="Seconds")
+    parser.add_argument(
+        "--reporter-pool",
+        type=int,
+        default=0,
+        help="Reporters per guild with seeded reputation, 0 = one per report",
+    )
+    parser.add_argument("--workers", type=int, help="Override REPORT_WORKERS")
+    parser.add_argument(
+        "--fifo", action="store_true", help="Disable reputation priority"
+    )
+    parser.add_argument(
+        "--proactive", action="store_true", help="Enable proactive scanning"
+    )
+    parser.add_argument(
+        "--sigterm", type=float, help="Send SIGTERM this many seconds in"
+    )
+    parser.add_argument(
+        "--drain-timeout",
+        type=float,
+        default=15.0,
+        help="SHUTDOWN_DRAIN_SECONDS for --sigterm",
+    )
+    parser.add_argument("--sample-interval", type=float, default=0.25, help="Seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--json", action="store_true", help="Print a JSON result")
+    parser.add_argument("--output", help="Also write the JSON result to this file")
+    args = parser.parse_args()
+    if args.reporter_pool == 1:
+        parser.error("--reporter-pool needs at least 2 reporters")
+
+    server = StubLLMServer(
+        StubLLMConfig(
+            latency=args.llm_latency,
+            jitter=args.llm_jitter,
+            error_rate=args.llm_error_rate,
+        )
+    )
+    configure_environment(server.start(), args.database_url)
+    if args.sigterm is not None:
+        os.environ["SHUTDOWN_DRAIN_SECONDS"] = str(args.drain_timeout)
+    if args.workers is not None:
+        os.environ["REPORT_WORKERS"] = str(args.workers)
+    if args.proactive:
+        os.environ["PROACTIVE_SCAN_ENABLED"] = "true"
+        os.environ.setdefault("PROACTIVE_MAX_PER_MINUTE", "0")
+    if args.fifo:
+        os.environ["REPORT_PRIORITY_ENABLED"] = "false"
+    try:
+        result = asyncio.run(
+            run_load(
+                reports=args.reports,
+                duration=args.duration,
+                guild_count=args.guilds,
+                arrival=args.arrival,
+                burst_size=args.burst_size,
+                spam_ratio=args.spam_ratio,
+                chatter_per_report=args.chatter,
+                discord_latency=args.discord_latency,
+                sample_interval=args.sample_interval,
+                seed=args.seed,
+                reporter_pool=args.reporter_pool,
+                sigterm=args.sigterm,
+            )
+        )
+    finally:
+        server.stop()
+
+    result["llm"] = {
+        "latency": args.llm_latency,
+        "jitter": args.llm_jitter,
+        "error_rate": args.llm_error_rate,
+        "requests": server.requests,
+        "errors": server.errors,
+    }
+    result["recorded_at"] = datetime.now(timezone.utc).isoformat()
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2), encoding="utf-8")
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        _print_summary(result)
+
+
+if __name__ == "__main__":
+    main()
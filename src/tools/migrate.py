@@ -0,0 +1,41 @@
+"""Show or apply schema migrations.
+
+The bot and the API apply pending migrations on start; this tool lets a
+deploy step run them ahead of time.
+
+Examples::
+
+    python -m src.tools.migrate status
+    python -m src.tools.migrate upgrade
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from src.database.migrations import current_version, load_migrations, upgrade
+from src.database.repository import _get_engine
+
+
+def main() -> None:
+    """Run the migration CLI."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("command", choices=("status", "upgrade"))
+    args = parser.parse_args()
+
+    engine = _get_engine()
+    if args.command == "upgrade":
+        applied = upgrade(engine)
+        print(f"applied: {applied or 'nothing, already up to date'}")
+
+    current = current_version(engine)
+    print(f"database version: {current if current is not None else 'unversioned'}")
+    for migration in load_migrations():
+        state = "applied" if (current or 0) >= migration.version else "pending"
+        print(f"  {migration.version:04d} {state:<8} {migration.description}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Rebuild report rollup tables from report_logs."""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+from src.database import get_session, init_db
+from src.database.repository import ArchiveRepository, rebuild_rollups
+
+
+def main() -> None:
+    """Run the rollup backfill."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--batch-size", type=int, default=5000, help="Rows fetched per streaming batch"
+    )
+    parser.add_argument(
+        "--since",
+        type=datetime.fromisoformat,
+        default=None,
+        help="Only rebuild buckets from this ISO date on; never before the "
+        "day after the latest archive cutoff (default: that day, or everything)",
+    )
+    args = parser.parse_args()
+
+    since = args.since
+    if since is not None and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    init_db()
+    # Archived rows are gone from report_logs; keep their buckets intact.
+    with get_session() as session:
+        watermark = ArchiveRepository().get_watermark(session)
+    if watermark is not None and (since is None or since < watermark):
+        since = watermark
+    started = time.perf_counter()
+    processed = rebuild_rollups(batch_size=args.batch_size, since=since)
+    elapsed = time.perf_counter() - started
+    print(f"Rebuilt rollups from {processed} resolved reports in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
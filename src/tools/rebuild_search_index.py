@@ -0,0 +1,28 @@
+"""Rebuild the full-text search documents of every report."""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from src.database import init_db
+from src.database.repository import rebuild_search_index
+
+
+def main() -> None:
+    """Run the search index rebuild."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--batch-size", type=int, default=2000, help="Reports indexed per transaction"
+    )
+    args = parser.parse_args()
+
+    init_db()
+    started = time.perf_counter()
+    indexed = rebuild_search_index(batch_size=args.batch_size)
+    elapsed = time.perf_counter() - started
+    print(f"Indexed {indexed} reports for search in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,574 @@
+"""Offline replay and benchmark harness for the moderation pipeline.
+
+Recorded or synthetic reports are pushed through the real ``handle_report``
+with fake Discord objects, a throwaway SQLite database and a local stub
+OpenAI-compatible server.
+
+Recorded reports are JSON lines::
+
+    {"reason": "这是诈骗",
+     "message": {"content": "..."},
+     "history": [{"content": "...", "created_at": "..."}],
+     "member": {"name": "...", "created_at": "...", "joined_at": "...",
+                "roles": ["@everyone"]},
+     "expected": "BAN"}
+
+Examples::
+
+    python -m src.tools.replay --synthetic 500 --concurrency 50
+    python -m src.tools.replay --input reports.jsonl --llm-error-rate 0.05 --json
+    python -m src.tools.replay --synthetic 500 --compare-cascade
+
+``--links`` points the synthetic spam links at the stub's fake shortener and
+enables link expansion; ``--block-domains N`` blocks the first N of its final
+domains, so those reports are banned without an LLM call.
+
+``--small-model`` enables the two-tier model cascade (the stub answers for
+that model faster and less reliably). ``--compare-cascade`` replays the same
+cases with the large model only and with the cascade, in separate processes,
+and reports how often they agree and what the cascade saves.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from src.tools.fakes import (
+    FakeClient,
+    FakeDiscord,
+    FakeGuild,
+    FakeMessage,
+    FakeReference,
+    FakeUser,
+    next_snowflake,
+)
+from src.tools.stub_llm import (
+    SPAM_KEYWORDS,
+    StubLLMConfig,
+    StubLLMServer,
+    stub_link_domain,
+)
+from src.utils.helpers import percentile
+
+_HAM = ("大家好", "今天天气不错", "有人一起玩吗", "gm", "这个版本更新了什么", "谢谢")
+
+
+def configure_environment(llm_base_url: str, database_url: str | None) -> str:
+    """Point settings at the stub LLM and a throwaway database.
+
+    Must run before anything calls ``get_settings``. Returns the database URL.
+    """
+    if database_url is None:
+        db_dir = tempfile.mkdtemp(prefix="llm-guard-replay-")
+        database_url = f"sqlite:///{Path(db_dir) / 'replay.db'}"
+    os.environ.update(
+        {
+            "DATABASE_URL": database_url,
+            "LLM_BASE_URL": llm_base_url,
+            "LLM_API_KEY": "stub",
+            "DISCORD_TOKEN": os.environ.get("DISCORD_TOKEN", "replay"),
+            "DISCORD_GM_ROLE_ID": os.environ.get("DISCORD_GM_ROLE_ID", "0"),
+            # Synthetic links must not reach the internet; --links opts in.
+            "LINK_ANALYSIS_ENABLED": "false",
+        }
+    )
+    return database_url
+
+
+def synthetic_cases(
+    count: int, seed: int = 7, link_base: str = "https://bit.ly"
+) -> list[dict[str, Any]]:
+    """Generate a mix of obvious spam, borderline and harmless reports.
+
+    Spam links point at ``{link_base}/{index}``.
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    cases = []
+    for index in range(count):
+        roll = rng.random()
+        if roll < 0.4:
+            words = rng.sample(SPAM_KEYWORDS, 3)
+            content = f"{words[0]} {words[1]} 私聊 {words[2]} {link_base}/{index}"
+            expected, account_age = "BAN", rng.randint(0, 5)
+        elif roll < 0.6:
+            content = f"有没有人需要{rng.choice(SPAM_KEYWORDS)}，可以问我"
+            expected, account_age = "NEED_GM", rng.randint(10, 200)
+        else:
+            content = rng.choice(_HAM)
+            expected, account_age = "INVALID_REPORT", rng.randint(100, 2000)
+        history = [
+            {
+                "content": content if expected == "BAN" else rng.choice(_HAM),
+                "created_at": (now - timedelta(minutes=m)).isoformat(),
+            }
+            for m in range(rng.randint(0, 10))
+        ]
+        cases.append(
+            {
+                "reason": "这是垃圾" if expected != "INVALID_REPORT" else "看着可疑",
+                "message": {"content": content},
+                "history": history,
+                "member": {
+                    "name": f"user{index}",
+                    "created_at": (now - timedelta(days=account_age)).isoformat(),
+                    "joined_at": (
+                        now - timedelta(days=min(account_age, 3))
+                    ).isoformat(),
+                    "roles": ["@everyone"],
+                },
+                "expected": expected,
+            }
+        )
+    return cases
+
+
+def load_cases(path: str) -> list[dict[str, Any]]:
+    """Load recorded reports from a JSON lines file."""
+    with open(path, encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def _parse_time(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+def build_report(
+    discord_state: FakeDiscord,
+    guild: FakeGuild,
+    reporter: FakeUser,
+    bot_user: FakeUser,
+    case: dict[str, Any],
+) -> tuple[FakeMessage, FakeMessage]:
+    """Materialize one case as (report_message, reported_message)."""
+    member_info = case.get("member", {})
+    member = guild.add_member(
+        FakeUser(
+            member_info.get("id") or next_snowflake(),
+            member_info.get("name", "reported"),
+            bot=member_info.get("bot", False),
+            created_at=_parse_time(member_info.get("created_at")),
+            joined_at=_parse_time(member_info.get("joined_at")),
+            roles=member_info.get("roles"),
+        )
+    )
+    channel = guild.add_channel(f"replay-{len(guild.channels)}")
+    for item in reversed(case.get("history", [])):
+        channel.add_message(
+            FakeMessage(
+                discord_state=discord_state,
+                channel=channel,
+                author=member,
+                content=item.get("content", ""),
+                created_at=_parse_time(item.get("created_at")),
+            )
+        )
+    reported = FakeMessage(
+        discord_state=discord_state,
+        channel=channel,
+        author=member,
+        content=case["message"]["content"],
+    )
+    channel.add_message(reported)
+    report = FakeMessage(
+        discord_state=discord_state,
+        channel=channel,
+        author=reporter,
+        content=f"<@{bot_user.id}> {case.get('reason', '')}",
+        mentions=[bot_user],
+        reference=FakeReference(reported.id, reported),
+    )
+    channel.add_message(report)
+    return report, reported
+
+
+def _summarize(values: list[float]) -> dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "p50": percentile(ordered, 50) * 1000,
+        "p95": percentile(ordered, 95) * 1000,
+        "p99": percentile(ordered, 99) * 1000,
+        "mean": (statistics.fmean(ordered) if ordered else 0.0) * 1000,
+        "max": (ordered[-1] if ordered else 0.0) * 1000,
+    }
+
+
+async def run_replay(
+    cases: list[dict[str, Any]],
+    *,
+    concurrency: int,
+    discord_latency: float,
+    blocked_domains: list[str] | None = None,
+) -> dict[str, Any]:
+    """Run every case through ``handle_report`` and collect timings."""
+    from src.database import get_session, init_db
+    from src.database.models import ReportLog
+    from src.database.repository import DomainRepository
+    from src.services.links import get_link_resolver
+    from src.services.moderation_service import handle_report
+    from src.services.report_task import ReportTask
+    from src.utils.helpers import normalize_report_reason
+    from src.utils.timing import collect_stage_timings
+
+    await asyncio.to_thread(init_db)
+    if blocked_domains:
+        with get_session() as session:
+            for domain in blocked_domains:
+                DomainRepository().set_status(session, domain, "block")
+    discord_state = FakeDiscord(http_latency=discord_latency)
+    guild = FakeGuild(discord_state, next_snowflake(), "replay")
+    bot_user = FakeUser(next_snowflake(), "guard-bot", bot=True)
+    reporter = guild.add_member(FakeUser(next_snowflake(), "reporter"))
+    client = FakeClient(bot_user, [guild])
+    prepared = [
+        build_report(discord_state, guild, reporter, bot_user, case) for case in cases
+    ]
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    stage_values: dict[str, list[float]] = {}
+    failures = 0
+
+    async def run_one(report: FakeMessage, reported: FakeMessage) -> None:
+        nonlocal failures
+        async with semaphore:
+            with collect_stage_timings() as timings:
+                started = time.perf_counter()
+                try:
+                    reason = normalize_report_reason(report.content, bot_user.id)
+                    await handle_report(
+                        ReportTask.from_messages(report, reported, reason), client
+                    )
+                except Exception as exc:
+                    failures += 1
+                    print(f"[REPLAY] case failed: {type(exc).__name__}: {exc}")
+                latencies.append(time.perf_counter() - started)
+            for name, value in timings.items():
+                stage_values.setdefault(name, []).append(value)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_one(report, reported) for report, reported in prepared))
+    wall = time.perf_counter() - started
+    await get_link_resolver().close()
+
+    def load_decisions() -> dict[int, tuple]:
+        with get_session() as session:
+            rows = session.query(
+                ReportLog.reported_message_id,
+                ReportLog.llm_decision,
+                ReportLog.llm_tier,
+                ReportLog.llm_small_tokens,
+                ReportLog.llm_small_latency_ms,
+                ReportLog.llm_large_tokens,
+                ReportLog.llm_large_latency_ms,
+            )
+            return {row[0]: tuple(row[1:]) for row in rows}
+
+    decided = await asyncio.to_thread(load_decisions)
+    decisions: dict[str, int] = {}
+    case_decisions: list[str] = []
+    tiers: dict[str, int] = {}
+    llm_latencies: list[float] = []
+    tokens = 0
+    matched = labelled = 0
+    for case, (_, reported) in zip(cases, prepared):
+        row = decided.get(reported.id) or (None,) * 6
+        decision, tier, small_tokens, small_ms, large_tokens, large_ms = row
+        decision = decision or "NONE"
+        case_decisions.append(decision)
+        decisions[decision] = decisions.get(decision, 0) + 1
+        tiers[tier or "none"] = tiers.get(tier or "none", 0) + 1
+        if small_ms is not None or large_ms is not None:
+            llm_latencies.append(((small_ms or 0.0) + (large_ms or 0.0)) / 1000)
+            tokens += (small_tokens or 0) + (large_tokens or 0)
+        if case.get("expected"):
+            labelled += 1
+            matched += decision == case["expected"]
+
+    return {
+        "cases": len(cases),
+        "concurrency": concurrency,
+        "wall_seconds": wall,
+        "throughput_per_sec": len(cases) / wall if wall else 0.0,
+        "latency_ms": _summarize(latencies),
+        "stages_ms": {
+            name: _summarize(values) for name, values in stage_values.items()
+        },
+        "decisions": decisions,
+        "case_decisions": case_decisions,
+        "accuracy": matched / labelled if labelled else None,
+        "llm_tiers": tiers,
+        "llm_cost": {
+            "calls_latency_ms": _summarize(llm_latencies),
+            "tokens": tokens,
+        },
+        "failures": failures,
+        "discord_calls": discord_state.calls,
+    }
+
+
+def _print_summary(result: dict[str, Any]) -> None:
+    latency = result["latency_ms"]
+    print(
+        f"{result['cases']} reports, concurrency {result['concurrency']}: "
+        f"{result['throughput_per_sec']:.1f} reports/s "
+        f"in {result['wall_seconds']:.2f}s"
+    )
+    print(
+        f"end-to-end  p50 {latency['p50']:8.1f} ms  p95 {latency['p95']:8.1f} ms  "
+        f"p99 {latency['p99']:8.1f} ms"
+    )
+    for name, values in result["stages_ms"].items():
+        print(
+            f"{name:<11} p50 {values['p50']:8.1f} ms  p95 {values['p95']:8.1f} ms  "
+            f"p99 {values['p99']:8.1f} ms"
+        )
+    print(f"decisions: {result['decisions']}  accuracy: {result['accuracy']}")
+    cost = result["llm_cost"]
+    print(
+        f"LLM tiers: {result['llm_tiers']}  "
+        f"LLM time/report mean {cost['calls_latency_ms']['mean']:.1f} ms  "
+        f"tokens {cost['tokens']}"
+    )
+    llm = result["llm"]
+    print(f"LLM stub: {llm['requests']} requests, {llm['errors']} injected errors")
+    if "links" in result:
+        links = result["links"]
+        print(
+            f"Links: {links['hop_requests']} redirect hops served, "
+            f"blocked domains {links['blocked_domains'] or 'none'}"
+        )
+
+
+def compare_cascade(large: dict[str, Any], cascade: dict[str, Any]) -> dict:
+    """Agreement and savings of a cascade run against a large-model-only run."""
+    pairs = list(zip(large["case_decisions"], cascade["case_decisions"]))
+    agreed = sum(a == b for a, b in pairs)
+    large_ms = large["llm_cost"]["calls_latency_ms"]
+    cascade_ms = cascade["llm_cost"]["calls_latency_ms"]
+    decided = sum(cascade["llm_tiers"].get(tier, 0) for tier in ("small", "large"))
+    return {
+        "cases": len(pairs),
+        "agreement": agreed / len(pairs) if pairs else None,
+        "disagreements": {
+            f"{a}->{b}": sum(1 for pair in pairs if pair == (a, b))
+            for a, b in sorted({pair for pair in pairs if pair[0] != pair[1]})
+        },
+        "small_tier_share": (
+            cascade["llm_tiers"].get("small", 0) / decided if decided else None
+        ),
+        "llm_latency_mean_ms": {
+            "large_only": large_ms["mean"],
+            "cascade": cascade_ms["mean"],
+        },
+        "llm_latency_p95_ms": {
+            "large_only": large_ms["p95"],
+            "cascade": cascade_ms["p95"],
+        },
+        "end_to_end_p50_ms": {
+            "large_only": large["latency_ms"]["p50"],
+            "cascade": cascade["latency_ms"]["p50"],
+        },
+        "accuracy": {"large_only": large["accuracy"], "cascade": cascade["accuracy"]},
+        "large_model_calls": {
+            "large_only": large["llm"]["requests"],
+            "cascade": cascade["llm_tiers"].get("large", 0),
+        },
+        "tokens": {
+            "large_only": large["llm_cost"]["tokens"],
+            "cascade": cascade["llm_cost"]["tokens"],
+        },
+    }
+
+
+def _print_comparison(result: dict[str, Any]) -> None:
+    mean = result["llm_latency_mean_ms"]
+    p95 = result["llm_latency_p95_ms"]
+    e2e = result["end_to_end_p50_ms"]
+    saved = 1 - mean["cascade"] / mean["large_only"] if mean["large_only"] else 0.0
+    print(
+        f"{result['cases']} reports: cascade agrees with large-only on "
+        f"{result['agreement']:.1%}  {result['disagreements']}"
+    )
+    print(
+        f"small tier decided {result['small_tier_share']:.1%}; "
+        f"large-model calls {result['large_model_calls']['large_only']} -> "
+        f"{result['large_model_calls']['cascade']}; tokens (both tiers) "
+        f"{result['tokens']['large_only']} -> {result['tokens']['cascade']}"
+    )
+    print(
+        f"LLM time/report mean {mean['large_only']:.0f} -> {mean['cascade']:.0f} ms "
+        f"({saved:.0%} saved), p95 {p95['large_only']:.0f} -> {p95['cascade']:.0f} ms; "
+        f"end-to-end p50 {e2e['large_only']:.0f} -> {e2e['cascade']:.0f} ms"
+    )
+    accuracy = result["accuracy"]
+    print(
+        f"accuracy large-only {accuracy['large_only']}  cascade {accuracy['cascade']}"
+    )
+
+
+def _run_subprocess(args: argparse.Namespace, small_model: str | None) -> dict:
+    command = [
+        sys.executable,
+        "-m",
+        "src.tools.replay",
+        *(["--input", args.input] if args.input else []),
+        *(["--synthetic", str(args.synthetic)] if args.synthetic else []),
+        "--seed",
+        str(args.seed),
+        "--concurrency",
+        str(args.concurrency),
+        "--llm-latency",
+        str(args.llm_latency),
+        "--llm-jitter",
+        str(args.llm_jitter),
+        "--llm-error-rate",
+        str(args.llm_error_rate),
+        "--discord-latency",
+        str(args.discord_latency),
+        "--small-latency",
+        str(args.small_latency),
+        *(["--small-model", small_model] if small_model else []),
+        "--json",
+    ]
+    stdout = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    # Skip the "[DB] ..." lines printed before the JSON result.
+    return json.loads(stdout[stdout.index("{") :])
+
+
+def main() -> None:
+    """Run the replay harness."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="JSON lines file with recorded reports")
+    source.add_argument("--synthetic", type=int, help="Generate N synthetic reports")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds")
+    parser.add_argument("--llm-jitter", type=float, default=0.2, help="Seconds")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--discord-latency", type=float, default=0.05, help="Seconds")
+    parser.add_argument(
+        "--small-model", help="Enable the model cascade with this small model"
+    )
+    parser.add_argument(
+        "--small-latency", type=float, default=0.15, help="Small model seconds"
+    )
+    parser.add_argument(
+        "--compare-cascade",
+        action="store_true",
+        help="Replay with and without the cascade and compare",
+    )
+    parser.add_argument(
+        "--links",
+        action="store_true",
+        help="Route spam links through the stub shortener and expand them",
+    )
+    parser.add_argument(
+        "--link-latency", type=float, default=0.05, help="Seconds per redirect hop"
+    )
+    parser.add_argument(
+        "--block-domains",
+        type=int,
+        default=0,
+        help="With --links, block this many of the 4 stub scam domains",
+    )
+    parser.add_argument(
+        "--database-url", default=None, help="Database URL (default: temp SQLite)"
+    )
+    parser.add_argument("--json", action="store_true", help="Print a JSON result")
+    parser.add_argument("--output", help="Also write the JSON result to this file")
+    args = parser.parse_args()
+
+    if args.compare_cascade:
+        small_model = args.small_model or "gpt-4o-mini"
+        result = compare_cascade(
+            _run_subprocess(args, None), _run_subprocess(args, small_model)
+        )
+        result["small_model"] = small_model
+        if args.output:
+            Path(args.output).write_text(json.dumps(result, indent=2), encoding="utf-8")
+        if args.json:
+            print(json.dumps(result, indent=2))
+        else:
+            _print_comparison(result)
+        return
+
+    small_models = {args.small_model} if args.small_model else set()
+    server = StubLLMServer(
+        StubLLMConfig(
+            latency=args.llm_latency,
+            jitter=args.llm_jitter,
+            error_rate=args.llm_error_rate,
+            model_latency={model: args.small_latency for model in small_models},
+            weak_models=small_models,
+            link_latency=args.link_latency,
+        )
+    )
+    base_url = server.start()
+    link_base = f"{server.root_url}/bit.ly" if args.links else "https://bit.ly"
+    cases = (
+        load_cases(args.input)
+        if args.input
+        else synthetic_cases(args.synthetic, args.seed, link_base)
+    )
+    configure_environment(base_url, args.database_url)
+    if args.small_model:
+        os.environ["LLM_SMALL_MODEL"] = args.small_model
+    blocked_domains = []
+    if args.links:
+        os.environ["LINK_ANALYSIS_ENABLED"] = "true"
+        os.environ["LINK_ALLOW_PRIVATE_HOSTS"] = "true"
+        blocked_domains = [
+            stub_link_domain(code, server.config.link_domains)
+            for code in range(args.block_domains)
+        ]
+    try:
+        result = asyncio.run(
+            run_replay(
+                cases,
+                concurrency=args.concurrency,
+                discord_latency=args.discord_latency,
+                blocked_domains=blocked_domains,
+            )
+        )
+    finally:
+        server.stop()
+
+    result["llm"] = {
+        "latency": args.llm_latency,
+        "jitter": args.llm_jitter,
+        "error_rate": args.llm_error_rate,
+        "requests": server.requests,
+        "errors": server.errors,
+    }
+    if args.links:
+        result["links"] = {
+            "hop_requests": server.link_requests,
+            "blocked_domains": blocked_domains,
+        }
+    result["recorded_at"] = datetime.now(timezone.utc).isoformat()
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2), encoding="utf-8")
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        _print_summary(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Local OpenAI-compatible stub server for replay and load tools.
+
+The server answers ``POST /v1/chat/completions`` with a JSON verdict derived
+from keywords in the prompt, after a configurable delay, and fails a
+configurable fraction of requests with HTTP 500. Models listed as weak answer
+like a small model: less sure, and occasionally wrong. It runs on its own event loop
+in a background thread so it does not compete with the code under test.
+
+It also stands in for a link shortener: ``/bit.ly/<n>`` redirects to
+``/t/<n>``, which redirects to ``http://scam<n % link_domains>.invalid/claim``
+(a domain that never resolves), each hop after ``link_latency`` seconds.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+
+from aiohttp import web
+
+SPAM_KEYWORDS = (
+    "USDT",
+    "空投",
+    "返利",
+    "客服",
+    "airdrop",
+    "giveaway",
+    "bit.ly",
+    "稳赚",
+)
+
+
+@dataclass
+class StubLLMConfig:
+    """Behaviour of the stub server."""
+
+    latency: float = 0.5
+    jitter: float = 0.2
+    error_rate: float = 0.0
+    model_latency: dict[str, float] = field(default_factory=dict)
+    weak_models: set[str] = field(default_factory=set)
+    link_latency: float = 0.05
+    link_domains: int = 4
+
+
+def stub_link_domain(code: int, domains: int) -> str:
+    """Final domain the stub's shortener sends link ``code`` to."""
+    return f"scam{code % domains}.invalid"
+
+
+def stub_verdict(prompt: str, weak: bool = False) -> dict:
+    """Deterministic verdict for a prompt: keyword hits decide the outcome."""
+    message = prompt.split("[被举报消息]", 1)[-1].split("[举报原因]", 1)[0]
+    hits = sum(message.count(keyword) for keyword in SPAM_KEYWORDS)
+    if weak:
+        roll = int(hashlib.md5(message.encode("utf-8")).hexdigest(), 16) % 100
+        if hits >= 2 and roll < 5:
+            # Confidently wrong: the cascade cannot catch these.
+            return {"decision": "INVALID_REPORT", "confidence": 0.9, "reasoning": "?"}
+        if hits == 0 and roll < 10:
+            return {"decision": "BAN", "confidence": 0.6, "reasoning": "可能是广告"}
+    if hits >= 2:
+        return {
+            "decision": "BAN",
+            "confidence": 0.95,
+            "reasoning": "命中多个诈骗关键词",
+        }
+    if hits == 1:
+        return {"decision": "NEED_GM", "confidence": 0.5, "reasoning": "疑似推广"}
+    return {"decision": "INVALID_REPORT", "confidence": 0.85, "reasoning": "普通聊天"}
+
+
+class StubLLMServer:
+    """OpenAI-compatible chat completions stub running in a thread."""
+
+    def __init__(self, config: StubLLMConfig | None = None, port: int = 0) -> None:
+        self.config = config or StubLLMConfig()
+        self._port = port
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._runner: web.AppRunner | None = None
+        self._thread: threading.Thread | None = None
+        self._ready = threading.Event()
+        self.requests = 0
+        self.errors = 0
+        self.link_requests = 0
+        self.base_url = ""
+        self.root_url = ""
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        body = await request.json()
+        model = body.get("model", "")
+        latency = self.config.model_latency.get(model, self.config.latency)
+        await asyncio.sleep(max(0.0, latency + random.uniform(0, self.config.jitter)))
+        if random.random() < self.config.error_rate:
+            self.errors += 1
+            return web.json_response(
+                {"error": {"message": "stub failure", "type": "server_error"}},
+                status=500,
+            )
+        prompt = body["messages"][-1]["content"]
+        verdict = stub_verdict(prompt, weak=model in self.config.weak_models)
+        content = json.dumps(verdict, ensure_ascii=False)
+        prompt_tokens = len(prompt) // 2
+        return web.json_response(
+            {
+                "id": f"chatcmpl-stub-{self.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": len(content) // 2,
+                    "total_tokens": prompt_tokens + len(content) // 2,
+                },
+            }
+        )
+
+    async def _handle_link(self, request: web.Request) -> web.Response:
+        self.link_requests += 1
+        await asyncio.sleep(self.config.link_latency)
+        code = request.match_info["code"]
+        if request.path.startswith("/bit.ly/"):
+            location = f"/t/{code}"
+        else:
+            domain = stub_link_domain(int(code), self.config.link_domains)
+            location = f"http://{domain}/claim?ref={code}"
+        raise web.HTTPFound(location)
+
+    def _serve(self) -> None:
+        loop = asyncio.new_event_loop()
+        self._loop = loop
+        asyncio.set_event_loop(loop)
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._handle)
+        app.router.add_get(r"/bit.ly/{code:\d+}", self._handle_link)
+        app.router.add_get(r"/t/{code:\d+}", self._handle_link)
+        self._runner = web.AppRunner(app, access_log=None)
+        loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, "127.0.0.1", self._port)
+        loop.run_until_complete(site.start())
+        port = self._runner.addresses[0][1]
+        self.root_url = f"http://127.0.0.1:{port}"
+        self.base_url = f"{self.root_url}/v1"
+        self._ready.set()
+        loop.run_forever()
+        loop.run_until_complete(self._runner.cleanup())
+        loop.close()
+
+    def start(self) -> str:
+        """Start serving; return the OpenAI base URL."""
+        self._thread = threading.Thread(
+            target=self._serve, name="stub-llm", daemon=True
+        )
+        self._thread.start()
+        self._ready.wait()
+        return self.base_url
+
+    def stop(self) -> None:
+        """Stop the server thread."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
@@ -18,3 +18,29 @@ def normalize_report_reason(content: str, bot_user_id: int) -> str:
     return reason or "未提供举报原因"
 
 
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = round(pct / 100 * len(sorted_values)) - 1
+    index = min(len(sorted_values) - 1, max(0, rank))
+    return sorted_values[index]
+
+
+def parse_id_ranges(value: str | None) -> list[int] | None:
+    """Parse "0-3,5" style id lists; None or blank gives None."""
+    if not value or not value.strip():
+        return None
+    ids: list[int] = []
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            low, high = part.split("-", 1)
+            ids.extend(range(int(low), int(high) + 1))
+        else:
+            ids.append(int(part))
+    return sorted(set(ids))
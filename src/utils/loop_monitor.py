@@ -0,0 +1,115 @@
+"""Event-loop lag sampler and slow-callback detector."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+
+from src.utils.helpers import percentile
+
+
+@dataclass(frozen=True)
+class StallSample:
+    """Stack of the event-loop thread captured while it was blocked."""
+
+    captured_at: float
+    stalled_for: float
+    stack: str
+
+
+class LoopLagMonitor:
+    """Measure event-loop lag and capture stacks of callbacks that block it.
+
+    A coroutine on the monitored loop sleeps for ``interval`` seconds and
+    records how late it wakes up. A watchdog thread checks that coroutine's
+    last tick; when the loop has not ticked for ``stack_threshold`` seconds
+    beyond the interval, the loop thread's current stack is captured, which
+    points at the synchronous code that is holding the loop.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.5,
+        warn_threshold: float = 0.1,
+        stack_threshold: float = 0.5,
+        window: int = 720,
+        max_stalls: int = 20,
+    ) -> None:
+        self.interval = interval
+        self.warn_threshold = warn_threshold
+        self.stack_threshold = stack_threshold
+        self._lags: deque[float] = deque(maxlen=window)
+        self.stalls: deque[StallSample] = deque(maxlen=max_stalls)
+        self._last_tick = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Start sampling on the running loop."""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._sample())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-lag-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop sampling."""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _sample(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self._last_tick = now
+            self._lags.append(lag)
+            if lag >= self.warn_threshold:
+                print(f"[LOOP] event loop lagged {lag * 1000:.0f} ms")
+
+    def _watch(self) -> None:
+        stall_started: float | None = None
+        check_every = max(0.05, self.stack_threshold / 4)
+        while not self._stopped.wait(check_every):
+            behind = time.monotonic() - self._last_tick - self.interval
+            if behind < self.stack_threshold:
+                stall_started = None
+                continue
+            if stall_started == self._last_tick:
+                continue
+            stall_started = self._last_tick
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            self.stalls.append(StallSample(time.time(), behind, stack))
+            print(
+                f"[LOOP] event loop blocked for {behind * 1000:.0f} ms, "
+                f"loop thread stack:\n{stack}"
+            )
+
+    def snapshot(self) -> dict[str, float]:
+        """Lag percentiles in milliseconds over the sampling window."""
+        ordered = sorted(self._lags)
+        return {
+            "p50": percentile(ordered, 50) * 1000,
+            "p95": percentile(ordered, 95) * 1000,
+            "p99": percentile(ordered, 99) * 1000,
+            "max": (ordered[-1] if ordered else 0.0) * 1000,
+        }
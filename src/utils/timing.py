@@ -0,0 +1,90 @@
+"""Stage timing helpers."""
+
+from __future__ import annotations
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+_stage_timings: ContextVar[dict[str, float] | None] = ContextVar(
+    "stage_timings", default=None
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a pipeline stage when a collector is active; no-op otherwise."""
+    timings = _stage_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+@contextmanager
+def collect_stage_timings() -> Iterator[dict[str, float]]:
+    """Collect stage durations (seconds) for the current context."""
+    timings: dict[str, float] = {}
+    token = _stage_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _stage_timings.reset(token)
+
+
+def process_started() -> float:
+    """``time.perf_counter()`` reading at process start.
+
+    Read from ``/proc`` on Linux, so interpreter start-up and imports count
+    in wall time; elsewhere it is the time of the call.
+    """
+    now = time.perf_counter()
+    try:
+        with open("/proc/self/stat", encoding="ascii") as handle:
+            stat = handle.read()
+        with open("/proc/uptime", encoding="ascii") as handle:
+            uptime = float(handle.read().split()[0])
+    except OSError:
+        return now
+    # starttime is field 22, in clock ticks after boot; the command name
+    # (field 2) is parenthesized and may contain spaces.
+    ticks = int(stat.rsplit(")", 1)[1].split()[19])
+    elapsed = uptime - ticks / os.sysconf("SC_CLK_TCK")
+    return now - max(elapsed, 0.0)
+
+
+class StartupTimer:
+    """Wall-clock breakdown of process start up to gateway ready."""
+
+    def __init__(self, started: float | None = None) -> None:
+        self.started = time.perf_counter() if started is None else started
+        self._last = self.started
+        self.phases: dict[str, float] = {}
+        self.background: dict[str, float] = {}
+
+    def mark(self, name: str) -> None:
+        """Close the phase running since the previous mark."""
+        now = time.perf_counter()
+        self.phases[name] = now - self._last
+        self._last = now
+
+    def record_background(self, name: str, seconds: float) -> None:
+        """Record work that ran alongside the main phases."""
+        self.background[name] = seconds
+
+    def total(self) -> float:
+        return self._last - self.started
+
+    def summary(self) -> str:
+        parts = [f"{name} {value * 1000:.0f} ms" for name, value in self.phases.items()]
+        parts += [
+            f"{name} {value * 1000:.0f} ms (background)"
+            for name, value in self.background.items()
+        ]
+        return f"ready in {self.total() * 1000:.0f} ms: " + ", ".join(parts)